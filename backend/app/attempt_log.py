@@ -0,0 +1,235 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+
+from . import leaderboard, practice, question_stats, timeline
+from .database import open_connection
+
+# Load environment variables
+load_dotenv()
+
+# Seconds between background compactions of new attempt events into user_progress and the rollups
+ATTEMPT_COMPACTION_INTERVAL = float(os.getenv("ATTEMPT_COMPACTION_INTERVAL", "5"))
+
+# Most events folded per partition in one compaction transaction
+ATTEMPT_COMPACTION_BATCH = int(os.getenv("ATTEMPT_COMPACTION_BATCH", "5000"))
+
+# Events go to one table per UTC month, so old history can be archived or dropped a month at a time
+PARTITION_PREFIX = "attempt_events_"
+
+_partitions: Set[str] = set()
+_compaction_lock = threading.Lock()
+# Background compaction task and the connection it uses on worker threads
+_compaction_task: Optional[asyncio.Task] = None
+_compaction_connection = None
+
+def partition_for(now: Optional[datetime] = None) -> str:
+    return PARTITION_PREFIX + (now or datetime.now(timezone.utc)).strftime("%Y%m")
+
+def create_tables(db) -> None:
+    # Id of the last event of each partition already folded into user_progress
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS attempt_log_watermarks (
+            partition TEXT PRIMARY KEY,
+            last_event_id INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+def _ensure_partition(db, partition: str) -> None:
+    if partition in _partitions:
+        return
+    create_tables(db)
+    db.execute(f"""
+        CREATE TABLE IF NOT EXISTS {partition} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            answer TEXT,
+            is_correct BOOLEAN,
+            time_spent INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db.execute("INSERT OR IGNORE INTO attempt_log_watermarks (partition, last_event_id) VALUES (?, 0)", (partition,))
+    db.commit()
+    _partitions.add(partition)
+
+def append(db, user_id: str, question_id: int, answer: Optional[str], is_correct: bool,
+           time_spent: Optional[int]) -> int:
+    """Record one submission as a blind insert into the current month's partition; returns the event id"""
+    partition = partition_for()
+    _ensure_partition(db, partition)
+    cursor = db.execute(
+        f"""
+        INSERT INTO {partition} (user_id, question_id, answer, is_correct, time_spent)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (user_id, question_id, answer, is_correct, time_spent)
+    )
+    db.commit()
+    return cursor.lastrowid
+
+def _epoch(created_at: str) -> float:
+    return datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+
+def _compact_batch(db, partition: str, watermark: int) -> Tuple[Optional[int], List[tuple], List[tuple]]:
+    """
+    Fold the next batch of events after watermark into user_progress, the daily
+    progress buckets, the practice review boxes, the question stats and the
+    leaderboards in one transaction, so a crash never leaves a batch half applied.
+    Returns the new watermark (None if there was nothing to claim), each event with
+    the answer it replaced, and the leaderboard deltas to apply in memory.
+    """
+    events = db.execute(
+        f"""
+        SELECT id, user_id, question_id, answer, is_correct, time_spent, created_at
+        FROM {partition} WHERE id > ? ORDER BY id LIMIT ?
+        """,
+        (watermark, ATTEMPT_COMPACTION_BATCH)
+    ).fetchall()
+    if not events:
+        return None, [], []
+
+    # Claim the batch first: if another worker moved the watermark, it is folding these events
+    db.execute(
+        "UPDATE attempt_log_watermarks SET last_event_id = ? WHERE partition = ? AND last_event_id = ?",
+        (events[-1][0], partition, watermark)
+    )
+    if db.execute("SELECT changes()").fetchone()[0] == 0:
+        db.rollback()
+        return None, [], []
+
+    latest: Dict[Tuple[str, int], Optional[bool]] = {}
+    folded: Dict[Tuple[str, int], list] = {}  # (user, question) -> [answer, is_correct, time_spent, count]
+    replayed = []
+    for _, user_id, question_id, answer, is_correct, time_spent, _ in events:
+        key = (user_id, question_id)
+        if key not in latest:
+            row = db.execute(
+                "SELECT is_correct FROM user_progress WHERE user_id = ? AND question_id = ?",
+                key
+            ).fetchone()
+            latest[key] = bool(row[0]) if row else None
+        replayed.append((user_id, question_id, bool(is_correct), latest[key], time_spent))
+        latest[key] = bool(is_correct)
+        entry = folded.setdefault(key, [None, None, None, 0])
+        entry[:3] = [answer, is_correct, time_spent]
+        entry[3] += 1
+
+    for (user_id, question_id), (answer, is_correct, time_spent, count) in folded.items():
+        db.execute(
+            """
+            INSERT INTO user_progress (user_id, question_id, answer, is_correct, attempt_count, time_spent)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, question_id) DO UPDATE SET
+                answer = excluded.answer,
+                is_correct = excluded.is_correct,
+                attempt_count = attempt_count + excluded.attempt_count,
+                time_spent = excluded.time_spent,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            (user_id, question_id, answer, is_correct, count, time_spent)
+        )
+    # created_at is UTC "YYYY-MM-DD HH:MM:SS"
+    timeline.record_events(db, [(user_id, question_id, is_correct, time_spent, created_at[:10])
+                                for _, user_id, question_id, _, is_correct, time_spent, created_at in events])
+    practice.record_events(db, [(user_id, question_id, is_correct, _epoch(created_at))
+                                for _, user_id, question_id, _, is_correct, _, created_at in events])
+    question_stats.record_events(db, [(question_id, is_correct, previous_is_correct, time_spent)
+                                      for _, question_id, is_correct, previous_is_correct, time_spent in replayed])
+    board_entries = leaderboard.record_events(db, [(user_id, question_id, is_correct, previous_is_correct)
+                                                   for user_id, question_id, is_correct, previous_is_correct, _
+                                                   in replayed])
+    db.commit()
+    return events[-1][0], replayed, board_entries
+
+def compact(db) -> int:
+    """
+    Fold new events of every partition into user_progress and its rollups, then
+    refresh this worker's in-memory question stats and leaderboards (reloading the
+    boards from the table now and then to pick up other workers' batches). Safe to run
+    from several workers at once: each batch is claimed by moving its partition's
+    watermark. Returns events folded.
+    """
+    if not _compaction_lock.acquire(blocking=False):
+        return 0
+    total = 0
+    try:
+        create_tables(db)
+        timeline.create_tables(db)
+        practice.create_tables(db)
+        question_stats.create_tables(db)
+        leaderboard.create_tables(db)
+        for partition, watermark in db.execute(
+            "SELECT partition, last_event_id FROM attempt_log_watermarks ORDER BY partition"
+        ).fetchall():
+            while True:
+                try:
+                    new_watermark, replayed, board_entries = _compact_batch(db, partition, watermark)
+                except Exception as e:
+                    db.rollback()
+                    print(f"Failed to compact {partition}: {str(e)}")
+                    break
+                if new_watermark is None:
+                    break
+                total += len(replayed)
+                watermark = new_watermark
+                # The in-memory views only follow committed batches
+                leaderboard.apply(board_entries)
+                try:
+                    question_stats.reload(db, {question_id for _, question_id, _, _, _ in replayed})
+                except Exception as e:
+                    # The batch is stored; the served stats catch up when these questions are compacted again
+                    print(f"Failed to reload question stats: {str(e)}")
+                if len(replayed) < ATTEMPT_COMPACTION_BATCH:
+                    break
+        try:
+            leaderboard.reload_if_due(db)
+        except Exception as e:
+            print(f"Failed to reload leaderboards: {str(e)}")
+    finally:
+        _compaction_lock.release()
+    if total:
+        print(f"Compacted {total} attempt events")
+    return total
+
+def _compact_in_thread() -> int:
+    """Compact with a connection of its own; blocking, meant to run in an executor"""
+    global _compaction_connection
+    if _compaction_connection is None:
+        _compaction_connection = open_connection()
+    try:
+        return compact(_compaction_connection)
+    except Exception:
+        # Reconnect on the next run in case the connection itself failed
+        _compaction_connection = None
+        raise
+
+async def _run_compactions() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(ATTEMPT_COMPACTION_INTERVAL)
+        try:
+            await loop.run_in_executor(None, _compact_in_thread)
+        except Exception as e:
+            print(f"Failed to compact attempt log: {str(e)}")
+
+def start_compaction() -> None:
+    """Compact every ATTEMPT_COMPACTION_INTERVAL seconds off the event loop, until stop_compaction()"""
+    global _compaction_task
+    if _compaction_task is None:
+        _compaction_task = asyncio.get_running_loop().create_task(_run_compactions())
+
+async def stop_compaction() -> None:
+    """Stop the background task, then fold whatever it has not reached yet"""
+    global _compaction_task
+    if _compaction_task is not None:
+        _compaction_task.cancel()
+        _compaction_task = None
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _compact_in_thread)
+    except Exception as e:
+        print(f"Failed to compact attempt log: {str(e)}")
@@ -34,6 +34,9 @@ get_firebase_app()
 # Security scheme
 security = HTTPBearer()
 
+# Firebase uids allowed to use the admin endpoints, comma-separated
+ADMIN_UIDS = {uid.strip() for uid in os.getenv("ADMIN_UIDS", "").split(",") if uid.strip()}
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     Verify Firebase ID token and return user ID
@@ -47,4 +50,15 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e),
             headers={"WWW-Authenticate": "Bearer"},
-        ) 
\ No newline at end of file
+        ) 
+
+async def require_admin(current_user: str = Depends(get_current_user)):
+    """
+    Return the user ID if it is listed in ADMIN_UIDS
+    """
+    if current_user not in ADMIN_UIDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user
@@ -0,0 +1,261 @@
+import contextlib
+import os
+import sqlite3
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from .question_store import QuestionStore
+
+# Load environment variables
+load_dotenv()
+
+# Path of the read-only catalog snapshot written by scripts/catalog_snapshot.py.
+# When unset, every read goes to Turso as before.
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH")
+
+# How often (seconds) to stat the snapshot file for a newer version
+CATALOG_CHECK_INTERVAL = float(os.getenv("CATALOG_CHECK_INTERVAL", "5"))
+
+# Bytes of the snapshot SQLite may memory-map; reads then come straight from the page cache
+CATALOG_MMAP_SIZE = int(os.getenv("CATALOG_MMAP_SIZE", str(1 << 30)))
+
+# Load the whole snapshot into a compact in-memory QuestionStore and serve reads from it
+# instead of SQLite (about 0.3 KB per question; see question_store.py for measurements)
+CATALOG_IN_MEMORY = os.getenv("CATALOG_IN_MEMORY", "false").lower() in ("1", "true", "yes")
+
+# Must match SNAPSHOT_FORMAT_VERSION in scripts/catalog_snapshot.py
+SUPPORTED_FORMAT_VERSION = 1
+
+class CatalogSnapshot:
+    """
+    A read-only, memory-mapped view of a catalog snapshot file.
+    Opening is cheap: SQLite only reads the header and meta table, and pages are
+    mapped lazily as questions are read. Readers hold it through use_snapshot();
+    once a newer snapshot replaces it, it is closed when the last reader is done.
+    """
+
+    def __init__(self, path: str):
+        stat = os.stat(path)
+        self.path = path
+        self.file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        # immutable=1 skips locking and change detection; the importer never
+        # modifies a published snapshot, it renames a new file over it
+        self.conn = sqlite3.connect(
+            f"file:{path}?mode=ro&immutable=1",
+            uri=True,
+            check_same_thread=False
+        )
+        self.conn.execute(f"PRAGMA mmap_size = {CATALOG_MMAP_SIZE}")
+
+        meta = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        if int(meta.get("format_version", 0)) != SUPPORTED_FORMAT_VERSION:
+            self.conn.close()
+            raise ValueError(
+                f"Unsupported catalog snapshot format {meta.get('format_version')} in {path}"
+            )
+        self.version = meta["catalog_version"]
+        self.question_count = int(meta.get("question_count", 0))
+        self.store = QuestionStore.load(self.conn) if CATALOG_IN_MEMORY else None
+
+        self._readers = 0
+        self._retired = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Register a reader; False once the snapshot has been retired"""
+        with self._lock:
+            if self._retired:
+                return False
+            self._readers += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._readers -= 1
+            close = self._retired and self._readers == 0
+        if close:
+            self.conn.close()
+
+    def retire(self) -> None:
+        """Close the connection and its mapping as soon as no reader holds the snapshot"""
+        with self._lock:
+            self._retired = True
+            close = self._readers == 0
+        if close:
+            self.conn.close()
+
+    def _attach_options(self, questions: Dict[int, dict]) -> None:
+        if not questions:
+            return
+        ids = list(questions.keys())
+        placeholders = ",".join("?" * len(ids))
+        rows = self.conn.execute(
+            f"""
+            SELECT question_id, label, text, is_correct
+            FROM options
+            WHERE question_id IN ({placeholders})
+            ORDER BY question_id, label
+            """,
+            ids
+        ).fetchall()
+        for question_id, label, text, is_correct in rows:
+            questions[question_id]['options'].append({
+                'label': label,
+                'text': text,
+                'is_correct': bool(is_correct)
+            })
+
+    @staticmethod
+    def _question_dict(row: Tuple) -> dict:
+        return {
+            'id': row[0],
+            'number': row[1],
+            'text': row[2],
+            'subject': row[3],
+            'options': [],
+            'images': [],
+            'statements': []
+        }
+
+    def get_questions(self, subject: Optional[str], limit: int, offset: int) -> List[dict]:
+        if self.store is not None:
+            return self.store.get_questions(subject, limit, offset)
+        query = "SELECT id, number, text, subject FROM questions"
+        params: list = []
+        if subject:
+            query += " WHERE subject = ?"
+            params.append(subject)
+        query += " ORDER BY id LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        questions = {
+            row[0]: self._question_dict(row)
+            for row in self.conn.execute(query, params).fetchall()
+        }
+        self._attach_options(questions)
+        return list(questions.values())
+
+    def get_questions_by_ids(self, question_ids: List[int]) -> List[dict]:
+        """Questions with the given ids, in id order; unknown ids are skipped"""
+        if self.store is not None:
+            return self.store.get_questions_by_ids(question_ids)
+        if not question_ids:
+            return []
+        placeholders = ",".join("?" * len(question_ids))
+        questions = {
+            row[0]: self._question_dict(row)
+            for row in self.conn.execute(
+                f"SELECT id, number, text, subject FROM questions WHERE id IN ({placeholders}) ORDER BY id",
+                question_ids
+            ).fetchall()
+        }
+        self._attach_options(questions)
+        return list(questions.values())
+
+    def get_question(self, question_id: int) -> Optional[dict]:
+        if self.store is not None:
+            return self.store.get_question(question_id)
+        row = self.conn.execute(
+            "SELECT id, number, text, subject FROM questions WHERE id = ?",
+            (question_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        questions = {row[0]: self._question_dict(row)}
+        self._attach_options(questions)
+        return questions[row[0]]
+
+    def get_answer(self, question_id: int) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """Return (correct option label, explanation), or None if the question does not exist"""
+        if self.store is not None:
+            return self.store.get_answer(question_id)
+        row = self.conn.execute(
+            """
+            SELECT q.explanation,
+                   (SELECT o.label FROM options o WHERE o.question_id = q.id AND o.is_correct = 1)
+            FROM questions q
+            WHERE q.id = ?
+            """,
+            (question_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[1], row[0]
+
+# The snapshot currently being served; replaced by a single reference assignment
+_snapshot: Optional[CatalogSnapshot] = None
+_last_check = 0.0
+_reload_lock = threading.Lock()
+
+def _file_id(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def get_snapshot() -> Optional[CatalogSnapshot]:
+    """
+    Return the current catalog snapshot, or None when no snapshot is configured.
+    At most every CATALOG_CHECK_INTERVAL seconds the file is stat'ed; if the importer
+    renamed a new snapshot into place and its catalog version differs, it is opened
+    and swapped in. Requests already holding the old snapshot through use_snapshot()
+    keep using it; the snapshot returned here may be closed by a later swap, so read
+    through use_snapshot() rather than holding on to it.
+    """
+    global _snapshot, _last_check
+
+    if not CATALOG_SNAPSHOT_PATH:
+        return None
+
+    now = time.monotonic()
+    if _snapshot is not None and now - _last_check < CATALOG_CHECK_INTERVAL:
+        return _snapshot
+
+    with _reload_lock:
+        if _snapshot is not None and now - _last_check < CATALOG_CHECK_INTERVAL:
+            return _snapshot
+        _last_check = now
+
+        file_id = _file_id(CATALOG_SNAPSHOT_PATH)
+        if file_id is None or (_snapshot is not None and file_id == _snapshot.file_id):
+            return _snapshot
+
+        try:
+            candidate = CatalogSnapshot(CATALOG_SNAPSHOT_PATH)
+        except Exception as e:
+            print(f"Failed to open catalog snapshot {CATALOG_SNAPSHOT_PATH}: {str(e)}")
+            return _snapshot
+
+        if _snapshot is None or candidate.version != _snapshot.version:
+            print(f"Serving catalog snapshot version {candidate.version} "
+                  f"({candidate.question_count} questions)")
+            previous, _snapshot = _snapshot, candidate
+            if previous is not None:
+                previous.retire()
+        else:
+            # Same catalog rewritten; keep serving the mapping we already have
+            candidate.conn.close()
+            _snapshot.file_id = file_id
+
+    return _snapshot
+
+@contextlib.contextmanager
+def use_snapshot():
+    """
+    Hold the current catalog snapshot (None when none is configured) for the
+    duration of the block, so a swap cannot close it mid-read.
+    """
+    while True:
+        snapshot = get_snapshot()
+        # A swap may retire it between the two calls; then pick up the new one
+        if snapshot is None or snapshot.acquire():
+            break
+    try:
+        yield snapshot
+    finally:
+        if snapshot is not None:
+            snapshot.release()
@@ -1,8 +1,11 @@
 import os
+import asyncio
+from typing import Dict, Optional
 from dotenv import load_dotenv
 import libsql_experimental as libsql
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
 import contextlib
+import threading
 
 # Load environment variables
 load_dotenv()
@@ -16,8 +19,25 @@ if not TURSO_DATABASE_URL:
 if not TURSO_AUTH_TOKEN:
     raise ValueError("TURSO_AUTH_TOKEN environment variable is not set")
 
+# Requests allowed to hold the database at once, and how long (seconds) a request
+# waits for a slot before being turned away with 503 instead of queueing
+DB_MAX_IN_FLIGHT = int(os.getenv("DB_MAX_IN_FLIGHT", "8"))
+DB_ACQUIRE_TIMEOUT = float(os.getenv("DB_ACQUIRE_TIMEOUT", "0.5"))
+
 # Create a global connection pool
 _connection = None
+# Second connection for reads run on worker threads (see singleflight.py), so the
+# event loop thread and a worker never use one connection at the same time
+_read_connection = None
+_read_lock = threading.Lock()
+_slots: Optional[asyncio.Semaphore] = None
+
+# Requests turned away because every slot was busy, and slots in use; exposed on /api/metrics/limits
+counters: Dict[str, int] = {"db_busy": 0, "db_in_flight": 0}
+
+def open_connection():
+    """A new connection of its own, for long-running work such as exports"""
+    return libsql.connect(TURSO_DATABASE_URL, auth_token=TURSO_AUTH_TOKEN)
 
 def get_connection():
     """
@@ -25,19 +45,59 @@ def get_connection():
     """
     global _connection
     if _connection is None:
-        _connection = libsql.connect(TURSO_DATABASE_URL, auth_token=TURSO_AUTH_TOKEN)
+        _connection = open_connection()
     return _connection
 
+@contextlib.asynccontextmanager
+async def db_slot():
+    """Hold one of the DB_MAX_IN_FLIGHT slots, or raise 503 if none frees up in time"""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(DB_MAX_IN_FLIGHT)
+    try:
+        await asyncio.wait_for(_slots.acquire(), timeout=DB_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        counters["db_busy"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database busy, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    counters["db_in_flight"] += 1
+    try:
+        yield
+    finally:
+        counters["db_in_flight"] -= 1
+        _slots.release()
+
+def run_read(fn):
+    """
+    Call fn(conn) with the worker-thread read connection, one thread at a time.
+    Blocking; meant to run in an executor.
+    """
+    global _read_connection
+    with _read_lock:
+        if _read_connection is None:
+            _read_connection = open_connection()
+        try:
+            return fn(_read_connection)
+        except Exception:
+            # Reconnect on the next read in case the connection itself failed
+            _read_connection = None
+            raise
+
 async def get_db():
     """
     Returns a database client.
     This will be used as a FastAPI dependency.
     """
-    conn = get_connection()
-    try:
-        yield conn
-    except Exception as e:
-        # If there's a connection error, clear the global connection
-        global _connection
-        _connection = None
-        raise e 
\ No newline at end of file
+    global _connection
+    async with db_slot():
+        conn = get_connection()
+        try:
+            yield conn
+        except Exception as e:
+            # If there's a connection error, clear the global connection
+            _connection = None
+            raise e
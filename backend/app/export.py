@@ -0,0 +1,184 @@
+import argparse
+import csv
+import io
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+# Load environment variables
+load_dotenv()
+
+# Rows fetched and written per chunk (one CSV block or Parquet row group), so memory
+# stays flat however large user_progress is. From backend/:
+#   python -m app.export progress.parquet --since "2026-10-01 00:00:00"
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+
+FORMATS = ("csv", "parquet")
+
+COLUMNS = [
+    "progress_id", "user_id", "question_id", "answer", "is_correct", "attempt_count",
+    "time_spent", "created_at", "updated_at",
+    "subject", "chapter", "exam_year", "exam_name", "question_type",
+]
+
+EXPORT_QUERY = """
+    SELECT up.id, up.user_id, up.question_id, up.answer, up.is_correct, up.attempt_count,
+           up.time_spent, up.created_at, up.updated_at,
+           q.subject, q.chapter, q.exam_year, q.exam_name, q.question_type
+    FROM user_progress up
+    JOIN questions q ON up.question_id = q.id
+    WHERE up.id > ? {since}
+    ORDER BY up.id
+    LIMIT ?
+"""
+
+def watermark_now() -> str:
+    """The current time as SQLite's CURRENT_TIMESTAMP writes it, for the next export's `since`"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def iter_chunks(db, since: Optional[str] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[tuple]]:
+    """
+    Yield rows in chunks of at most chunk_size, resuming each query after the
+    last id seen instead of using OFFSET. With `since`, only rows updated after
+    that timestamp are exported.
+    """
+    query = EXPORT_QUERY.format(since="AND up.updated_at > ?" if since else "")
+    last_id = 0
+    while True:
+        params: Tuple = (last_id, since, chunk_size) if since else (last_id, chunk_size)
+        rows = db.execute(query, params).fetchall()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+def iter_csv(chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    """Encode chunks as CSV, header first, one block of bytes per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def _parquet_schema():
+    return pa.schema([
+        ("progress_id", pa.int64()),
+        ("user_id", pa.string()),
+        ("question_id", pa.int64()),
+        ("answer", pa.string()),
+        ("is_correct", pa.bool_()),
+        ("attempt_count", pa.int64()),
+        ("time_spent", pa.int64()),
+        ("created_at", pa.string()),
+        ("updated_at", pa.string()),
+        ("subject", pa.string()),
+        ("chapter", pa.string()),
+        ("exam_year", pa.int64()),
+        ("exam_name", pa.string()),
+        ("question_type", pa.string()),
+    ])
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+def iter_parquet(chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    """Encode chunks as a Parquet file, one row group per chunk, yielding bytes as they are written"""
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            # libsql returns booleans as 0/1
+            columns[4] = [None if value is None else bool(value) for value in columns[4]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def iter_export(db, export_format: str, since: Optional[str] = None,
+                chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    if export_format not in FORMATS:
+        raise ValueError(f"Unknown export format {export_format!r}; choose from {', '.join(FORMATS)}")
+    chunks = iter_chunks(db, since, chunk_size)
+    return iter_csv(chunks) if export_format == "csv" else iter_parquet(chunks)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export user progress joined with questions as CSV or Parquet")
+    parser.add_argument("output", help="Output file; the format follows the extension unless --format is given")
+    parser.add_argument("--format", choices=FORMATS, default=None)
+    parser.add_argument("--since", default=None,
+                        help="Only rows updated after this timestamp (the watermark printed by the last export)")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    export_format = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+    if export_format == "parquet" and pa is None:
+        print("Parquet export needs pyarrow: pip install pyarrow")
+        sys.exit(1)
+
+    from .database import open_connection
+
+    db = open_connection()
+    # Taken before reading, so rows updated during the export are picked up again next time
+    watermark = watermark_now()
+    written = 0
+    try:
+        with open(args.output, "wb") as f:
+            for data in iter_export(db, export_format, args.since, args.chunk_size):
+                f.write(data)
+                written += len(data)
+    finally:
+        db.close()
+    print(f"Wrote {written} bytes to {args.output}")
+    print(f"Next incremental export: --since \"{watermark}\"")
+
+if __name__ == "__main__":
+    main()
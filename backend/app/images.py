@@ -0,0 +1,149 @@
+import glob
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from .database import get_connection
+
+# Load environment variables
+load_dotenv()
+
+# Root of the content-addressed image store (<root>/<hash[:2]>/<hash>.<ext>, thumbnails
+# as <hash>.thumb.<ext>), filled by scripts/publish_images.py
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", "images")
+
+# How often (seconds) the question -> image hashes index is reloaded from question_images
+IMAGE_INDEX_TTL = float(os.getenv("IMAGE_INDEX_TTL", "300"))
+
+# How long (seconds) the redirect from a missing thumbnail to the full image may be
+# cached; a thumbnail published later is picked up after this
+IMAGE_FALLBACK_MAX_AGE = int(os.getenv("IMAGE_FALLBACK_MAX_AGE", "300"))
+
+# Bytes read from disk per chunk when streaming an image
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+SIZES = ("full", "thumb")
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "gif": "image/gif",
+    "jpx": "image/jpx",
+    "jb2": "image/jbig2",
+}
+
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# (hash, size) -> path of files found; they are immutable once published, so hits never
+# go stale. Misses are not remembered, a thumbnail may still be published later.
+_paths: Dict[Tuple[str, str], str] = {}
+
+_index: Dict[int, List[str]] = {}
+_index_loaded_at: Optional[float] = None
+_index_lock = threading.Lock()
+
+def is_image_hash(value: str) -> bool:
+    return bool(_HASH_PATTERN.match(value))
+
+def find_image(image_hash: str, size: str = "full") -> Optional[str]:
+    """Path of a stored image or of its thumbnail, None if that file is not in the store"""
+    key = (image_hash, size)
+    path = _paths.get(key)
+    if path is not None:
+        return path
+    directory = os.path.join(IMAGE_STORE_DIR, image_hash[:2])
+    if size == "thumb":
+        candidates = glob.glob(os.path.join(directory, f"{image_hash}.thumb.*"))
+    else:
+        candidates = [
+            candidate for candidate in glob.glob(os.path.join(directory, f"{image_hash}.*"))
+            if ".thumb." not in os.path.basename(candidate)
+        ]
+    candidates = [candidate for candidate in candidates if not candidate.endswith(".tmp")]
+    if not candidates:
+        return None
+    _paths[key] = candidates[0]
+    return candidates[0]
+
+def media_type(path: str) -> str:
+    return MEDIA_TYPES.get(path.rsplit(".", 1)[-1].lower(), "application/octet-stream")
+
+def parse_range(header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "bytes=start-end" header into an inclusive (start, end).
+    Returns None when the range cannot be satisfied; multiple ranges are not supported.
+    """
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header)
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if match.group(1):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else file_size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(file_size - int(match.group(2)), 0)
+        end = file_size - 1
+    end = min(end, file_size - 1)
+    if start > end:
+        return None
+    return start, end
+
+def iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Yield bytes start..end (inclusive) of a file in IMAGE_CHUNK_SIZE chunks"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(IMAGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def create_tables(db) -> None:
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS question_images (
+            question_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            image_hash TEXT NOT NULL,
+            PRIMARY KEY (question_id, position)
+        )
+    """)
+
+def load_index(db) -> None:
+    """Load every question's image hashes, in position order"""
+    global _index, _index_loaded_at
+    create_tables(db)
+    index: Dict[int, List[str]] = {}
+    for question_id, image_hash in db.execute(
+        "SELECT question_id, image_hash FROM question_images ORDER BY question_id, position"
+    ).fetchall():
+        index.setdefault(question_id, []).append(image_hash)
+    with _index_lock:
+        _index = index
+        _index_loaded_at = time.monotonic()
+    print(f"Loaded images for {len(index)} questions")
+
+def _refresh_index() -> None:
+    global _index_loaded_at
+    if _index_loaded_at is not None and time.monotonic() - _index_loaded_at < IMAGE_INDEX_TTL:
+        return
+    try:
+        load_index(get_connection())
+    except Exception as e:
+        # Retry after another TTL rather than on every request
+        _index_loaded_at = time.monotonic()
+        print(f"Failed to load question images: {str(e)}")
+
+def attach(questions: Iterable[dict]) -> List[dict]:
+    """Set each question's "images" to the hashes of its images (served by /api/images/{hash})"""
+    _refresh_index()
+    questions = list(questions)
+    for question in questions:
+        question["images"] = list(_index.get(question["id"], ()))
+    return questions
@@ -0,0 +1,356 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Seconds between reloads of the boards from leaderboard_entries, which pick up the
+# events compacted by other workers
+LEADERBOARD_RELOAD_INTERVAL = float(os.getenv("LEADERBOARD_RELOAD_INTERVAL", "30"))
+
+# Users need this many attempts on a board before they are ranked by accuracy,
+# so one lucky answer does not top the board at 100%
+LEADERBOARD_MIN_ATTEMPTS = int(os.getenv("LEADERBOARD_MIN_ATTEMPTS", "20"))
+
+METRICS = ("correct", "accuracy")
+ALL_TIME = "all"
+
+class _Node:
+    __slots__ = ("key", "priority", "size", "left", "right")
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.priority = random.random()
+        self.size = 1
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+def _size(node: Optional[_Node]) -> int:
+    return node.size if node else 0
+
+def _update(node: _Node) -> _Node:
+    node.size = 1 + _size(node.left) + _size(node.right)
+    return node
+
+def _split(node: Optional[_Node], key: tuple) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split into keys < key and keys >= key"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        return _update(node), right
+    left, right = _split(node.left, key)
+    node.left = right
+    return left, _update(node)
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+def _remove(node: Optional[_Node], key: tuple) -> Optional[_Node]:
+    if node is None:
+        return None
+    if node.key == key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        node.left = _remove(node.left, key)
+    else:
+        node.right = _remove(node.right, key)
+    return _update(node)
+
+class OrderStatisticTree:
+    """
+    Treap with subtree sizes: insert, delete and rank are O(log n) expected,
+    and the first n keys are read in O(log n + n).
+    """
+
+    def __init__(self):
+        self.root: Optional[_Node] = None
+
+    def __len__(self) -> int:
+        return _size(self.root)
+
+    def insert(self, key: tuple) -> None:
+        left, right = _split(self.root, key)
+        self.root = _merge(_merge(left, _Node(key)), right)
+
+    def delete(self, key: tuple) -> None:
+        self.root = _remove(self.root, key)
+
+    def rank(self, key: tuple) -> int:
+        """Number of keys smaller than key"""
+        rank = 0
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                rank += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return rank
+
+    def first(self, n: int) -> List[tuple]:
+        keys: List[tuple] = []
+        stack: List[_Node] = []
+        node = self.root
+        while (stack or node is not None) and len(keys) < n:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            keys.append(node.key)
+            node = node.right
+        return keys
+
+class Leaderboard:
+    """
+    One board (a scope such as "all" or a subject, and a window such as all-time
+    or one ISO week) ranked both by correct answers and by accuracy. Keys sort
+    ascending, so scores are negated to put the best user first.
+    """
+
+    def __init__(self):
+        self.users: Dict[str, List[int]] = {}  # user_id -> [correct, attempted]
+        self.trees = {metric: OrderStatisticTree() for metric in METRICS}
+
+    @staticmethod
+    def _keys(user_id: str, correct: int, attempted: int) -> Dict[str, Optional[tuple]]:
+        accuracy = correct / attempted if attempted else 0.0
+        return {
+            "correct": (-correct, -accuracy, user_id),
+            "accuracy": (-accuracy, -correct, user_id) if attempted >= LEADERBOARD_MIN_ATTEMPTS else None,
+        }
+
+    def add(self, user_id: str, correct_delta: int, attempted_delta: int) -> None:
+        entry = self.users.get(user_id)
+        if entry is not None:
+            for metric, key in self._keys(user_id, *entry).items():
+                if key is not None:
+                    self.trees[metric].delete(key)
+        else:
+            entry = self.users[user_id] = [0, 0]
+        entry[0] += correct_delta
+        entry[1] += attempted_delta
+        for metric, key in self._keys(user_id, *entry).items():
+            if key is not None:
+                self.trees[metric].insert(key)
+
+    def _entry(self, rank: int, user_id: str) -> dict:
+        correct, attempted = self.users[user_id]
+        return {
+            "rank": rank,
+            "user_id": user_id,
+            "correct": correct,
+            "attempted": attempted,
+            "accuracy": round(correct / attempted * 100, 1) if attempted else 0.0,
+        }
+
+    def top(self, metric: str, n: int) -> List[dict]:
+        return [self._entry(rank, key[-1]) for rank, key in enumerate(self.trees[metric].first(n), 1)]
+
+    def rank_of(self, metric: str, user_id: str) -> Optional[dict]:
+        entry = self.users.get(user_id)
+        if entry is None:
+            return None
+        key = self._keys(user_id, *entry)[metric]
+        if key is None:
+            return None
+        return self._entry(self.trees[metric].rank(key) + 1, user_id)
+
+    def size(self, metric: str) -> int:
+        return len(self.trees[metric])
+
+def current_week(now: Optional[datetime] = None) -> str:
+    year, week, _ = (now or datetime.now(timezone.utc)).isocalendar()
+    return f"{year}-W{week:02d}"
+
+def _board_id(scope: str, window: str) -> str:
+    return f"{scope}:{window}"
+
+# Marker row written in the same transaction as the seed from user_progress; it has no
+# ":<window>" suffix, so it is never loaded as a board
+SEED_MARKER = "_seeded"
+
+_boards: Dict[str, Leaderboard] = {}
+_subjects: Dict[int, Optional[str]] = {}
+_last_reload = time.monotonic()
+_lock = threading.Lock()
+
+def create_tables(db) -> None:
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS leaderboard_entries (
+            board TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            correct INTEGER NOT NULL DEFAULT 0,
+            attempted INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (board, user_id)
+        )
+    """)
+
+def _apply(board_id: str, user_id: str, correct_delta: int, attempted_delta: int) -> None:
+    board = _boards.get(board_id)
+    if board is None:
+        board = _boards[board_id] = Leaderboard()
+    board.add(user_id, correct_delta, attempted_delta)
+
+def _read_boards(db) -> List[tuple]:
+    week = current_week()
+    return db.execute(
+        "SELECT board, user_id, correct, attempted FROM leaderboard_entries WHERE board LIKE ? OR board LIKE ?",
+        (f"%:{ALL_TIME}", f"%:{week}")
+    ).fetchall()
+
+def _replace_boards(rows: List[tuple]) -> None:
+    global _last_reload
+    # Build outside the lock, so queries only wait for the swap
+    boards: Dict[str, Leaderboard] = {}
+    for board_id, user_id, correct, attempted in rows:
+        board = boards.get(board_id)
+        if board is None:
+            board = boards[board_id] = Leaderboard()
+        board.add(user_id, correct, attempted)
+    with _lock:
+        _boards.clear()
+        _boards.update(boards)
+        _last_reload = time.monotonic()
+
+def load(db) -> None:
+    """Load the all-time and current-week boards, building all-time ones from user_progress on first run"""
+    create_tables(db)
+    rows = _read_boards(db)
+    if not rows:
+        seeded = _build_from_progress(db)
+        # Another worker seeded the table first; load what it wrote
+        rows = seeded if seeded is not None else _read_boards(db)
+    _replace_boards(rows)
+    print(f"Loaded {len(_boards)} leaderboards")
+
+def reload_if_due(db) -> None:
+    """
+    Every LEADERBOARD_RELOAD_INTERVAL seconds, replace the in-memory boards with the
+    stored ones. Each batch is compacted by one worker only, so this is how the
+    events compacted by other workers reach this worker's rankings. Call it from
+    the thread that applies compacted batches, after they are committed.
+    """
+    if time.monotonic() - _last_reload < LEADERBOARD_RELOAD_INTERVAL:
+        return
+    _replace_boards(_read_boards(db))
+
+def _build_from_progress(db) -> Optional[List[tuple]]:
+    """
+    One GROUP BY over user_progress, run only when no board has been persisted yet.
+    The seed is claimed with a marker row in the same transaction, so when several
+    workers start together only one writes it; the others get None.
+    """
+    db.execute(
+        "INSERT INTO leaderboard_entries (board, user_id) VALUES (?, '') ON CONFLICT (board, user_id) DO NOTHING",
+        (SEED_MARKER,)
+    )
+    if db.execute("SELECT changes()").fetchone()[0] == 0:
+        db.rollback()
+        return None
+    rows = db.execute("""
+        SELECT q.subject, up.user_id,
+               SUM(CASE WHEN up.is_correct = 1 THEN 1 ELSE 0 END), COUNT(*)
+        FROM user_progress up
+        JOIN questions q ON up.question_id = q.id
+        GROUP BY q.subject, up.user_id
+    """).fetchall()
+    totals: Dict[str, List[int]] = {}
+    entries = []
+    for subject, user_id, correct, attempted in rows:
+        # Like record(), questions without a subject only count towards the "all" board
+        if subject:
+            entries.append((_board_id(subject, ALL_TIME), user_id, correct, attempted))
+        total = totals.setdefault(user_id, [0, 0])
+        total[0] += correct
+        total[1] += attempted
+    entries.extend((_board_id("all", ALL_TIME), user_id, correct, attempted)
+                   for user_id, (correct, attempted) in totals.items())
+    _write(db, entries)
+    db.commit()
+    return entries
+
+def _write(db, entries: List[tuple]) -> None:
+    for board_id, user_id, correct, attempted in entries:
+        db.execute(
+            """
+            INSERT INTO leaderboard_entries (board, user_id, correct, attempted)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (board, user_id) DO UPDATE SET
+                correct = correct + excluded.correct,
+                attempted = attempted + excluded.attempted
+            """,
+            (board_id, user_id, correct, attempted)
+        )
+
+def _question_subject(db, question_id: int) -> Optional[str]:
+    if question_id not in _subjects:
+        row = db.execute("SELECT subject FROM questions WHERE id = ?", (question_id,)).fetchone()
+        _subjects[question_id] = row[0] if row else None
+    return _subjects[question_id]
+
+def record_events(db, events: List[tuple]) -> List[tuple]:
+    """
+    Add compacted events, (user_id, question_id, is_correct, previous_is_correct),
+    to the stored boards. All-time boards count each question once by its latest
+    answer; weekly boards count every answer given during the week. Runs inside the
+    caller's transaction and does not commit, so the boards move together with the
+    compaction watermark. Returns the (board id, user_id, correct, attempted) deltas
+    written, for apply() once the transaction is committed.
+    """
+    week = current_week()
+    deltas: Dict[Tuple[str, str], List[int]] = {}
+    for user_id, question_id, is_correct, previous_is_correct in events:
+        subject = _question_subject(db, question_id)
+        all_time_delta = (int(bool(is_correct)) - int(bool(previous_is_correct)),
+                          1 if previous_is_correct is None else 0)
+        week_delta = (int(bool(is_correct)), 1)
+        for scope in ("all", subject) if subject else ("all",):
+            for board_id, (correct, attempted) in ((_board_id(scope, ALL_TIME), all_time_delta),
+                                                   (_board_id(scope, week), week_delta)):
+                delta = deltas.setdefault((board_id, user_id), [0, 0])
+                delta[0] += correct
+                delta[1] += attempted
+
+    entries = [(board_id, user_id, correct, attempted)
+               for (board_id, user_id), (correct, attempted) in deltas.items() if correct or attempted]
+    _write(db, entries)
+    return entries
+
+def apply(entries: List[tuple]) -> None:
+    """Add committed deltas from record_events() to the in-memory boards"""
+    week = current_week()
+    with _lock:
+        for board_id, user_id, correct, attempted in entries:
+            _apply(board_id, user_id, correct, attempted)
+        # Weekly boards from earlier weeks are only kept in the table
+        for board_id in [b for b in _boards if not b.endswith(f":{ALL_TIME}") and not b.endswith(f":{week}")]:
+            del _boards[board_id]
+
+def query(user_id: str, metric: str, subject: Optional[str], window: str, limit: int) -> dict:
+    """Top `limit` users of a board and the caller's own rank"""
+    board_window = ALL_TIME if window == ALL_TIME else current_week()
+    board_id = _board_id(subject or "all", board_window)
+    # Compaction updates the trees from a worker thread; never read one mid-rebalance
+    with _lock:
+        board = _boards.get(board_id)
+        if board is None:
+            return {"board": board_id, "total": 0, "entries": [], "me": None}
+        return {
+            "board": board_id,
+            "total": board.size(metric),
+            "entries": board.top(metric, limit),
+            "me": board.rank_of(metric, user_id),
+        }
@@ -1,11 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from typing import List, Optional
+from datetime import date, datetime, timedelta, timezone
+import asyncio
 import os
 from dotenv import load_dotenv
-from .database import get_db
+from .database import db_slot, get_db, get_connection, open_connection, run_read
+from .database import counters as db_counters
 from .models import Question, QuestionResponse, UserProgress
-from .auth import get_current_user
+from .auth import get_current_user, require_admin
+from .ratelimit import limit_reads, limit_writes
+from .ratelimit import counters as rate_limit_counters
+from .catalog import get_snapshot, use_snapshot
+from . import attempt_log, export, images, leaderboard, practice, question_stats, singleflight, timeline
 
 # Load environment variables
 load_dotenv()
@@ -22,162 +30,265 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+@app.on_event("startup")
+async def load_catalog_snapshot():
+    # Map the catalog snapshot (if configured) before the first request arrives
+    get_snapshot()
+
+@app.on_event("startup")
+async def load_question_stats():
+    try:
+        question_stats.load(get_connection())
+    except Exception as e:
+        # Questions are still served, just without stats until the next write
+        print(f"Failed to load question stats: {str(e)}")
+
+@app.on_event("startup")
+async def load_leaderboards():
+    try:
+        leaderboard.load(get_connection())
+    except Exception as e:
+        print(f"Failed to load leaderboards: {str(e)}")
+
+@app.on_event("startup")
+async def load_question_images():
+    try:
+        images.load_index(get_connection())
+    except Exception as e:
+        # Questions are still served, just without images until the next reload
+        print(f"Failed to load question images: {str(e)}")
+
+@app.on_event("startup")
+async def backfill_timeline():
+    # Before the first compaction, so buckets built from user_progress are not counted twice
+    try:
+        timeline.backfill(get_connection())
+    except Exception as e:
+        print(f"Failed to backfill progress timeline: {str(e)}")
+
+@app.on_event("startup")
+async def backfill_practice_reviews():
+    # Before the first compaction, which moves questions on from the boxes seeded here
+    try:
+        practice.backfill(get_connection())
+    except Exception as e:
+        print(f"Failed to backfill practice reviews: {str(e)}")
+
+@app.on_event("startup")
+async def compact_attempt_log():
+    # Fold events left over from the last run before serving progress
+    try:
+        attempt_log.compact(get_connection())
+    except Exception as e:
+        print(f"Failed to compact attempt log: {str(e)}")
+    attempt_log.start_compaction()
+
+@app.on_event("shutdown")
+async def stop_attempt_compaction():
+    # Stats and leaderboards are written with each compacted batch, so a final compaction is all that is left
+    await attempt_log.stop_compaction()
+
 @app.get("/")
 async def root():
     return {"message": "PyQ API is running"}
 
+# Fields a sparse fieldset may select, and the most ids one bulk request may ask for
+QUESTION_FIELDS = ("id", "number", "text", "subject", "options", "images", "statements", "stats")
+MAX_BULK_IDS = 100
+
+def _parse_ids(ids: str) -> List[int]:
+    try:
+        question_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    # Drop repeats but keep the requested order
+    question_ids = list(dict.fromkeys(question_ids))
+    if not question_ids:
+        raise HTTPException(status_code=400, detail="ids must not be empty")
+    if len(question_ids) > MAX_BULK_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_IDS} ids per request")
+    return question_ids
+
+def _parse_fields(fields: str) -> List[str]:
+    selected = list(dict.fromkeys(part.strip() for part in fields.split(",") if part.strip()))
+    unknown = [field for field in selected if field not in QUESTION_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {unknown}; choose from {', '.join(QUESTION_FIELDS)}"
+        )
+    return selected
+
+def _question_payload(questions: List[dict], selected: Optional[List[str]]):
+    """
+    Attach images and stats and apply the sparse fieldset. Fetched dicts may be
+    shared between coalesced requests, so they are copied rather than modified.
+    """
+    questions = images.attach(dict(question) for question in questions)
+    if selected is None:
+        return question_stats.attach(questions)
+    with_stats = "stats" in selected
+    payload = []
+    for question in questions:
+        item = {field: question[field] for field in selected if field != "stats"}
+        if with_stats:
+            item["stats"] = question_stats.get(question["id"])
+        payload.append(item)
+    # Partial questions do not fit QuestionResponse, so skip response_model validation
+    return JSONResponse(content=payload)
+
 @app.get("/api/questions", response_model=List[QuestionResponse])
 async def get_questions(
     subject: Optional[str] = Query(None, description="Filter questions by subject"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=50, description="Number of questions per page"),
-    current_user: str = Depends(get_current_user),
-    db = Depends(get_db)
+    ids: Optional[str] = Query(None, description="Comma-separated question ids to fetch in one call; subject and paging are then ignored"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,number,subject"),
+    current_user: str = Depends(limit_reads)
 ):
     offset = (page - 1) * limit
+    question_ids = _parse_ids(ids) if ids is not None else None
+    selected = _parse_fields(fields) if fields is not None else None
+    # Bulk requests share one query per distinct id set, whatever order the ids came in
+    id_key = tuple(sorted(question_ids)) if question_ids is not None else None
+
+    # Serve from the memory-mapped catalog snapshot when one is available
+    with use_snapshot() as snapshot:
+        if snapshot is not None:
+            if id_key is not None:
+                questions = snapshot.get_questions_by_ids(list(id_key))
+            else:
+                questions = snapshot.get_questions(subject, limit, offset)
+    if snapshot is None:
+        try:
+            if id_key is not None:
+                questions = await singleflight.do(
+                    "questions_by_id", id_key,
+                    lambda db: _fetch_questions_by_ids(db, list(id_key))
+                )
+            else:
+                # Identical pages requested at the same time share one query
+                questions = await singleflight.do(
+                    "questions", (subject, limit, offset),
+                    lambda db: _fetch_questions(db, subject, limit, offset)
+                )
+        except HTTPException:
+            raise
+        except Exception as e:
+            import traceback
+            error_details = traceback.format_exc()
+            print(f"Error in get_questions: {str(e)}")
+            print(f"Error details: {error_details}")
+            raise HTTPException(status_code=500, detail=f"Failed to fetch questions: {str(e)}")
+
+    if question_ids is not None:
+        by_id = {question["id"]: question for question in questions}
+        questions = [by_id[question_id] for question_id in question_ids if question_id in by_id]
+    print(f"Returning {len(questions)} questions")
+    return _question_payload(questions, selected)
+
+QUESTION_QUERY = """
+    SELECT q.id, q.number, q.text, q.subject, q.exam_year, q.exam_name, 
+           q.chapter, q.question_type, q.answer_key, q.correct_answer, q.explanation,
+           o.label as option_label, o.text as option_text, o.is_correct as option_is_correct
+    FROM questions q
+    LEFT JOIN options o ON q.id = o.question_id
+"""
+
+def _fetch_questions_by_ids(db, question_ids: List[int]) -> List[dict]:
+    """Fetch a set of questions with one query; called through singleflight on a worker thread"""
+    placeholders = ",".join("?" * len(question_ids))
+    query = QUESTION_QUERY + f" WHERE q.id IN ({placeholders})"
+    print(f"Executing bulk query for {len(question_ids)} ids")
+    rows = db.execute(query, tuple(question_ids)).fetchall()
+    print(f"Query returned {len(rows)} rows")
+    return _questions_from_rows(rows)
+
+def _fetch_questions(db, subject: Optional[str], limit: int, offset: int) -> List[dict]:
+    """Run the questions-page query; called through singleflight on a worker thread"""
+    # Page over questions, not over question/option join rows, in id order like the
+    # catalog snapshot, so a page holds the same questions whichever path serves it
+    page_query = "SELECT id FROM questions"
+    params = []
     
-    try:
-        # Build the query based on whether subject filter is provided
-        query = """
-            SELECT q.id, q.number, q.text, q.subject, q.exam_year, q.exam_name, 
-                   q.chapter, q.question_type, q.answer_key, q.correct_answer, q.explanation,
-                   o.label as option_label, o.text as option_text, o.is_correct as option_is_correct
-            FROM questions q
-            LEFT JOIN options o ON q.id = o.question_id
-        """
-        params = []
+    if subject:
+        page_query += " WHERE subject = ?"
+        params.append(subject)
         
-        if subject:
-            query += " WHERE q.subject = ?"
-            params.append(subject)
-            
-        query += " LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        print(f"Executing query: {query}")
-        print(f"With params: {params}")
-        
-        # Execute query with cursor, converting params to tuple
-        cursor = db.execute(query, tuple(params))
-        rows = cursor.fetchall()
+    page_query += " ORDER BY id LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+    query = QUESTION_QUERY + f" WHERE q.id IN ({page_query}) ORDER BY q.id, o.label"
+    
+    print(f"Executing query: {query}")
+    print(f"With params: {params}")
+    
+    # Execute query with cursor, converting params to tuple
+    cursor = db.execute(query, tuple(params))
+    rows = cursor.fetchall()
+    
+    print(f"Query returned {len(rows)} rows")
+    return _questions_from_rows(rows)
+
+def _questions_from_rows(rows) -> List[dict]:
+    """Group question/option join rows into question dicts, in row order"""
+    # Process the results into a structured format
+    questions = {}
+    for row in rows:
+        q_id = row[0]  # id
+        if q_id not in questions:
+            questions[q_id] = {
+                'id': q_id,
+                'number': row[1],  # number
+                'text': row[2],    # text
+                'subject': row[3], # subject
+                'options': [],
+                'images': [],      # Keep empty images array for compatibility
+                'statements': []   # Keep empty statements array for compatibility
+            }
         
-        print(f"Query returned {len(rows)} rows")
+        option_label = row[11]  # option_label
+        option_text = row[12]   # option_text
+        option_is_correct = row[13]  # option_is_correct
         
-        # Process the results into a structured format
-        questions = {}
-        for row in rows:
-            q_id = row[0]  # id
-            if q_id not in questions:
-                questions[q_id] = {
-                    'id': q_id,
-                    'number': row[1],  # number
-                    'text': row[2],    # text
-                    'subject': row[3], # subject
-                    'options': [],
-                    'images': [],      # Keep empty images array for compatibility
-                    'statements': []   # Keep empty statements array for compatibility
-                }
+        if option_label is not None and option_text is not None:
+            # Check if this option already exists
+            option_exists = False
+            for opt in questions[q_id]['options']:
+                if opt['label'] == str(option_label):
+                    option_exists = True
+                    break
             
-            option_label = row[11]  # option_label
-            option_text = row[12]   # option_text
-            option_is_correct = row[13]  # option_is_correct
-            
-            if option_label is not None and option_text is not None:
-                # Check if this option already exists
-                option_exists = False
-                for opt in questions[q_id]['options']:
-                    if opt['label'] == str(option_label):
-                        option_exists = True
-                        break
-                
-                if not option_exists:
-                    questions[q_id]['options'].append({
-                        'label': str(option_label),
-                        'text': str(option_text),
-                        'is_correct': bool(option_is_correct) if option_is_correct is not None else False
-                    })
-        
-        # Ensure each question has at least an empty options array
-        for q_id in questions:
-            if not questions[q_id]['options']:
-                questions[q_id]['options'] = []
-        
-        result = list(questions.values())
-        print(f"Returning {len(result)} questions")
-        return result
-        
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Error in get_questions: {str(e)}")
-        print(f"Error details: {error_details}")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch questions: {str(e)}")
+            if not option_exists:
+                questions[q_id]['options'].append({
+                    'label': str(option_label),
+                    'text': str(option_text),
+                    'is_correct': bool(option_is_correct) if option_is_correct is not None else False
+                })
+    
+    # Ensure each question has at least an empty options array
+    for q_id in questions:
+        if not questions[q_id]['options']:
+            questions[q_id]['options'] = []
+    
+    return list(questions.values())
 
 @app.get("/api/questions/{question_id}", response_model=QuestionResponse)
 async def get_question(
     question_id: int,
-    current_user: str = Depends(get_current_user),
-    db = Depends(get_db)
+    current_user: str = Depends(limit_reads)
 ):
-    try:
-        query = """
-            SELECT q.id, q.number, q.text, q.subject, q.exam_year, q.exam_name, 
-                   q.chapter, q.question_type, q.answer_key, q.correct_answer, q.explanation,
-                   o.label as option_label, o.text as option_text, o.is_correct as option_is_correct
-            FROM questions q
-            LEFT JOIN options o ON q.id = o.question_id
-            WHERE q.id = ?
-        """
-        
-        print(f"Executing query for question_id: {question_id}")
-        
-        # Execute query with cursor, using a single-item tuple
-        cursor = db.execute(query, (question_id,))
-        rows = cursor.fetchall()
-        
-        if not rows:
+    with use_snapshot() as snapshot:
+        question = snapshot.get_question(question_id) if snapshot is not None else None
+    if snapshot is not None:
+        if question is None:
             raise HTTPException(status_code=404, detail="Question not found")
-            
-        print(f"Query returned {len(rows)} rows")
-            
-        # Process the results into a structured format
-        question = {
-            'id': rows[0][0],      # id
-            'number': rows[0][1],   # number
-            'text': rows[0][2],     # text
-            'subject': rows[0][3],  # subject
-            'options': [],
-            'images': [],          # Keep empty images array for compatibility
-            'statements': []       # Keep empty statements array for compatibility
-        }
-        
-        for row in rows:
-            option_label = row[11]  # option_label
-            option_text = row[12]   # option_text
-            option_is_correct = row[13]  # option_is_correct
-            
-            if option_label is not None and option_text is not None:
-                # Check if this option already exists
-                option_exists = False
-                for opt in question['options']:
-                    if opt['label'] == str(option_label):
-                        option_exists = True
-                        break
-                
-                if not option_exists:
-                    question['options'].append({
-                        'label': str(option_label),
-                        'text': str(option_text),
-                        'is_correct': bool(option_is_correct) if option_is_correct is not None else False
-                    })
-        
-        # Ensure question has at least an empty options array
-        if not question['options']:
-            question['options'] = []
-            
-        print(f"Returning question with ID: {question['id']}")
-        return question
-        
+        question["stats"] = question_stats.get(question_id)
+        return images.attach([question])[0]
+
+    try:
+        question = await singleflight.do("question", question_id, lambda db: _fetch_question(db, question_id))
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -185,16 +296,95 @@ async def get_question(
         print(f"Error details: {error_details}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch question: {str(e)}")
 
+    if question is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    print(f"Returning question with ID: {question['id']}")
+    # Shared between coalesced requests, so attach stats to a copy
+    return images.attach([{**question, "stats": question_stats.get(question_id)}])[0]
+
+def _fetch_question(db, question_id: int) -> Optional[dict]:
+    """Run the single-question query; called on a worker thread through singleflight or the practice route"""
+    query = """
+        SELECT q.id, q.number, q.text, q.subject, q.exam_year, q.exam_name, 
+               q.chapter, q.question_type, q.answer_key, q.correct_answer, q.explanation,
+               o.label as option_label, o.text as option_text, o.is_correct as option_is_correct
+        FROM questions q
+        LEFT JOIN options o ON q.id = o.question_id
+        WHERE q.id = ?
+    """
+    
+    print(f"Executing query for question_id: {question_id}")
+    
+    # Execute query with cursor, using a single-item tuple
+    cursor = db.execute(query, (question_id,))
+    rows = cursor.fetchall()
+    
+    if not rows:
+        return None
+        
+    print(f"Query returned {len(rows)} rows")
+        
+    # Process the results into a structured format
+    question = {
+        'id': rows[0][0],      # id
+        'number': rows[0][1],   # number
+        'text': rows[0][2],     # text
+        'subject': rows[0][3],  # subject
+        'options': [],
+        'images': [],          # Keep empty images array for compatibility
+        'statements': []       # Keep empty statements array for compatibility
+    }
+    
+    for row in rows:
+        option_label = row[11]  # option_label
+        option_text = row[12]   # option_text
+        option_is_correct = row[13]  # option_is_correct
+        
+        if option_label is not None and option_text is not None:
+            # Check if this option already exists
+            option_exists = False
+            for opt in question['options']:
+                if opt['label'] == str(option_label):
+                    option_exists = True
+                    break
+            
+            if not option_exists:
+                question['options'].append({
+                    'label': str(option_label),
+                    'text': str(option_text),
+                    'is_correct': bool(option_is_correct) if option_is_correct is not None else False
+                })
+    
+    # Ensure question has at least an empty options array
+    if not question['options']:
+        question['options'] = []
+        
+    return question
+
+
 @app.get("/api/questions/{question_id}/answer")
 async def get_question_answer(
     question_id: int,
-    current_user: str = Depends(get_current_user),
+    current_user: str = Depends(limit_reads),
     db = Depends(get_db)
 ):
     """
     Get the correct answer for a specific question.
     This endpoint should be called after the user has submitted their answer.
     """
+    with use_snapshot() as snapshot:
+        answer = snapshot.get_answer(question_id) if snapshot is not None else None
+    if snapshot is not None:
+        if answer is None:
+            raise HTTPException(status_code=404, detail="Question not found")
+        correct_answer, explanation = answer
+        if correct_answer is None:
+            raise HTTPException(status_code=404, detail="Correct answer not found for this question")
+        return {
+            "correct_answer": correct_answer,
+            "explanation": explanation or "No explanation available."
+        }
+
     try:
         # First, check if the question exists
         question_query = "SELECT id FROM questions WHERE id = ?"
@@ -240,67 +430,27 @@ async def get_question_answer(
 @app.post("/api/user-progress")
 async def track_user_progress(
     progress: UserProgress,
-    current_user: str = Depends(get_current_user),
+    current_user: str = Depends(limit_writes),
     db = Depends(get_db)
 ):
     """
     Track user progress for a specific question.
     This endpoint should be called after the user has submitted their answer.
+    The attempt is appended to the attempt log; user_progress, question stats and
+    leaderboards catch up at the next background compaction (every few seconds).
     """
     try:
-        # Check if there's an existing record for this user and question
-        check_query = """
-            SELECT id, attempt_count 
-            FROM user_progress 
-            WHERE user_id = ? AND question_id = ?
-        """
-        check_cursor = db.execute(check_query, (current_user, progress.question_id))
-        existing_record = check_cursor.fetchone()
-        
-        if existing_record:
-            # Update existing record
-            update_query = """
-                UPDATE user_progress
-                SET answer = ?, is_correct = ?, attempt_count = ?, time_spent = ?
-                WHERE id = ?
-            """
-            new_attempt_count = existing_record[1] + 1
-            db.execute(
-                update_query, 
-                (
-                    progress.answer, 
-                    progress.is_correct, 
-                    new_attempt_count,
-                    progress.time_spent,
-                    existing_record[0]
-                )
-            )
-            return {"message": "Progress updated", "attempt_count": new_attempt_count}
-        else:
-            # Insert new record
-            insert_query = """
-                INSERT INTO user_progress (user_id, question_id, answer, is_correct, attempt_count, time_spent)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """
-            db.execute(
-                insert_query, 
-                (
-                    current_user, 
-                    progress.question_id, 
-                    progress.answer, 
-                    progress.is_correct, 
-                    progress.attempt_count,
-                    progress.time_spent
-                )
-            )
-            return {"message": "Progress recorded", "attempt_count": progress.attempt_count}
-            
+        event_id = attempt_log.append(db, current_user, progress.question_id, progress.answer,
+                                      progress.is_correct, progress.time_spent)
+        practice.record_attempt(current_user, progress.question_id, progress.is_correct)
+        return {"message": "Progress recorded", "event_id": event_id}
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/user-progress/stats")
 async def get_user_progress_stats(
-    current_user: str = Depends(get_current_user),
+    current_user: str = Depends(limit_reads),
     db = Depends(get_db)
 ):
     """
@@ -356,4 +506,173 @@ async def get_user_progress_stats(
         }
             
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+@app.get("/api/user-progress/timeline")
+async def get_user_progress_timeline(
+    start: Optional[date] = Query(None, description="First day (YYYY-MM-DD, UTC); defaults to a year before end"),
+    end: Optional[date] = Query(None, description="Last day (YYYY-MM-DD, UTC); defaults to today"),
+    subject: Optional[str] = Query(None, description="Only this subject's chapters"),
+    current_user: str = Depends(limit_reads),
+    db = Depends(get_db)
+):
+    """
+    Questions per day, per-chapter weekly accuracy and streaks, read from the daily
+    rollup buckets (progress_daily) rather than raw progress rows. Buckets are
+    filled when the attempt log is compacted, so they lag writes by a few seconds.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=364)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= timeline.TIMELINE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {timeline.TIMELINE_MAX_DAYS} days per request")
+    try:
+        return timeline.query(db, current_user, start, end, subject)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/practice/next")
+async def get_next_practice_question(
+    subject: Optional[str] = Query(None, description="Only pick questions from this subject"),
+    current_user: str = Depends(limit_reads)
+):
+    """
+    Pick the user's next practice question: a missed question whose spaced-repetition
+    review is due, otherwise an unseen question from their weakest chapter.
+    """
+    # Held until the question is read, so a catalog swap cannot close it in between
+    with use_snapshot() as snapshot:
+        def pick_question(db):
+            pick = practice.next_question(db, current_user, subject)
+            if pick is None or snapshot is not None:
+                return pick, None
+            return pick, _fetch_question(db, pick["question_id"])
+
+        # One slot for both queries, run off the event loop
+        try:
+            async with db_slot():
+                pick, question = await asyncio.get_running_loop().run_in_executor(None, run_read, pick_question)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        if pick is None:
+            raise HTTPException(status_code=404, detail="No questions left to practice")
+
+        if snapshot is not None:
+            question = snapshot.get_question(pick["question_id"])
+    if question is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    question["stats"] = question_stats.get(pick["question_id"])
+    return {**pick, "question": images.attach([question])[0]}
+
+@app.get("/api/leaderboard")
+async def get_leaderboard(
+    metric: str = Query("correct", pattern="^(correct|accuracy)$", description="Rank by correct answers or accuracy"),
+    subject: Optional[str] = Query(None, description="Rank within one subject"),
+    window: str = Query("all", pattern="^(all|week)$", description="All time or the current ISO week"),
+    limit: int = Query(10, ge=1, le=100, description="Number of top entries"),
+    current_user: str = Depends(limit_reads)
+):
+    """
+    Top users and the caller's own rank, served from the in-memory leaderboards
+    without touching user_progress.
+    """
+    return leaderboard.query(current_user, metric, subject, window, limit)
+
+@app.get("/api/metrics/limits")
+async def get_limit_metrics(current_user: str = Depends(get_current_user)):
+    """
+    Requests rejected by the per-user rate limits and the database concurrency limit,
+    and read queries run versus coalesced onto an identical one already in flight
+    """
+    return {**rate_limit_counters, **db_counters, "coalescing": singleflight.counters}
+
+@app.get("/api/admin/export/progress")
+async def export_progress(
+    format: str = Query("csv", pattern="^(csv|parquet)$", description="csv, or parquet if pyarrow is installed"),
+    since: Optional[str] = Query(None, description="Only rows updated after this timestamp (X-Export-Watermark of the last export)"),
+    current_user: str = Depends(require_admin)
+):
+    """
+    Stream user_progress joined with questions in fixed-size chunks. Uses a
+    connection of its own and no request slot, since an export can run for minutes.
+    """
+    if format == "parquet" and export.pa is None:
+        raise HTTPException(status_code=501, detail="Parquet export needs pyarrow on the server")
+
+    db = open_connection()
+    # Taken before reading, so rows updated during the export are picked up again next time
+    watermark = export.watermark_now()
+
+    def stream():
+        try:
+            yield from export.iter_export(db, format, since)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/csv" if format == "csv" else "application/vnd.apache.parquet",
+        headers={
+            "Content-Disposition": f'attachment; filename="user_progress.{format}"',
+            "X-Export-Watermark": watermark,
+        },
+    )
+
+@app.get("/api/images/{image_hash}")
+async def get_image(
+    image_hash: str,
+    request: Request,
+    size: str = Query("full", pattern="^(full|thumb)$", description="Full image or its thumbnail")
+):
+    """
+    Serve a stored image by content hash. The bytes behind a hash never change, so
+    responses are cacheable forever (by browsers and the edge) and need no auth.
+    Supports If-None-Match and single byte ranges. An image without a thumbnail
+    redirects to the full image, cached briefly so a later thumbnail is picked up.
+    """
+    if not images.is_image_hash(image_hash):
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = images.find_image(image_hash, size)
+    if path is None and size == "thumb" and images.find_image(image_hash, "full") is not None:
+        return RedirectResponse(
+            request.url.path,
+            status_code=307,
+            headers={"Cache-Control": f"public, max-age={images.IMAGE_FALLBACK_MAX_AGE}"},
+        )
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    etag = f'"{image_hash}-{size}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if request.headers.get("if-none-match") in (etag, "*"):
+        return Response(status_code=304, headers=headers)
+
+    file_size = os.path.getsize(path)
+    range_header = request.headers.get("range")
+    # A stale If-Range validator means the client must fetch the whole image again
+    if range_header and request.headers.get("if-range", etag) == etag:
+        byte_range = images.parse_range(range_header, file_size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{file_size}"})
+        start, end = byte_range
+        return StreamingResponse(
+            images.iter_file(path, start, end),
+            status_code=206,
+            media_type=images.media_type(path),
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{file_size}",
+                     "Content-Length": str(end - start + 1)},
+        )
+
+    return StreamingResponse(
+        images.iter_file(path, 0, file_size - 1),
+        media_type=images.media_type(path),
+        headers={**headers, "Content-Length": str(file_size)},
+    )
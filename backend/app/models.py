@@ -6,6 +6,14 @@ class Option(BaseModel):
     text: str
     is_correct: Optional[bool] = False
 
+class QuestionStats(BaseModel):
+    attempts: int
+    users: int
+    correct_percentage: Optional[int]
+    median_time_spent: Optional[int]  # in seconds
+    p90_time_spent: Optional[int]
+    average_time_spent: Optional[int]
+
 class QuestionBase(BaseModel):
     number: int
     text: str
@@ -15,6 +23,7 @@ class QuestionBase(BaseModel):
 
 class Question(QuestionBase):
     id: int
+    stats: Optional[QuestionStats] = None
 
 class QuestionResponse(Question):
     pass
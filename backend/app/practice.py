@@ -0,0 +1,309 @@
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from .catalog import get_snapshot, use_snapshot
+
+# Load environment variables
+load_dotenv()
+
+# Spaced-repetition schedule (seconds) for missed questions: a miss puts the
+# question back in box 0, each later correct answer moves it up one box, and
+# answering it correctly from the last box retires it from review
+REVIEW_INTERVALS = [10 * 60, 24 * 3600, 3 * 24 * 3600, 7 * 24 * 3600, 21 * 24 * 3600]
+
+# Queues are per process. Each is rebuilt from user_progress and practice_reviews
+# after this many seconds so writes handled by other workers are eventually picked up.
+PRACTICE_QUEUE_TTL = float(os.getenv("PRACTICE_QUEUE_TTL", "300"))
+
+# Most users whose queues are kept in memory; the least recently used are dropped first
+PRACTICE_MAX_QUEUES = int(os.getenv("PRACTICE_MAX_QUEUES", "10000"))
+
+# How often (seconds) the question catalog is reloaded when no snapshot is configured
+PRACTICE_CATALOG_TTL = float(os.getenv("PRACTICE_CATALOG_TTL", "600"))
+
+# Chapters are keyed on (subject, chapter) since chapter names repeat across subjects
+Chapter = Tuple[str, str]
+
+class PracticeCatalog:
+    """Question ids grouped by chapter in id order, and each question's chapter"""
+
+    def __init__(self, rows: List[Tuple[int, Optional[str], Optional[str]]], version: str):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.questions: Dict[int, Chapter] = {}
+        self.chapters: Dict[Chapter, List[int]] = {}
+        for question_id, subject, chapter in sorted(rows):
+            key = (subject or "", chapter or "")
+            self.questions[question_id] = key
+            self.chapters.setdefault(key, []).append(question_id)
+
+def _load_catalog(db) -> PracticeCatalog:
+    query = "SELECT id, subject, chapter FROM questions"
+    with use_snapshot() as snapshot:
+        if snapshot is not None:
+            return PracticeCatalog(snapshot.conn.execute(query).fetchall(), snapshot.version)
+    return PracticeCatalog(db.execute(query).fetchall(), f"db:{time.time()}")
+
+def next_box(box: Optional[int], is_correct: bool) -> Optional[int]:
+    """Review box after an answer, given the current one (None when not in review)"""
+    if not is_correct:
+        return 0
+    if box is None or box + 1 >= len(REVIEW_INTERVALS):
+        return None
+    return box + 1
+
+def create_tables(db) -> None:
+    # Spaced-repetition state per missed question, so it survives queue rebuilds and restarts
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS practice_reviews (
+            user_id TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            box INTEGER NOT NULL,
+            due_at REAL NOT NULL,
+            PRIMARY KEY (user_id, question_id)
+        ) WITHOUT ROWID
+    """)
+
+def backfill(db) -> None:
+    """Put questions whose latest answer is wrong into box 0 when practice_reviews is empty"""
+    create_tables(db)
+    if db.execute("SELECT 1 FROM practice_reviews LIMIT 1").fetchone():
+        return
+    db.execute(
+        """
+        INSERT INTO practice_reviews (user_id, question_id, box, due_at)
+        SELECT user_id, question_id, 0,
+               CAST(strftime('%s', COALESCE(updated_at, created_at)) AS REAL) + ?
+        FROM user_progress
+        WHERE is_correct = 0
+        """,
+        (REVIEW_INTERVALS[0],)
+    )
+    db.commit()
+    print("Backfilled practice reviews from user_progress")
+
+def record_events(db, events: List[tuple]) -> None:
+    """
+    Move (user_id, question_id, is_correct, answered_at) events through their review
+    boxes, in order. Runs inside the attempt log's compaction transaction; the caller commits.
+    """
+    boxes: Dict[Tuple[str, int], Optional[int]] = {}
+    due: Dict[Tuple[str, int], float] = {}
+    for user_id, question_id, is_correct, answered_at in events:
+        key = (user_id, question_id)
+        if key not in boxes:
+            row = db.execute(
+                "SELECT box FROM practice_reviews WHERE user_id = ? AND question_id = ?",
+                key
+            ).fetchone()
+            boxes[key] = row[0] if row else None
+        box = next_box(boxes[key], bool(is_correct))
+        boxes[key] = box
+        if box is not None:
+            due[key] = answered_at + REVIEW_INTERVALS[box]
+    for (user_id, question_id), box in boxes.items():
+        if box is None:
+            db.execute(
+                "DELETE FROM practice_reviews WHERE user_id = ? AND question_id = ?",
+                (user_id, question_id)
+            )
+            continue
+        db.execute(
+            """
+            INSERT INTO practice_reviews (user_id, question_id, box, due_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id, question_id) DO UPDATE SET box = excluded.box, due_at = excluded.due_at
+            """,
+            (user_id, question_id, box, due[(user_id, question_id)])
+        )
+
+class PracticeQueue:
+    """
+    Next-question priority queues for one user, optionally limited to one subject.
+
+    Two heaps drive the choice:
+      * review: missed questions keyed on their spaced-repetition due time
+      * chapters: chapters keyed on smoothed accuracy, weakest first, among
+        chapters that still have unseen questions
+    Both use lazy deletion (stale entries are skipped when they surface), so
+    next() and record() are O(log n) and never rescan user_progress.
+    """
+
+    def __init__(self, catalog: PracticeCatalog, subject: Optional[str]):
+        self.catalog = catalog
+        self.subject = subject
+        self.built_at = time.monotonic()
+        # question -> whether its latest answer was correct
+        self.answers: Dict[int, bool] = {}
+        # chapter -> [attempted, correct by latest answer]
+        self.chapter_stats: Dict[Chapter, List[int]] = {}
+        # chapter -> index of the next candidate in catalog.chapters[chapter]
+        self.chapter_cursor: Dict[Chapter, int] = {}
+        # question -> (box, due time) for questions in review
+        self.reviews: Dict[int, Tuple[int, float]] = {}
+        self.review_heap: List[Tuple[float, int]] = []
+        self.chapter_heap: List[Tuple[float, int, Chapter]] = []
+        # chapter -> generation of its newest heap entry, older entries are stale
+        self.chapter_generation: Dict[Chapter, int] = {}
+
+    def in_scope(self, question_id: int) -> bool:
+        entry = self.catalog.questions.get(question_id)
+        return entry is not None and (self.subject is None or entry[0] == self.subject)
+
+    def _accuracy(self, chapter: Chapter) -> float:
+        attempted, correct = self.chapter_stats.get(chapter, (0, 0))
+        # Laplace smoothing: an untouched chapter scores 0.5, between weak and strong
+        return (correct + 1) / (attempted + 2)
+
+    def _push_chapter(self, chapter: Chapter) -> None:
+        generation = self.chapter_generation.get(chapter, 0) + 1
+        self.chapter_generation[chapter] = generation
+        heapq.heappush(self.chapter_heap, (self._accuracy(chapter), generation, chapter))
+
+    def build(self, rows: List[Tuple[int, Optional[int], Optional[int], Optional[float]]]) -> None:
+        """Seed the queues from (question_id, is_correct, box, due_at) rows of user_progress and practice_reviews"""
+        for question_id, is_correct, box, due in rows:
+            if not self.in_scope(question_id):
+                continue
+            self._answer(question_id, bool(is_correct))
+            if box is not None:
+                self.reviews[question_id] = (box, due)
+                heapq.heappush(self.review_heap, (due, question_id))
+        for chapter in self.catalog.chapters:
+            if self.subject is None or chapter[0] == self.subject:
+                self._push_chapter(chapter)
+
+    def _answer(self, question_id: int, is_correct: bool) -> None:
+        stats = self.chapter_stats.setdefault(self.catalog.questions[question_id], [0, 0])
+        previous = self.answers.get(question_id)
+        if previous is None:
+            stats[0] += 1
+        # Chapter accuracy follows each question's latest answer
+        stats[1] += int(is_correct) - int(bool(previous))
+        self.answers[question_id] = is_correct
+
+    def _apply(self, question_id: int, is_correct: bool, now: float) -> None:
+        self._answer(question_id, is_correct)
+        current = self.reviews.get(question_id)
+        box = next_box(current[0] if current else None, is_correct)
+        if box is None:
+            self.reviews.pop(question_id, None)
+            return
+        due = now + REVIEW_INTERVALS[box]
+        self.reviews[question_id] = (box, due)
+        heapq.heappush(self.review_heap, (due, question_id))
+
+    def record(self, question_id: int, is_correct: bool, now: float) -> None:
+        if not self.in_scope(question_id):
+            return
+        self._apply(question_id, is_correct, now)
+        self._push_chapter(self.catalog.questions[question_id])
+
+    def _next_review(self) -> Optional[Tuple[float, int]]:
+        while self.review_heap:
+            due, question_id = self.review_heap[0]
+            entry = self.reviews.get(question_id)
+            if entry is not None and entry[1] == due:
+                return due, question_id
+            heapq.heappop(self.review_heap)
+        return None
+
+    def _next_unseen(self, chapter: Chapter) -> Optional[int]:
+        question_ids = self.catalog.chapters[chapter]
+        cursor = self.chapter_cursor.get(chapter, 0)
+        while cursor < len(question_ids) and question_ids[cursor] in self.answers:
+            cursor += 1
+        self.chapter_cursor[chapter] = cursor
+        return question_ids[cursor] if cursor < len(question_ids) else None
+
+    def next(self, now: float) -> Optional[Dict]:
+        """Pick the next question: a due review first, else an unseen question from the weakest chapter"""
+        review = self._next_review()
+        if review is not None and review[0] <= now:
+            return self._pick(review[1], "review", review[0])
+
+        while self.chapter_heap:
+            _, generation, chapter = self.chapter_heap[0]
+            if generation != self.chapter_generation[chapter]:
+                heapq.heappop(self.chapter_heap)
+                continue
+            question_id = self._next_unseen(chapter)
+            if question_id is None:
+                # Chapter exhausted; it returns only if a write pushes it again
+                heapq.heappop(self.chapter_heap)
+                continue
+            return self._pick(question_id, "weak_chapter", None)
+
+        # Everything attempted: bring the next review forward rather than return nothing
+        if review is not None:
+            return self._pick(review[1], "review", review[0])
+        return None
+
+    def _pick(self, question_id: int, reason: str, due: Optional[float]) -> Dict:
+        chapter = self.catalog.questions[question_id]
+        return {
+            "question_id": question_id,
+            "reason": reason,
+            "subject": chapter[0],
+            "chapter": chapter[1],
+            "chapter_accuracy": round(self._accuracy(chapter), 3),
+            "due_at": due,
+        }
+
+_catalog: Optional[PracticeCatalog] = None
+# user_id -> {subject filter: queue}, users in least-recently-used order
+_queues: "OrderedDict[str, Dict[Optional[str], PracticeQueue]]" = OrderedDict()
+_lock = threading.Lock()
+
+def _current_catalog(db) -> PracticeCatalog:
+    global _catalog
+    snapshot = get_snapshot()
+    stale = (
+        _catalog is None
+        or (snapshot is not None and snapshot.version != _catalog.version)
+        or (snapshot is None and time.monotonic() - _catalog.loaded_at > PRACTICE_CATALOG_TTL)
+    )
+    if stale:
+        _catalog = _load_catalog(db)
+        # Queues hold cursors into the old catalog's chapter lists
+        _queues.clear()
+    return _catalog
+
+def _build_queue(db, catalog: PracticeCatalog, user_id: str, subject: Optional[str]) -> PracticeQueue:
+    rows = db.execute(
+        """
+        SELECT up.question_id, up.is_correct, pr.box, pr.due_at
+        FROM user_progress up
+        LEFT JOIN practice_reviews pr ON pr.user_id = up.user_id AND pr.question_id = up.question_id
+        WHERE up.user_id = ?
+        """,
+        (user_id,)
+    ).fetchall()
+    queue = PracticeQueue(catalog, subject)
+    queue.build(rows)
+    return queue
+
+def next_question(db, user_id: str, subject: Optional[str] = None) -> Optional[Dict]:
+    """Return the user's next practice pick, building their queue on first use"""
+    with _lock:
+        catalog = _current_catalog(db)
+        user_queues = _queues.setdefault(user_id, {})
+        _queues.move_to_end(user_id)
+        queue = user_queues.get(subject)
+        if queue is None or time.monotonic() - queue.built_at > PRACTICE_QUEUE_TTL:
+            queue = _build_queue(db, catalog, user_id, subject)
+            user_queues[subject] = queue
+            while len(_queues) > PRACTICE_MAX_QUEUES:
+                _queues.popitem(last=False)
+        return queue.next(time.time())
+
+def record_attempt(user_id: str, question_id: int, is_correct: bool) -> None:
+    """Apply a progress write to every in-memory queue of the user"""
+    now = time.time()
+    with _lock:
+        for queue in _queues.get(user_id, {}).values():
+            queue.record(question_id, is_correct, now)
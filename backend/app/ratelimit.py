@@ -0,0 +1,77 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+from fastapi import Depends, HTTPException, status
+from dotenv import load_dotenv
+from .auth import get_current_user
+
+# Load environment variables
+load_dotenv()
+
+# Sustained requests per second and burst size allowed per user, for read and write routes
+RATE_LIMIT_READ_RATE = float(os.getenv("RATE_LIMIT_READ_RATE", "10"))
+RATE_LIMIT_READ_BURST = float(os.getenv("RATE_LIMIT_READ_BURST", "30"))
+RATE_LIMIT_WRITE_RATE = float(os.getenv("RATE_LIMIT_WRITE_RATE", "2"))
+RATE_LIMIT_WRITE_BURST = float(os.getenv("RATE_LIMIT_WRITE_BURST", "10"))
+
+# Most per-user buckets kept; idle users are evicted first (an evicted user starts with a full bucket)
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "100000"))
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, rate: float, burst: float, now: float) -> float:
+        """Take one token; returns 0 on success, else the seconds until one is available"""
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+# Rejections since startup, exposed on /api/metrics/limits
+counters: Dict[str, int] = {
+    "read_rate_limited": 0,
+    "write_rate_limited": 0,
+}
+
+_buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+_lock = threading.Lock()
+
+def _check(user_id: str, kind: str, rate: float, burst: float) -> None:
+    now = time.monotonic()
+    with _lock:
+        key = (user_id, kind)
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = _buckets[key] = TokenBucket(burst, now)
+            while len(_buckets) > RATE_LIMIT_MAX_BUCKETS:
+                _buckets.popitem(last=False)
+        else:
+            _buckets.move_to_end(key)
+        wait = bucket.take(rate, burst, now)
+        if wait:
+            counters[f"{kind}_rate_limited"] += 1
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, slow down",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+async def limit_reads(current_user: str = Depends(get_current_user)) -> str:
+    """Dependency for read routes: the authenticated uid, if within its read budget"""
+    _check(current_user, "read", RATE_LIMIT_READ_RATE, RATE_LIMIT_READ_BURST)
+    return current_user
+
+async def limit_writes(current_user: str = Depends(get_current_user)) -> str:
+    """Dependency for write routes: the authenticated uid, if within its write budget"""
+    _check(current_user, "write", RATE_LIMIT_WRITE_RATE, RATE_LIMIT_WRITE_BURST)
+    return current_user
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable
+
+from .database import db_slot, run_read
+
+# Per-query-kind counts since startup, exposed on /api/metrics/limits:
+# "queries" actually ran, "coalesced" waited on an identical query already in flight
+counters: Dict[str, Dict[str, int]] = {}
+
+_in_flight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+def _counter(kind: str) -> Dict[str, int]:
+    return counters.setdefault(kind, {"queries": 0, "coalesced": 0, "errors": 0})
+
+async def _lead(fn: Callable[[Any], Any]) -> Any:
+    # Only the query that actually runs takes a database slot; waiters hold none.
+    # It runs on a worker thread so the event loop keeps accepting (and coalescing) requests.
+    async with db_slot():
+        return await asyncio.get_running_loop().run_in_executor(None, run_read, fn)
+
+async def do(kind: str, key: Hashable, fn: Callable[[Any], Any]) -> Any:
+    """
+    Run fn(conn) once for concurrent callers with the same (kind, key) and hand each
+    of them its result or exception. Nothing is cached: a call made after the query
+    finished runs it again. The result is shared, so callers must not mutate it.
+    """
+    flight_key = (kind, key)
+    future = _in_flight.get(flight_key)
+    if future is not None:
+        _counter(kind)["coalesced"] += 1
+    else:
+        _counter(kind)["queries"] += 1
+        future = asyncio.ensure_future(_lead(fn))
+        _in_flight[flight_key] = future
+
+        def finished(done: "asyncio.Future[Any]") -> None:
+            del _in_flight[flight_key]
+            # Also marks the exception retrieved when every caller has gone away
+            if not done.cancelled() and done.exception() is not None:
+                _counter(kind)["errors"] += 1
+
+        future.add_done_callback(finished)
+    # A caller that disconnects must not cancel the query the others are waiting on
+    return await asyncio.shield(future)
@@ -0,0 +1,158 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Longest range one timeline request may cover
+TIMELINE_MAX_DAYS = 3 * 366
+
+# (subject, chapter) of questions seen by compaction; a question's chapter does not change
+_chapters: Dict[int, Tuple[str, str]] = {}
+
+def create_tables(db) -> None:
+    # Clustered on (user_id, day), so a user's date range is one index seek
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS progress_daily (
+            user_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            chapter TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            time_spent INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, subject, chapter)
+        ) WITHOUT ROWID
+    """)
+
+def backfill(db) -> None:
+    """
+    Seed the buckets from user_progress when they are empty. Only each question's
+    latest answer is stored there, so all its attempts land on its last update day.
+    """
+    create_tables(db)
+    if db.execute("SELECT 1 FROM progress_daily LIMIT 1").fetchone():
+        return
+    db.execute("""
+        INSERT INTO progress_daily (user_id, day, subject, chapter, attempts, correct, time_spent)
+        SELECT up.user_id, date(COALESCE(up.updated_at, up.created_at)),
+               COALESCE(q.subject, ''), COALESCE(q.chapter, ''),
+               SUM(COALESCE(up.attempt_count, 1)),
+               SUM(CASE WHEN up.is_correct = 1 THEN 1 ELSE 0 END),
+               SUM(COALESCE(up.time_spent, 0))
+        FROM user_progress up
+        JOIN questions q ON up.question_id = q.id
+        GROUP BY 1, 2, 3, 4
+    """)
+    db.commit()
+    print("Backfilled daily progress buckets from user_progress")
+
+def _question_chapters(db, question_ids: Iterable[int]) -> None:
+    missing = [question_id for question_id in set(question_ids) if question_id not in _chapters]
+    if not missing:
+        return
+    placeholders = ",".join("?" * len(missing))
+    for question_id, subject, chapter in db.execute(
+        f"SELECT id, subject, chapter FROM questions WHERE id IN ({placeholders})", missing
+    ).fetchall():
+        _chapters[question_id] = (subject or "", chapter or "")
+
+def record_events(db, events: List[tuple]) -> None:
+    """
+    Add (user_id, question_id, is_correct, time_spent, day) events to their buckets.
+    Runs inside the attempt log's compaction transaction; the caller commits.
+    """
+    _question_chapters(db, (event[1] for event in events))
+    buckets: Dict[Tuple[str, str, str, str], List[int]] = {}
+    for user_id, question_id, is_correct, time_spent, day in events:
+        subject, chapter = _chapters.get(question_id, ("", ""))
+        bucket = buckets.setdefault((user_id, day, subject, chapter), [0, 0, 0])
+        bucket[0] += 1
+        bucket[1] += int(bool(is_correct))
+        bucket[2] += time_spent or 0
+    for (user_id, day, subject, chapter), (attempts, correct, time_spent) in buckets.items():
+        db.execute(
+            """
+            INSERT INTO progress_daily (user_id, day, subject, chapter, attempts, correct, time_spent)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, day, subject, chapter) DO UPDATE SET
+                attempts = attempts + excluded.attempts,
+                correct = correct + excluded.correct,
+                time_spent = time_spent + excluded.time_spent
+            """,
+            (user_id, day, subject, chapter, attempts, correct, time_spent)
+        )
+
+def _streaks(days: List[str], end: date) -> Dict[str, int]:
+    """Longest run of consecutive active days, and the run ending on `end` (or the day before)"""
+    longest = current = 0
+    run = 0
+    previous: Optional[date] = None
+    for value in days:
+        day = date.fromisoformat(value)
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    if previous is not None and end - previous <= timedelta(days=1):
+        current = run
+    return {"current": current, "longest": longest}
+
+def query(db, user_id: str, start: date, end: date, subject: Optional[str] = None) -> dict:
+    """Daily totals, per-chapter weekly accuracy trends and streaks for start..end (inclusive)"""
+    sql = """
+        SELECT day, subject, chapter, attempts, correct, time_spent
+        FROM progress_daily
+        WHERE user_id = ? AND day BETWEEN ? AND ?
+    """
+    params: list = [user_id, start.isoformat(), end.isoformat()]
+    if subject:
+        sql += " AND subject = ?"
+        params.append(subject)
+    sql += " ORDER BY day"
+
+    days: Dict[str, List[int]] = {}
+    chapters: Dict[Tuple[str, str], Dict] = {}
+    week = ""
+    for day, row_subject, chapter, attempts, correct, time_spent in db.execute(sql, params).fetchall():
+        totals = days.get(day)
+        if totals is None:
+            # Rows come in day order, so the ISO week is worked out once per day
+            totals = days[day] = [0, 0, 0]
+            year, week_number, _ = date.fromisoformat(day).isocalendar()
+            week = f"{year}-W{week_number:02d}"
+        totals[0] += attempts
+        totals[1] += correct
+        totals[2] += time_spent
+
+        entry = chapters.get((row_subject, chapter))
+        if entry is None:
+            entry = chapters[(row_subject, chapter)] = {"attempts": 0, "correct": 0, "weeks": {}}
+        entry["attempts"] += attempts
+        entry["correct"] += correct
+        week_totals = entry["weeks"].get(week)
+        if week_totals is None:
+            week_totals = entry["weeks"][week] = [0, 0]
+        week_totals[0] += attempts
+        week_totals[1] += correct
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": [
+            {"day": day, "attempts": attempts, "correct": correct, "time_spent": time_spent}
+            for day, (attempts, correct, time_spent) in days.items()
+        ],
+        "chapters": [
+            {
+                "subject": row_subject,
+                "chapter": chapter,
+                "attempts": entry["attempts"],
+                "correct": entry["correct"],
+                "percentage": round(entry["correct"] / entry["attempts"] * 100) if entry["attempts"] else 0,
+                "weeks": [
+                    {"week": week, "attempts": attempts, "correct": correct,
+                     "percentage": round(correct / attempts * 100) if attempts else 0}
+                    for week, (attempts, correct) in entry["weeks"].items()
+                ],
+            }
+            for (row_subject, chapter), entry in sorted(chapters.items())
+        ],
+        "streak": _streaks(list(days), end),
+    }
@@ -0,0 +1,115 @@
+import argparse
+import gc
+import random
+import sqlite3
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.question_store import QuestionStore
+
+# Synthetic bank shaped like the real one: a few subjects, ~30 chapters each, 4 options per question
+SUBJECTS = ["physics", "chemistry", "mathematics"]
+EXAMS = ["JEE Main", "JEE Advanced"]
+YEARS = list(range(2005, 2025))
+CHAPTERS = {subject: [f"{subject} chapter {i}" for i in range(30)] for subject in SUBJECTS}
+WORDS = ("the velocity of a body mass moving under force find value of integral matrix "
+         "compound reaction equilibrium constant √ π θ energy").split()
+
+def synthetic_rows(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for question_id in range(1, count + 1):
+        subject = rng.choice(SUBJECTS)
+        text = " ".join(rng.choice(WORDS) for _ in range(20))
+        row = (question_id, question_id % 90 + 1, text, subject, rng.choice(YEARS), rng.choice(EXAMS),
+               rng.choice(CHAPTERS[subject]), "mcq", None)
+        correct = rng.randrange(4)
+        options = [(label, f"{rng.randint(1, 500)}/{rng.randint(2, 9)}", i == correct)
+                   for i, label in enumerate("ABCD")]
+        yield row, options
+
+def build_dicts(count: int) -> Dict[int, dict]:
+    """The representation the store replaces: a dict per question with a list of option dicts"""
+    questions = {}
+    for row, options in synthetic_rows(count):
+        questions[row[0]] = {
+            'id': row[0], 'number': row[1], 'text': row[2], 'subject': row[3],
+            'exam_year': row[4], 'exam_name': row[5], 'chapter': row[6],
+            'question_type': row[7], 'explanation': row[8],
+            'options': [{'label': label, 'text': text, 'is_correct': is_correct}
+                        for label, text, is_correct in options],
+            'images': [], 'statements': [],
+        }
+    return questions
+
+def build_store(count: int) -> QuestionStore:
+    store = QuestionStore()
+    for row, options in synthetic_rows(count):
+        store.append(row, options)
+    return store
+
+def measure(build, count: int):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build(count)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, elapsed
+
+def time_lookups(get, ids: List[int]) -> float:
+    start = time.perf_counter()
+    for question_id in ids:
+        get(question_id)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and lookup speed of QuestionStore against per-question dicts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--check-load", action="store_true",
+                        help="Also round-trip the smallest size through QuestionStore.load from SQLite")
+    args = parser.parse_args()
+
+    print(f"{'questions':>10} {'dicts MB':>9} {'store MB':>9} {'saved B/q':>10} "
+          f"{'dict get µs':>12} {'store get µs':>13} {'store dict µs':>14} {'page µs':>8}")
+    for count in args.sizes:
+        dicts, dict_size, _ = measure(build_dicts, count)
+        store, store_size, build_time = measure(build_store, count)
+
+        rng = random.Random(1)
+        ids = [rng.randint(1, count) for _ in range(args.lookups)]
+        dict_get = time_lookups(dicts.get, ids)
+        store_get = time_lookups(store.view, ids)
+        store_dict = time_lookups(store.get_question, ids)
+        offsets = [rng.randrange(0, count // 3 - 10) for _ in range(1000)]
+        start = time.perf_counter()
+        for offset in offsets:
+            store.get_questions("physics", 10, offset)
+        page = (time.perf_counter() - start) / len(offsets) * 1e6
+
+        assert store.get_question(ids[0])["text"] == dicts[ids[0]]["text"]
+        print(f"{count:>10} {dict_size / 1e6:>9.0f} {store_size / 1e6:>9.0f} "
+              f"{(dict_size - store_size) / count:>10.0f} {dict_get:>12.2f} {store_get:>13.2f} "
+              f"{store_dict:>14.2f} {page:>8.1f}   (store built in {build_time:.1f}s)")
+        del dicts, store
+
+    if args.check_load:
+        count = min(args.sizes)
+        conn = sqlite3.connect(":memory:")
+        conn.execute("""CREATE TABLE questions (id INTEGER PRIMARY KEY, number INTEGER, text TEXT, subject TEXT,
+                        exam_year INTEGER, exam_name TEXT, chapter TEXT, question_type TEXT, explanation TEXT)""")
+        conn.execute("CREATE TABLE options (question_id INTEGER, label TEXT, text TEXT, is_correct INTEGER)")
+        for row, options in synthetic_rows(count):
+            conn.execute("INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            conn.executemany("INSERT INTO options VALUES (?, ?, ?, ?)", [(row[0], *option) for option in options])
+        loaded = QuestionStore.load(conn)
+        built = build_store(count)
+        assert len(loaded) == len(built)
+        for question_id in (1, count // 2, count):
+            assert loaded.get_question(question_id) == built.get_question(question_id)
+        print(f"QuestionStore.load matches the built store for {count} questions")
+
+if __name__ == "__main__":
+    main()
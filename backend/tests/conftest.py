@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# Import the backend as the "app" package, the way run.py serves it
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# app.database refuses to import without these; tests hand modules their own sqlite connections
+os.environ.setdefault("TURSO_DATABASE_URL", "file::memory:")
+os.environ.setdefault("TURSO_AUTH_TOKEN", "test")
@@ -0,0 +1,114 @@
+import sqlite3
+
+import pytest
+
+from app import attempt_log, leaderboard, question_stats
+
+@pytest.fixture
+def connect(tmp_path, monkeypatch):
+    """Connections to one database file, one per simulated worker"""
+    # Per-process caches, so each test starts cold
+    monkeypatch.setattr(attempt_log, "_partitions", set())
+    monkeypatch.setattr(question_stats, "_stats", {})
+    monkeypatch.setattr(leaderboard, "_boards", {})
+    path = str(tmp_path / "pyq.db")
+    db = sqlite3.connect(path)
+    # The columns compaction writes; the full schema lives in src/lib/db/schema.sql
+    db.executescript("""
+        CREATE TABLE questions (id INTEGER PRIMARY KEY, subject TEXT, chapter TEXT);
+        CREATE TABLE user_progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            answer TEXT,
+            is_correct BOOLEAN,
+            attempt_count INTEGER DEFAULT 1,
+            time_spent INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(user_id, question_id)
+        );
+        INSERT INTO questions VALUES (1, 'Physics', 'Optics'), (2, 'Chemistry', 'Moles');
+    """)
+    db.close()
+    connections = []
+
+    def _connect():
+        connection = sqlite3.connect(path, timeout=5)
+        connections.append(connection)
+        return connection
+
+    yield _connect
+    for connection in connections:
+        connection.close()
+
+def _append_events(db):
+    attempt_log.append(db, "u1", 1, "A", False, 40)
+    attempt_log.append(db, "u1", 1, "B", True, 30)
+    attempt_log.append(db, "u2", 1, "B", True, 50)
+    attempt_log.append(db, "u2", 2, "C", False, 20)
+
+def _snapshot(db):
+    return {
+        table: db.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+        for table in ("question_stats", "question_stats_sketch", "leaderboard_entries", "practice_reviews")
+    } | {
+        "user_progress": db.execute(
+            "SELECT user_id, question_id, answer, is_correct, attempt_count FROM user_progress ORDER BY 1, 2"
+        ).fetchall(),
+    }
+
+def _prepare(db):
+    attempt_log.create_tables(db)
+    # What compact() creates before claiming batches
+    for module in (attempt_log.timeline, attempt_log.practice, question_stats, leaderboard):
+        module.create_tables(db)
+    db.commit()
+
+def test_racing_workers_fold_each_batch_once(connect):
+    worker, other_worker = connect(), connect()
+    _append_events(worker)
+    _prepare(worker)
+    partition = attempt_log.partition_for()
+
+    # Both workers read the same watermark before either claims the batch
+    assert attempt_log._compact_batch(worker, partition, 0)[0] == 4
+    assert attempt_log._compact_batch(other_worker, partition, 0) == (None, [], [])
+
+    stats = question_stats._read(other_worker)
+    assert (stats[1].users, stats[1].correct_users, stats[1].attempts) == (2, 2, 3)
+    assert (stats[2].users, stats[2].correct_users, stats[2].attempts) == (1, 0, 1)
+    assert other_worker.execute(
+        "SELECT user_id, attempt_count FROM user_progress WHERE question_id = 1 ORDER BY user_id"
+    ).fetchall() == [("u1", 2), ("u2", 1)]
+    assert other_worker.execute(
+        "SELECT correct, attempted FROM leaderboard_entries WHERE board = 'all:all' AND user_id = 'u1'"
+    ).fetchone() == (1, 1)
+
+def test_compacting_again_changes_nothing(connect):
+    worker, other_worker = connect(), connect()
+    _append_events(worker)
+    assert attempt_log.compact(worker) == 4
+    folded = _snapshot(worker)
+
+    assert attempt_log.compact(other_worker) == 0
+    assert attempt_log.compact(worker) == 0
+    assert _snapshot(worker) == folded
+    assert question_stats.get(1)["attempts"] == 3
+
+def test_failed_batch_leaves_nothing_behind(connect, monkeypatch):
+    worker = connect()
+    _append_events(worker)
+
+    def fail(db, events):
+        raise RuntimeError("rollup failed")
+
+    record_events = leaderboard.record_events
+    monkeypatch.setattr(leaderboard, "record_events", fail)
+    assert attempt_log.compact(worker) == 0
+    assert worker.execute("SELECT last_event_id FROM attempt_log_watermarks").fetchall() == [(0,)]
+    assert worker.execute("SELECT COUNT(*) FROM question_stats").fetchone() == (0,)
+
+    monkeypatch.setattr(leaderboard, "record_events", record_events)
+    assert attempt_log.compact(worker) == 4
+    assert question_stats._read(worker)[1].attempts == 3
@@ -0,0 +1,60 @@
+import random
+
+from app.leaderboard import Leaderboard, OrderStatisticTree, LEADERBOARD_MIN_ATTEMPTS
+
+def test_rank_and_first_after_deletes():
+    rng = random.Random(7)
+    tree = OrderStatisticTree()
+    keys = set()
+    for _ in range(2000):
+        key = (rng.randrange(200), f"user{rng.randrange(50)}")
+        if key in keys and rng.random() < 0.5:
+            tree.delete(key)
+            keys.discard(key)
+        elif key not in keys:
+            tree.insert(key)
+            keys.add(key)
+
+    expected = sorted(keys)
+    assert len(tree) == len(expected)
+    assert tree.first(25) == expected[:25]
+    assert tree.first(len(expected) + 10) == expected
+    for index, key in enumerate(expected):
+        assert tree.rank(key) == index
+    # Keys that are not in the tree rank by how many keys are smaller
+    assert tree.rank((-1, "")) == 0
+    assert tree.rank((10**9, "")) == len(expected)
+
+def test_delete_missing_key_is_a_no_op():
+    tree = OrderStatisticTree()
+    for key in [(1, "a"), (2, "b"), (3, "c")]:
+        tree.insert(key)
+    tree.delete((2, "z"))
+    assert tree.first(10) == [(1, "a"), (2, "b"), (3, "c")]
+
+def test_leaderboard_reranks_updated_users():
+    board = Leaderboard()
+    board.add("alice", 5, 10)
+    board.add("bob", 3, 3)
+    board.add("carol", 4, 8)
+    assert [entry["user_id"] for entry in board.top("correct", 3)] == ["alice", "carol", "bob"]
+
+    # Updating a user replaces their old key instead of adding a second one
+    board.add("bob", 4, 4)
+    top = board.top("correct", 10)
+    assert [entry["user_id"] for entry in top] == ["bob", "alice", "carol"]
+    assert [entry["rank"] for entry in top] == [1, 2, 3]
+    assert board.size("correct") == 3
+    assert board.rank_of("correct", "carol")["rank"] == 3
+    assert board.rank_of("correct", "dave") is None
+
+def test_accuracy_board_waits_for_min_attempts():
+    board = Leaderboard()
+    board.add("alice", 1, 1)
+    board.add("bob", LEADERBOARD_MIN_ATTEMPTS // 2, LEADERBOARD_MIN_ATTEMPTS)
+    assert board.rank_of("accuracy", "alice") is None
+    assert [entry["user_id"] for entry in board.top("accuracy", 10)] == ["bob"]
+
+    board.add("alice", LEADERBOARD_MIN_ATTEMPTS - 1, LEADERBOARD_MIN_ATTEMPTS - 1)
+    assert [entry["user_id"] for entry in board.top("accuracy", 10)] == ["alice", "bob"]
+    assert board.size("accuracy") == 2
@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+from app import practice
+from app.practice import REVIEW_INTERVALS, PracticeCatalog, PracticeQueue, next_box
+
+LAST_BOX = len(REVIEW_INTERVALS) - 1
+
+@pytest.mark.parametrize("box, is_correct, expected", [
+    (None, False, 0),
+    (None, True, None),
+    (0, False, 0),
+    (0, True, 1),
+    (2, False, 0),
+    (LAST_BOX - 1, True, LAST_BOX),
+    (LAST_BOX, False, 0),
+    (LAST_BOX, True, None),
+])
+def test_next_box(box, is_correct, expected):
+    assert next_box(box, is_correct) == expected
+
+def test_correct_answers_climb_every_box_then_retire():
+    box = next_box(None, False)
+    boxes = [box]
+    while box is not None:
+        box = next_box(box, True)
+        boxes.append(box)
+    assert boxes == list(range(len(REVIEW_INTERVALS))) + [None]
+
+def _review(db, user_id, question_id):
+    return db.execute(
+        "SELECT box, due_at FROM practice_reviews WHERE user_id = ? AND question_id = ?",
+        (user_id, question_id)
+    ).fetchone()
+
+def test_record_events_stores_boxes_and_retires():
+    db = sqlite3.connect(":memory:")
+    practice.create_tables(db)
+    practice.record_events(db, [("u1", 1, False, 100.0), ("u1", 1, True, 200.0), ("u1", 2, True, 300.0)])
+    assert _review(db, "u1", 1) == (1, 200.0 + REVIEW_INTERVALS[1])
+    # A first answer that is correct never enters review
+    assert _review(db, "u1", 2) is None
+
+    # A miss from any box sends the question back to box 0
+    practice.record_events(db, [("u1", 1, False, 400.0)])
+    assert _review(db, "u1", 1) == (0, 400.0 + REVIEW_INTERVALS[0])
+
+    practice.record_events(db, [("u1", 1, True, 500.0 + i) for i in range(len(REVIEW_INTERVALS))])
+    assert _review(db, "u1", 1) is None
+
+def test_queue_serves_due_reviews_before_unseen_questions():
+    catalog = PracticeCatalog([(1, "Physics", "Optics"), (2, "Physics", "Optics"), (3, "Physics", "Waves")], "test")
+    queue = PracticeQueue(catalog, None)
+    queue.build([])
+    queue.record(1, False, now=0.0)
+
+    pick = queue.next(now=1.0)
+    assert pick["reason"] == "weak_chapter"
+    assert pick["question_id"] == 2
+
+    pick = queue.next(now=REVIEW_INTERVALS[0])
+    assert (pick["question_id"], pick["reason"], pick["due_at"]) == (1, "review", REVIEW_INTERVALS[0])
+
+    # Answering it correctly moves it to box 1, so it is no longer due
+    queue.record(1, True, now=REVIEW_INTERVALS[0])
+    assert queue.reviews[1] == (1, REVIEW_INTERVALS[0] + REVIEW_INTERVALS[1])
+    assert queue.next(now=REVIEW_INTERVALS[0] + 1)["reason"] == "weak_chapter"
@@ -0,0 +1,65 @@
+import random
+import sqlite3
+
+import pytest
+
+from app import question_stats
+from app.question_stats import QuantileSketch, QuestionStats, SKETCH_RELATIVE_ACCURACY
+
+QUANTILES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+def _answer_times(seed: int, n: int):
+    rng = random.Random(seed)
+    return [max(1, round(rng.lognormvariate(4, 1))) for _ in range(n)]
+
+def _assert_within_bound(sketch: QuantileSketch, values):
+    values = sorted(values)
+    for q in QUANTILES:
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=SKETCH_RELATIVE_ACCURACY)
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_quantiles_within_relative_accuracy(seed):
+    values = _answer_times(seed, 5000)
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    assert sketch.count == len(values)
+    _assert_within_bound(sketch, values)
+
+def test_merged_sketches_keep_the_bound():
+    values = _answer_times(4, 6000)
+    parts = [QuantileSketch() for _ in range(3)]
+    for i, value in enumerate(values):
+        parts[i % 3].add(value)
+    merged = QuantileSketch()
+    for part in parts:
+        merged.merge(part)
+    _assert_within_bound(merged, values)
+
+def test_zero_times_and_empty_sketch():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+    for value in [0, 0, 0, 30]:
+        sketch.add(value)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(30, rel=SKETCH_RELATIVE_ACCURACY)
+
+def test_stored_sketch_reads_back_unchanged(monkeypatch):
+    monkeypatch.setattr(question_stats, "_stats", {})
+    db = sqlite3.connect(":memory:")
+    question_stats.create_tables(db)
+    values = _answer_times(5, 1000) + [0, 0]
+    question_stats.record_events(db, [(1, i % 2 == 0, None, value) for i, value in enumerate(values)])
+    stored = question_stats._read(db)[1]
+
+    expected = QuestionStats()
+    for i, value in enumerate(values):
+        expected.record(i % 2 == 0, None, value)
+    assert stored.sketch.buckets == expected.sketch.buckets
+    assert stored.sketch.zero_count == 2
+    assert stored.to_response() == expected.to_response()
+
+    question_stats.reload(db, [1, 2])
+    assert question_stats.get(1) == expected.to_response()
+    assert question_stats.get(2) is None
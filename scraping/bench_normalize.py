@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from normalize import clean_math_text, clean_text
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "normalize.json")
+
+def load_cases(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def check_golden(cases: list) -> int:
+    """Compare both normalizers against the golden outputs; returns the number of mismatches."""
+    failures = 0
+    for case in cases:
+        for name, func in (("clean_text", clean_text), ("clean_math_text", clean_math_text)):
+            actual = func(case["input"])
+            if actual != case[name]:
+                failures += 1
+                print(f"MISMATCH {name}({case['input']!r})")
+                print(f"  expected: {case[name]!r}")
+                print(f"  actual:   {actual!r}")
+    return failures
+
+def update_golden(cases: list, path: str) -> None:
+    for case in cases:
+        case["clean_text"] = clean_text(case["input"])
+        case["clean_math_text"] = clean_math_text(case["input"])
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cases, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    print(f"Updated {len(cases)} golden cases in {path}")
+
+def benchmark(cases: list, repeat: int, block_chars: int) -> None:
+    """Report throughput in chars/sec on page-block-sized chunks of the golden inputs."""
+    text = " ".join(case["input"] for case in cases)
+    blocks = []
+    while sum(len(block) for block in blocks) < 1_000_000:
+        blocks.extend(text[i:i + block_chars] for i in range(0, len(text), block_chars))
+    total_chars = sum(len(block) for block in blocks)
+
+    for name, func in (("clean_text", clean_text), ("clean_math_text", clean_math_text)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for block in blocks:
+                func(block)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:16s} {total_chars / best / 1e6:8.2f} M chars/sec "
+              f"({len(blocks)} blocks of ~{block_chars} chars, best of {repeat})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden-output check and micro-benchmark for text normalization")
+    parser.add_argument("--golden", default=GOLDEN_PATH, help="Golden corpus JSON file")
+    parser.add_argument("--check", action="store_true", help="Only run the golden-output check")
+    parser.add_argument("--update", action="store_true",
+                        help="Rewrite expected outputs after an intentional normalization change")
+    parser.add_argument("--repeat", type=int, default=5, help="Benchmark repetitions (best is reported)")
+    parser.add_argument("--block-chars", type=int, default=400, help="Characters per benchmark block")
+    args = parser.parse_args()
+
+    cases = load_cases(args.golden)
+    if args.update:
+        update_golden(cases, args.golden)
+        return
+
+    failures = check_golden(cases)
+    print(f"Golden check: {len(cases) * 2 - failures}/{len(cases) * 2} outputs match")
+    if failures:
+        sys.exit(1)
+
+    if not args.check:
+        benchmark(cases, args.repeat, args.block_chars)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import List
+
+import fitz  # PyMuPDF
+
+from profiling import Profiler
+from scrape import extract_data_from_pdfs
+
+# Sentence fragments per subject, so the classifier has something to chew on
+SUBJECT_STEMS = {
+    "physics": [
+        "A body of mass {a} kg moves with velocity {b} m/s. Find its momentum",
+        "The electric current through a resistance of {a} ohm is {b} A. The voltage is",
+        "A wave of frequency {a} Hz travels with velocity {b} m/s. The wavelength is",
+    ],
+    "chemistry": [
+        "The molecule formed when {a} mol of acid reacts with {b} mol of base is",
+        "In the oxidation reaction of compound X, {a} electrons are transferred per {b} atoms",
+        "The bond order of the organic compound with {a} sigma and {b} pi bonds is",
+    ],
+    "mathematics": [
+        "If the matrix A has determinant {a} and B = {b}A, the value of det(B) is",
+        "The integral of the function f(x) = {a}x^{b} from 0 to 1 is",
+        "The probability that a fair die shows {a} in {b} throws is",
+    ],
+}
+
+def question_text(rng: random.Random, number: int) -> str:
+    subject = rng.choice(list(SUBJECT_STEMS))
+    stem = rng.choice(SUBJECT_STEMS[subject]).format(a=rng.randint(2, 99), b=rng.randint(2, 9))
+    options = " ".join(f"({i}) {rng.randint(1, 500)}/{rng.randint(2, 9)}" for i in range(1, 5))
+    return f"Q{number}. {stem}:\n{options}"
+
+def random_pixmap(rng: random.Random, width: int, height: int) -> fitz.Pixmap:
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+    pixmap.set_rect(pixmap.irect, (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+    # A few random stripes so images of the same size are not byte-identical
+    for _ in range(4):
+        y = rng.randint(0, height - 4)
+        pixmap.set_rect(fitz.IRect(0, y, width, y + 3), (rng.randint(0, 255), 0, 0))
+    return pixmap
+
+def generate_pdf(path: str, pages: int, questions_per_page: int, images_per_page: int, seed: int) -> int:
+    """Write a synthetic exam paper with an answer-key page; returns the number of questions."""
+    rng = random.Random(seed)
+    pdf = fitz.open()
+    logo = random_pixmap(rng, 120, 40)
+    number = 0
+
+    for _ in range(pages):
+        page = pdf.new_page(width=595, height=842)
+        # Same logo on every page, like the publisher's header on real papers
+        page.insert_image(fitz.Rect(40, 20, 160, 60), pixmap=logo)
+
+        slot_height = (842 - 100) / questions_per_page
+        for slot in range(questions_per_page):
+            number += 1
+            top = 80 + slot * slot_height
+            page.insert_textbox(
+                fitz.Rect(40, top, 380, top + slot_height - 5),
+                question_text(rng, number),
+                fontsize=9
+            )
+            # Diagrams go in the right margin next to their question
+            if slot < images_per_page:
+                page.insert_image(
+                    fitz.Rect(400, top, 550, top + min(100, slot_height - 5)),
+                    pixmap=random_pixmap(rng, 150, 100)
+                )
+
+    key_page = pdf.new_page(width=595, height=842)
+    answers = "\n".join(f"{n}. ({rng.randint(1, 4)})" for n in range(1, number + 1))
+    key_page.insert_textbox(fitz.Rect(40, 40, 555, 820), "Answer Keys\n" + answers, fontsize=8)
+
+    pdf.save(path)
+    pdf.close()
+    return number
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraping pipeline on synthetic exam PDFs")
+    parser.add_argument("--documents", type=int, default=4, help="Number of synthetic PDFs")
+    parser.add_argument("--pages", type=int, default=20, help="Question pages per PDF")
+    parser.add_argument("--questions-per-page", type=int, default=5)
+    parser.add_argument("--images-per-page", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", default=None, help="Write the JSON profile report here")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated PDFs and output")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="scrape-bench-")
+    try:
+        pdf_paths: List[str] = []
+        total_questions = 0
+        start = time.perf_counter()
+        for i in range(args.documents):
+            path = os.path.join(work_dir, f"JEE Main 2024 synthetic {i + 1}.pdf")
+            total_questions += generate_pdf(path, args.pages, args.questions_per_page,
+                                            args.images_per_page, args.seed + i)
+            pdf_paths.append(path)
+        print(f"Generated {args.documents} PDFs ({args.pages + 1} pages each) in "
+              f"{time.perf_counter() - start:.2f}s under {work_dir}")
+
+        profiler = Profiler()
+        start = time.perf_counter()
+        summary = extract_data_from_pdfs(pdf_paths, os.path.join(work_dir, "output"), args.workers,
+                                         profiler=profiler)
+        elapsed = time.perf_counter() - start
+
+        total_pages = args.documents * (args.pages + 1)
+        extracted = sum(document["questions"] for document in summary.values())
+        print(f"\nExtracted {extracted}/{total_questions} questions from {total_pages} pages "
+              f"in {elapsed:.2f}s with {args.workers} worker(s)")
+        print(f"{total_pages / elapsed:.1f} pages/sec, {extracted / elapsed:.1f} questions/sec\n")
+        print(profiler.summary_table())
+        if args.report:
+            profiler.write_report(args.report)
+            print(f"\nProfile report written to {args.report}")
+    finally:
+        if args.keep:
+            print(f"Kept benchmark files in {work_dir}")
+        else:
+            shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Tuple
+
+class ExtractionCache:
+    """
+    Content-addressed cache of per-page extraction results.
+
+    Entries are keyed on the SHA-256 of the PDF bytes, the page index and the
+    extractor version (which includes the image and OCR options, as cached pages
+    refer to stored image files and hold OCR'd text), so renaming a paper still hits and changing the parser
+    (bumping the version) misses. Exam info is derived from the file name, so
+    callers re-apply it to cached pages. Layout:
+
+        <root>/<hash[:2]>/<hash>/v<version>/page-0001.json
+        <root>/<hash[:2]>/<hash>/v<version>/answer_keys.json
+
+    OCR output does not depend on the parser, so it is stored separately under
+    <root>/ocr/, keyed on the page content hash, and survives clear().
+    """
+
+    def __init__(self, root: str, extractor_version: str):
+        self.root = root
+        self.extractor_version = extractor_version
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _document_dir(self, pdf_hash: str) -> str:
+        return os.path.join(self.root, pdf_hash[:2], pdf_hash, f"v{self.extractor_version}")
+
+    def _read(self, path: str) -> Optional[Any]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, path: str, value: Any) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def get_page(self, pdf_hash: str, page_index: int) -> Optional[Tuple[List[Dict], List[Dict]]]:
+        """Return cached (questions, images) for a page, or None on a miss."""
+        entry = self._read(os.path.join(self._document_dir(pdf_hash), f"page-{page_index + 1:04d}.json"))
+        # An entry whose images were deleted from disk is as good as missing
+        if entry is None or not all(os.path.exists(image["path"]) for image in entry["images"]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["questions"], entry["images"]
+
+    def put_page(self, pdf_hash: str, page_index: int, questions: List[Dict], images: List[Dict]) -> None:
+        self._write(
+            os.path.join(self._document_dir(pdf_hash), f"page-{page_index + 1:04d}.json"),
+            {"questions": questions, "images": images}
+        )
+
+    def get_answer_keys(self, pdf_hash: str) -> Optional[Dict[int, str]]:
+        entry = self._read(os.path.join(self._document_dir(pdf_hash), "answer_keys.json"))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # JSON object keys are strings; question numbers are ints everywhere else
+        return {int(number): answer for number, answer in entry.items()}
+
+    def put_answer_keys(self, pdf_hash: str, answer_keys: Dict[int, str]) -> None:
+        self._write(os.path.join(self._document_dir(pdf_hash), "answer_keys.json"), answer_keys)
+
+    def get_ocr(self, key: str) -> Optional[List[Tuple]]:
+        entry = self._read(os.path.join(self.root, "ocr", key[:2], f"{key}.json"))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [tuple(block) for block in entry]
+
+    def put_ocr(self, key: str, blocks: List[Tuple]) -> None:
+        self._write(os.path.join(self.root, "ocr", key[:2], f"{key}.json"), blocks)
+
+    def clear(self) -> None:
+        """Drop every cached extraction, e.g. after changing parsing rules without bumping the version."""
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            # OCR results stay valid when parsing rules change, and are expensive to redo
+            if name == "ocr":
+                continue
+            path = os.path.join(self.root, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def stats(self, label: str = "Cache") -> str:
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0
+        return f"{label}: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate)"
@@ -0,0 +1,150 @@
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up scoring of large batches
+    np = None
+
+# Questions whose winning subject holds less than this share of the evidence
+# should be flagged for review
+LOW_CONFIDENCE = 0.5
+
+def _trie_pattern(words: Sequence[str]) -> str:
+    """
+    Build a regex alternation shaped like a trie, e.g. acid|acidic|atom -> a(?:cid(?:ic)?|tom).
+    Python's re tries every branch of a flat alternation at each position; a trie
+    keeps matching cost proportional to the word length as keyword lists grow.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional group prefers the longest keyword, like "acidic" over "acid"
+        if terminal:
+            return f'(?:{body})?'
+        return body
+
+    return build(trie)
+
+class SubjectClassifier:
+    """
+    Keyword-based subject classifier that scores whole batches of questions.
+
+    All keywords are compiled into a single trie-shaped regex anchored at word
+    starts, so one scan per text finds every keyword hit. Hits are turned into
+    sublinear counts and summed per subject through a keyword-by-subject matrix.
+    With an idf_corpus (or after fit_idf) the counts are weighted by IDF over that
+    fixed corpus, so a question's score never depends on the rest of its batch.
+    The confidence is the winning subject's share of the total score; texts with
+    no hits get subject None with confidence 0, so callers can tell them apart.
+    """
+
+    def __init__(self, subjects: Dict[str, List[str]], chapter_weight: float = 2.0,
+                 idf_corpus: Optional[Sequence[str]] = None):
+        self.subjects = list(subjects.keys())
+        self.chapter_weight = chapter_weight
+
+        self.keywords = sorted({keyword.lower() for keywords in subjects.values() for keyword in keywords})
+        self.keyword_index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        # A keyword listed under several subjects counts towards each of them
+        subject_keywords = [{keyword.lower() for keyword in subjects[subject]} for subject in self.subjects]
+        self.keyword_subjects = [
+            [s for s, keywords in enumerate(subject_keywords) if keyword in keywords]
+            for keyword in self.keywords
+        ]
+        # Whole words only (allowing a plural ending), so "base" does not count in "based"
+        self.pattern = re.compile(r'\b(' + _trie_pattern(self.keywords) + r')(?:e?s)?\b', re.IGNORECASE)
+
+        if np is not None:
+            self.subject_matrix = np.zeros((len(self.keywords), len(self.subjects)), dtype=np.float32)
+            for k, subject_ids in enumerate(self.keyword_subjects):
+                self.subject_matrix[k, subject_ids] = 1.0
+
+        # Plain keyword scoring unless a reference corpus is given
+        self.idf = [1.0] * len(self.keywords)
+        if idf_corpus is not None:
+            self.fit_idf(idf_corpus)
+
+    def fit_idf(self, texts: Sequence[str]) -> None:
+        """Weight keywords by their inverse document frequency over a fixed corpus of texts."""
+        document_frequency = [0] * len(self.keywords)
+        for text in texts:
+            for k in self._term_counts(text or ''):
+                document_frequency[k] += 1
+        n = len(texts)
+        self.idf = [math.log((1 + n) / (1 + df)) + 1.0 for df in document_frequency]
+
+    def _term_counts(self, text: str) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for match in self.pattern.finditer(text):
+            k = self.keyword_index[match.group(1).lower()]
+            counts[k] = counts.get(k, 0) + 1
+        return counts
+
+    def _weighted_counts(self, texts: Sequence[str], chapters: Optional[Sequence[Optional[str]]]) -> List[Dict[int, float]]:
+        documents = []
+        for i, text in enumerate(texts):
+            weights = {k: float(count) for k, count in self._term_counts(text or '').items()}
+            chapter = chapters[i] if chapters else None
+            if chapter:
+                for k, count in self._term_counts(chapter).items():
+                    weights[k] = weights.get(k, 0.0) + self.chapter_weight * count
+            documents.append(weights)
+        return documents
+
+    def classify_batch(self, texts: Sequence[str],
+                       chapters: Optional[Sequence[Optional[str]]] = None) -> List[Tuple[Optional[str], float]]:
+        """Return (subject, confidence) for each text; chapter names, when given, weigh extra."""
+        documents = self._weighted_counts(texts, chapters)
+        if not documents:
+            return []
+
+        if np is not None and len(documents) > 1:
+            scores = self._score_numpy(documents, self.idf)
+        else:
+            scores = self._score_python(documents, self.idf)
+
+        results = []
+        for row in scores:
+            total = sum(row)
+            if total <= 0:
+                results.append((None, 0.0))
+                continue
+            best = max(range(len(row)), key=row.__getitem__)
+            results.append((self.subjects[best], row[best] / total))
+        return results
+
+    def classify(self, text: str, chapter: Optional[str] = None) -> Tuple[Optional[str], float]:
+        return self.classify_batch([text], [chapter] if chapter else None)[0]
+
+    def _score_python(self, documents: List[Dict[int, float]], idf: List[float]) -> List[List[float]]:
+        scores = []
+        for weights in documents:
+            row = [0.0] * len(self.subjects)
+            for k, weight in weights.items():
+                value = (1.0 + math.log(weight)) * idf[k] if weight >= 1 else weight * idf[k]
+                for s in self.keyword_subjects[k]:
+                    row[s] += value
+            scores.append(row)
+        return scores
+
+    def _score_numpy(self, documents: List[Dict[int, float]], idf: List[float]) -> List[List[float]]:
+        matrix = np.zeros((len(documents), len(self.keywords)), dtype=np.float32)
+        for d, weights in enumerate(documents):
+            if weights:
+                matrix[d, list(weights.keys())] = list(weights.values())
+        # Sublinear term frequency, matching _score_python
+        matrix = np.where(matrix >= 1, 1.0 + np.log(np.maximum(matrix, 1.0)), matrix)
+        matrix *= np.asarray(idf, dtype=np.float32)
+        return (matrix @ self.subject_matrix).tolist()
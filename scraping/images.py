@@ -0,0 +1,191 @@
+import hashlib
+import io
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from page_model import PageModel
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is only needed for resizing / WebP conversion
+    Image = None
+
+def image_variant(webp: bool = False, max_size: Optional[int] = None,
+                  thumbnail_size: Optional[int] = None) -> str:
+    """The image options that change stored files, e.g. "webp-max1024-thumb256"; empty for originals"""
+    parts = []
+    if webp:
+        parts.append("webp")
+    if max_size:
+        parts.append(f"max{max_size}")
+    if thumbnail_size:
+        parts.append(f"thumb{thumbnail_size}")
+    return "-".join(parts)
+
+class ImageStore:
+    """
+    Content-addressed image store.
+
+    Images are named by the SHA-256 of their original bytes and laid out as
+    <root>/<hash[:2]>/<hash>.<ext>, so a logo or header repeated on every page
+    (or in every paper) is written once. Downscaled copies are named
+    <hash>.max<size>.<ext>, so runs with different --max-image-size never reuse
+    each other's files. With thumbnail_size, a downscaled copy is written next to
+    it as <hash>.thumb.<ext> for images larger than that, including images an
+    earlier run already stored without one.
+    Writes run on a small thread pool and are awaited with flush(), letting
+    hashing and extraction of the next image overlap with disk I/O.
+    """
+
+    def __init__(self, root: str, webp: bool = False, max_size: Optional[int] = None,
+                 thumbnail_size: Optional[int] = None, writer_threads: int = 4):
+        if (webp or max_size or thumbnail_size) and Image is None:
+            raise ValueError("Pillow is required for WebP conversion, resizing or thumbnails")
+        self.root = root
+        self.webp = webp
+        self.max_size = max_size
+        self.thumbnail_size = thumbnail_size
+        self._executor = ThreadPoolExecutor(max_workers=writer_threads)
+        self._pending: List[Future] = []
+        # Hashes this process already wrote (or found on disk), to skip the exists() check
+        self._known: Dict[str, str] = {}
+        # Hashes with a write in flight; a failed write is dropped here and retried on the next put()
+        self._queued: Dict[str, Future] = {}
+
+    def path_for(self, image_hash: str, ext: str, thumbnail: bool = False) -> str:
+        if thumbnail:
+            name = f"{image_hash}.thumb.{ext}"
+        elif self.max_size:
+            name = f"{image_hash}.max{self.max_size}.{ext}"
+        else:
+            name = f"{image_hash}.{ext}"
+        return os.path.join(self.root, image_hash[:2], name)
+
+    def _thumbnail_path(self, image_hash: str) -> str:
+        return self.path_for(image_hash, "webp" if self.webp else "png", thumbnail=True)
+
+    def put(self, data: bytes, ext: str) -> Tuple[str, str]:
+        """Queue an image for writing and return its (hash, path)."""
+        image_hash = hashlib.sha256(data).hexdigest()
+        path = self._known.get(image_hash)
+        if path is not None:
+            return image_hash, path
+
+        path = self.path_for(image_hash, "webp" if self.webp else ext)
+        if image_hash in self._queued:
+            return image_hash, path
+        if not os.path.exists(path):
+            future = self._executor.submit(self._write, data, image_hash, path)
+        elif self.thumbnail_size and not os.path.exists(self._thumbnail_path(image_hash)):
+            # Stored by a run without thumbnails (or the image is too small to need one)
+            future = self._executor.submit(self._write_thumbnail, data, image_hash)
+        else:
+            self._known[image_hash] = path
+            return image_hash, path
+        self._queued[image_hash] = future
+        future.add_done_callback(partial(self._written, image_hash, path))
+        self._pending.append(future)
+        return image_hash, path
+
+    def _written(self, image_hash: str, path: str, future: Future) -> None:
+        # Only a write that succeeded lets later puts skip the image
+        if future.exception() is None:
+            self._known[image_hash] = path
+        self._queued.pop(image_hash, None)
+
+    def _write(self, data: bytes, image_hash: str, path: str) -> None:
+        if self.thumbnail_size:
+            self._write_thumbnail(data, image_hash)
+        if self.webp or self.max_size:
+            with Image.open(io.BytesIO(data)) as image:
+                if self.max_size:
+                    image.thumbnail((self.max_size, self.max_size))
+                output = io.BytesIO()
+                if self.webp:
+                    if image.mode not in ("RGB", "RGBA", "L"):
+                        image = image.convert("RGBA")
+                    image.save(output, format="WEBP", quality=85, method=4)
+                else:
+                    image.save(output, format=image.format or "PNG")
+                data = output.getvalue()
+
+        self._write_file(data, path)
+
+    def _write_thumbnail(self, data: bytes, image_hash: str) -> None:
+        with Image.open(io.BytesIO(data)) as image:
+            if max(image.size) <= self.thumbnail_size:
+                # Already small: the full image doubles as the thumbnail
+                return
+            image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+            if image.mode not in ("RGB", "RGBA", "L"):
+                image = image.convert("RGBA")
+            output = io.BytesIO()
+            if self.webp:
+                image.save(output, format="WEBP", quality=80, method=4)
+            else:
+                image.save(output, format="PNG", optimize=True)
+        # Written before the full image, so a visible full image always has its thumbnail
+        self._write_file(output.getvalue(), self._thumbnail_path(image_hash))
+
+    @staticmethod
+    def _write_file(data: bytes, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temp name: several worker processes may store the same image at once
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def flush(self) -> None:
+        """Wait for queued writes; re-raises the first write error."""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
+    def close(self) -> None:
+        self.flush()
+        self._executor.shutdown()
+
+def extract_page_images(pdf: fitz.Document, page: PageModel, store: ImageStore,
+                        xref_cache: Optional[Dict[int, Tuple[str, str]]] = None) -> List[Dict]:
+    """
+    Extract the images placed on a page into the store.
+    Image placements come from the page model, read once per page; each xref is
+    extracted and hashed at most once per document when the caller passes the
+    same xref_cache for every page.
+    """
+    if xref_cache is None:
+        xref_cache = {}
+
+    images = []
+    for xref in page.image_xrefs:
+        rects = page.image_rects.get(xref)
+        if not rects:
+            # Not actually drawn on this page (e.g. an unused resource)
+            continue
+
+        stored = xref_cache.get(xref)
+        if stored is None:
+            base_image = pdf.extract_image(xref)
+            stored = store.put(base_image["image"], base_image["ext"])
+            xref_cache[xref] = stored
+        image_hash, image_path = stored
+
+        bbox = rects[0]
+        images.append({
+            "page": page.number + 1,
+            "path": image_path,
+            "hash": image_hash,
+            "bbox": {  # Where the image is drawn, in PDF points
+                "x0": bbox.x0,
+                "y0": bbox.y0,
+                "x1": bbox.x1,
+                "y1": bbox.y1
+            }
+        })
+
+    return images
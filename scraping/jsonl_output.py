@@ -0,0 +1,125 @@
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+QUESTIONS_FILE = "questions.jsonl"
+IMAGES_FILE = "images.jsonl"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+class ExtractionWriter:
+    """
+    Streams a document's extraction results as JSON Lines, one page at a time.
+
+    Each finished page appends one record per question to questions.jsonl and one
+    per image to images.jsonl, then atomically rewrites
+    manifest.json with the progress so far. A crash loses at most the page in
+    flight, and readers can tail the files while extraction is still running.
+    Files are opened per page rather than held open, so a batch with hundreds of
+    documents in progress does not run out of file descriptors.
+    """
+
+    def __init__(self, output_dir: str, source: str, page_count: int):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.manifest = {
+            "format_version": FORMAT_VERSION,
+            "source": source,
+            "status": "in_progress",
+            "page_count": page_count,
+            "pages_written": 0,
+            "questions": 0,
+            "images": 0,
+            "files": {"questions": QUESTIONS_FILE, "images": IMAGES_FILE},
+            "errors": [],
+            "started_at": datetime.now().isoformat(),
+            "updated_at": None,
+        }
+        self._questions_path = os.path.join(output_dir, QUESTIONS_FILE)
+        self._images_path = os.path.join(output_dir, IMAGES_FILE)
+        # Start from empty files; a rerun replaces the previous output
+        for path in (self._questions_path, self._images_path):
+            open(path, "w", encoding="utf-8").close()
+        self._write_manifest()
+
+    @staticmethod
+    def _public(record: Dict) -> Dict:
+        # Fields prefixed with _ are for internal use only
+        return {key: value for key, value in record.items() if not key.startswith("_")}
+
+    def _append(self, path: str, records: List[Dict]) -> None:
+        if not records:
+            return
+        lines = "".join(json.dumps(self._public(record), ensure_ascii=False) + "\n" for record in records)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def write_page(self, questions: List[Dict], images: List[Dict]) -> None:
+        self._append(self._questions_path, questions)
+        self._append(self._images_path, images)
+
+        self.manifest["pages_written"] += 1
+        self.manifest["questions"] += len(questions)
+        self.manifest["images"] += len(images)
+        self._write_manifest()
+
+    def add_error(self, page: Optional[int], error: str) -> None:
+        self.manifest["errors"].append({"page": page, "error": error})
+
+    def close(self) -> Dict[str, Any]:
+        self.manifest["status"] = "complete"
+        self._write_manifest()
+        return self.manifest
+
+    def _write_manifest(self) -> None:
+        self.manifest["updated_at"] = datetime.now().isoformat()
+        path = os.path.join(self.output_dir, MANIFEST_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+def read_manifest(output_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def iter_records(output_dir: str, kind: str = "questions", follow: bool = False,
+                 poll_interval: float = 0.5) -> Iterator[Dict]:
+    """
+    Yield records from questions.jsonl or images.jsonl as they are written.
+    With follow=True, keep tailing the file until the manifest reports the
+    extraction complete and every record has been read.
+    """
+    path = os.path.join(output_dir, QUESTIONS_FILE if kind == "questions" else IMAGES_FILE)
+    while follow and not os.path.exists(path):
+        time.sleep(poll_interval)
+
+    with open(path, "r", encoding="utf-8") as f:
+        pending = ""
+        while True:
+            line = f.readline()
+            if line:
+                pending += line
+                # A line without its newline is still being written
+                if pending.endswith("\n"):
+                    yield json.loads(pending)
+                    pending = ""
+                continue
+
+            if not follow:
+                return
+            manifest = read_manifest(output_dir)
+            if manifest and manifest["status"] == "complete":
+                # Every record is written before completion is recorded; drain the rest
+                for line in f:
+                    pending += line
+                    if pending.endswith("\n"):
+                        yield json.loads(pending)
+                        pending = ""
+                return
+            time.sleep(poll_interval)
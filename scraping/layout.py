@@ -0,0 +1,83 @@
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+# How far (in points) a question may cross the page's vertical midline and still
+# count as sitting in one column
+COLUMN_TOLERANCE = 12.0
+
+class QuestionIndex:
+    """
+    Per-page interval index over question bounding boxes.
+
+    Questions are bucketed by column and sorted by y0 within each column, so the
+    question an image belongs to (the one containing it, or else the nearest one
+    above it) is a binary search. Two-column pages are detected from the question
+    boxes themselves; full-width questions are indexed in both columns. Reading
+    order is left column then right column, so an image at the top of the right
+    column belongs to the last question of the left one.
+    """
+
+    def __init__(self, questions: List[Dict], page_width: float):
+        self.midline = page_width / 2
+        self.two_column = any(
+            question["bbox"]["x0"] >= self.midline - COLUMN_TOLERANCE for question in questions
+        )
+
+        columns: Tuple[List[Dict], List[Dict]] = ([], [])
+        for question in questions:
+            for column in self._columns(question["bbox"]):
+                columns[column].append(question)
+        self._questions = tuple(sorted(column, key=lambda q: q["bbox"]["y0"]) for column in columns)
+        self._starts = tuple([q["bbox"]["y0"] for q in column] for column in self._questions)
+
+    def _columns(self, bbox: Dict) -> Tuple[int, ...]:
+        if not self.two_column:
+            return (0,)
+        if bbox["x1"] <= self.midline + COLUMN_TOLERANCE:
+            return (0,)
+        if bbox["x0"] >= self.midline - COLUMN_TOLERANCE:
+            return (1,)
+        return (0, 1)
+
+    def find(self, bbox: Dict) -> Optional[Tuple[Dict, str]]:
+        """
+        Return (question, "contains" | "precedes") for an image's bbox, or None
+        when nothing on the page comes before it.
+        """
+        center_x = (bbox["x0"] + bbox["x1"]) / 2
+        center_y = (bbox["y0"] + bbox["y1"]) / 2
+        column = 1 if self.two_column and center_x > self.midline else 0
+
+        position = bisect_right(self._starts[column], center_y)
+        if position:
+            question = self._questions[column][position - 1]
+        elif column == 1 and self._questions[0]:
+            # Above every right-column question: still part of the left column's last one
+            question = self._questions[0][-1]
+        else:
+            return None
+
+        qbox = question["bbox"]
+        contained = qbox["x0"] <= center_x <= qbox["x1"] and qbox["y0"] <= center_y <= qbox["y1"]
+        return question, "contains" if contained else "precedes"
+
+def associate_images_with_questions(questions: List[Dict], images: List[Dict], page_width: float) -> None:
+    """
+    Attach each image on a page to its question. Questions get an "images" list of
+    image hashes; images get the question "number" and how it was matched
+    ("association"), both None when no question precedes the image on the page.
+    """
+    for question in questions:
+        question["images"] = []
+    index = QuestionIndex(questions, page_width)
+
+    for image in images:
+        match = index.find(image["bbox"])
+        if match is None:
+            image["question"] = None
+            image["association"] = None
+            continue
+        question, association = match
+        question["images"].append(image["hash"])
+        image["question"] = question["number"]
+        image["association"] = association
@@ -0,0 +1,151 @@
+"""
+Single-pass text normalization for extracted question text.
+
+All tables and patterns are built once at import. clean_text() does one
+NFKC pass (skipped when the text is already normalized), one substitution
+over a single compiled character class that maps whitespace variants, strips
+control characters and rewrites math symbols to LaTeX, one whitespace collapse, and one regex pass for the
+structural rewrites (exponents, subscripts, fractions, scientific notation).
+"""
+import re
+import unicodedata
+from typing import Optional
+
+# Common mathematical symbols and their LaTeX replacements
+MATH_REPLACEMENTS = {
+    '×': '\\times',
+    '÷': '\\div',
+    '±': '\\pm',
+    '∓': '\\mp',
+    '⋅': '\\cdot',
+    '≠': '\\neq',
+    '≥': '\\geq',
+    '≤': '\\leq',
+    '≈': '\\approx',
+    '∝': '\\propto',
+    '→': '\\rightarrow',
+    '←': '\\leftarrow',
+    '↑': '\\uparrow',
+    '↓': '\\downarrow',
+    '⇒': '\\implies',
+    '⇔': '\\iff',
+    '∞': '\\infty',
+    '√': '\\sqrt',
+    '∴': '\\therefore',
+    '∵': '\\because',
+    '∎': '\\blacksquare',
+    'α': '\\alpha',
+    'β': '\\beta',
+    'γ': '\\gamma',
+    'δ': '\\delta',
+    'θ': '\\theta',
+    'λ': '\\lambda',
+    'μ': '\\mu',
+    'π': '\\pi',
+    'σ': '\\sigma',
+    'τ': '\\tau',
+    'φ': '\\phi',
+    'ω': '\\omega',
+    '°': '^{\\circ}',
+    '′': '\'',
+    '″': '\"',
+}
+
+# Whitespace variants that PDF text layers produce
+SPACE_VARIANTS = '\xa0\u200b\u2028\u2029\ufeff'
+
+def _build_clean_map() -> dict:
+    replacements = {}
+    # Control/format/unassigned characters in the BMP are dropped, except the
+    # ones that count as whitespace, which become spaces and are collapsed
+    for codepoint in range(0x10000):
+        char = chr(codepoint)
+        if unicodedata.category(char)[0] == 'C':
+            replacements[char] = ' ' if char.isspace() else ''
+    for char in SPACE_VARIANTS:
+        replacements[char] = ' '
+    replacements.update(MATH_REPLACEMENTS)
+    return replacements
+
+def _char_class(chars) -> 're.Pattern':
+    """Compile a set of characters into one character class of code point ranges."""
+    codepoints = sorted(ord(char) for char in chars)
+    ranges = []
+    start = end = codepoints[0]
+    for codepoint in codepoints[1:]:
+        if codepoint != end + 1:
+            ranges.append((start, end))
+            start = codepoint
+        end = codepoint
+    ranges.append((start, end))
+    return re.compile('[' + ''.join(
+        re.escape(chr(start)) if start == end else f'{re.escape(chr(start))}-{re.escape(chr(end))}'
+        for start, end in ranges
+    ) + ']')
+
+# One substitution pass over a single character class is several times faster
+# than str.translate() on mostly-clean text, since only matching characters
+# leave the regex engine
+CLEAN_MAP = _build_clean_map()
+CLEAN_RE = _char_class(CLEAN_MAP)
+MATH_RE = _char_class(MATH_REPLACEMENTS)
+
+WHITESPACE_RE = re.compile(r'\s+')
+ASTRAL_RE = re.compile('[\U00010000-\U0010ffff]')
+
+# Structural rewrites, tried left to right in a single scan. Scientific notation
+# comes first so "3 x 10^5" is not split into a bare exponent, and fractions take
+# their exponents with them so "2/3^2" keeps 3^2 in the denominator. A rewrite
+# never starts inside a number, so "1.6" is not cut into "1." and "6".
+STRUCTURE_RE = re.compile(
+    # The lookahead lets the engine skip positions that cannot start a rewrite
+    r'(?<![\d.])(?=[\d_])(?:'
+    r'(?P<sci>(\d+(?:\.\d+)?)\s*[xX]\s*10\s*\^\s*([+-]?\d+))'
+    r'|(?P<frac>(\d+)(?:\s*\^\s*(\d+))?\s*/\s*(\d+)(?:\s*\^\s*(\d+))?)'
+    r'|(?P<exp>(\d+)\s*\^\s*(\d+))'
+    r'|(?P<sub>_\s*(\d+))'
+    r')'
+)
+
+def _power(base: str, exponent: Optional[str]) -> str:
+    return f'{base}^{{{exponent}}}' if exponent else base
+
+def _rewrite_structure(match: 're.Match') -> str:
+    kind = match.lastgroup
+    if kind == 'sci':
+        return f'${match.group(2)}\\times10^{{{match.group(3)}}}$'
+    if kind == 'frac':
+        numerator = _power(match.group(5), match.group(6))
+        denominator = _power(match.group(7), match.group(8))
+        return f'$\\frac{{{numerator}}}{{{denominator}}}$'
+    if kind == 'exp':
+        return f'${match.group(10)}^{{{match.group(11)}}}$'
+    return f'$_{{{match.group(13)}}}$'
+
+def _replace_clean(match: 're.Match') -> str:
+    return CLEAN_MAP[match.group(0)]
+
+def _replace_math(match: 're.Match') -> str:
+    return MATH_REPLACEMENTS[match.group(0)]
+
+def _drop_astral_controls(match: 're.Match') -> str:
+    char = match.group(0)
+    return '' if unicodedata.category(char)[0] == 'C' else char
+
+def clean_math_text(text: str) -> str:
+    """Clean and format mathematical expressions."""
+    return STRUCTURE_RE.sub(_rewrite_structure, MATH_RE.sub(_replace_math, text))
+
+def clean_text(text: str) -> str:
+    """Clean and normalize text while preserving mathematical expressions."""
+    if not unicodedata.is_normalized('NFKC', text):
+        text = unicodedata.normalize('NFKC', text)
+
+    text = CLEAN_RE.sub(_replace_clean, text)
+    if not text.isascii() and ASTRAL_RE.search(text):
+        # Rare: private-use and unassigned code points above the BMP
+        text = ASTRAL_RE.sub(_drop_astral_controls, text)
+
+    text = WHITESPACE_RE.sub(' ', text)
+    text = STRUCTURE_RE.sub(_rewrite_structure, text)
+    return text.strip()
@@ -0,0 +1,115 @@
+import hashlib
+import string
+from typing import List, NamedTuple, Optional, Tuple
+
+import fitz  # PyMuPDF
+from pdf2image import convert_from_path
+import pytesseract
+
+from cache import ExtractionCache
+from page_model import PageModel
+
+# A text layer with fewer non-space characters than this is treated as missing
+MIN_TEXT_CHARS = 40
+# Below this share of letters, digits and punctuation the text layer is garbage
+# (e.g. a scanned page with a broken font mapping)
+MIN_READABLE_RATIO = 0.7
+
+# A page with little text is only a scan if images cover at least this share of it;
+# otherwise it is blank or diagram-only and OCR would find nothing worth the render
+MIN_IMAGE_COVERAGE = 0.5
+
+READABLE_CHARS = set(string.ascii_letters + string.digits + string.punctuation)
+
+class OcrOptions(NamedTuple):
+    dpi: int = 300
+    lang: str = "eng"
+    cache_dir: Optional[str] = None
+
+def ocr_variant(options: Optional[OcrOptions]) -> str:
+    """The OCR settings that change extracted pages, e.g. "ocr300-eng"; "noocr" when OCR is off"""
+    if options is None:
+        return "noocr"
+    return f"ocr{options.dpi}-{options.lang}"
+
+def image_coverage(page: PageModel) -> float:
+    """Share of the page area covered by drawn images, capped at 1 where they overlap."""
+    page_rect = page.page.rect
+    if page_rect.is_empty:
+        return 0.0
+    covered = sum(
+        abs(rect & page_rect)
+        for rects in page.image_rects.values()
+        for rect in rects
+    )
+    return min(covered / abs(page_rect), 1.0)
+
+def needs_ocr(page: PageModel) -> bool:
+    """Decide whether a page is a scan whose text layer is empty or unreadable."""
+    text = "".join(block[4] for block in page.blocks if block[6] == 0)
+    chars = [char for char in text if not char.isspace()]
+    if len(chars) < MIN_TEXT_CHARS:
+        return image_coverage(page) >= MIN_IMAGE_COVERAGE
+    readable = sum(1 for char in chars if char in READABLE_CHARS or char.isalnum())
+    return readable / len(chars) < MIN_READABLE_RATIO
+
+def page_hash(pdf: fitz.Document, page: PageModel) -> str:
+    """Hash what is drawn on a page: its content stream plus the raw bytes of its images."""
+    digest = hashlib.sha256(page.page.read_contents())
+    for xref in page.image_xrefs:
+        digest.update(pdf.xref_stream_raw(xref) or b"")
+    return digest.hexdigest()
+
+def ocr_blocks(pdf_path: str, page_index: int, dpi: int, lang: str) -> List[Tuple]:
+    """
+    Render one page and OCR it into fitz-style blocks:
+    (x0, y0, x1, y1, text, block_no, block_type), in PDF points.
+    """
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_index + 1, last_page=page_index + 1)
+    data = pytesseract.image_to_data(images[0], lang=lang, output_type=pytesseract.Output.DICT)
+    scale = 72.0 / dpi
+
+    # Tesseract reports words; group them into blocks and lines to keep reading order
+    blocks = {}
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word or float(data["conf"][i]) < 0:
+            continue
+        key = data["block_num"][i]
+        x0, y0 = data["left"][i], data["top"][i]
+        x1, y1 = x0 + data["width"][i], y0 + data["height"][i]
+        block = blocks.setdefault(key, {"bbox": [x0, y0, x1, y1], "lines": {}})
+        block["bbox"] = [min(block["bbox"][0], x0), min(block["bbox"][1], y0),
+                         max(block["bbox"][2], x1), max(block["bbox"][3], y1)]
+        line_key = (data["par_num"][i], data["line_num"][i])
+        block["lines"].setdefault(line_key, []).append(word)
+
+    result = []
+    for block_no, key in enumerate(sorted(blocks, key=lambda k: (blocks[k]["bbox"][1], blocks[k]["bbox"][0]))):
+        block = blocks[key]
+        text = "\n".join(" ".join(words) for _, words in sorted(block["lines"].items()))
+        x0, y0, x1, y1 = (value * scale for value in block["bbox"])
+        result.append((x0, y0, x1, y1, text, block_no, 0))
+    return result
+
+def ocr_page(pdf: fitz.Document, page: PageModel, pdf_path: str, options: OcrOptions,
+             cache: Optional[ExtractionCache] = None) -> List[Tuple]:
+    """
+    OCR a page, reusing cached results for identical page content, DPI and language.
+    Lookups are counted on cache when given (so pool workers can report them),
+    otherwise on a cache opened on options.cache_dir.
+    """
+    if cache is None and options.cache_dir:
+        cache = ExtractionCache(options.cache_dir, "")
+    key = f"{page_hash(pdf, page)}-{options.dpi}-{options.lang}"
+
+    if cache:
+        cached = cache.get_ocr(key)
+        if cached is not None:
+            return cached
+
+    print(f"Running OCR on page {page.number + 1} of {pdf_path} at {options.dpi} DPI")
+    blocks = ocr_blocks(pdf_path, page.number, options.dpi, options.lang)
+    if cache:
+        cache.put_ocr(key, blocks)
+    return blocks
@@ -0,0 +1,93 @@
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+class PageModel:
+    """
+    Everything the pipeline reads from one page, decoded at most once.
+
+    Plain text and text blocks come from a single TextPage, and image
+    placements from a single pass over the content stream, so answer-key
+    detection, question segmentation, OCR checks and image association all
+    share the same decoded page. Each part is extracted on first access.
+    """
+
+    def __init__(self, pdf: fitz.Document, index: int):
+        self.pdf = pdf
+        # 0-based, like fitz.Page.number
+        self.number = index
+        self._page: Optional[fitz.Page] = None
+        self._text: Optional[str] = None
+        self._blocks: Optional[List[Tuple]] = None
+        self._image_xrefs: Optional[List[int]] = None
+        self._image_rects: Optional[Dict[int, List[fitz.Rect]]] = None
+
+    @property
+    def page(self) -> fitz.Page:
+        if self._page is None:
+            self._page = self.pdf.load_page(self.number)
+        return self._page
+
+    def _load_text(self) -> None:
+        # "text" and "blocks" use the same default flags, so one TextPage serves both.
+        # It is dropped straight away; the strings are all we keep.
+        textpage = self.page.get_textpage(flags=fitz.TEXTFLAGS_BLOCKS)
+        self._text = self.page.get_text("text", textpage=textpage)
+        self._blocks = self.page.get_text("blocks", textpage=textpage)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._load_text()
+        return self._text
+
+    @property
+    def blocks(self) -> List[Tuple]:
+        if self._blocks is None:
+            self._load_text()
+        return self._blocks
+
+    @property
+    def image_xrefs(self) -> List[int]:
+        """Xrefs of the images referenced by the page, in resource order, without duplicates."""
+        if self._image_xrefs is None:
+            self._image_xrefs = list(dict.fromkeys(img[0] for img in self.page.get_images(full=True)))
+        return self._image_xrefs
+
+    @property
+    def image_rects(self) -> Dict[int, List[fitz.Rect]]:
+        """Where each image xref is drawn on the page; unused resources are absent."""
+        if self._image_rects is None:
+            rects: Dict[int, List[fitz.Rect]] = {}
+            # One content stream pass for every image, instead of one per xref
+            for info in self.page.get_image_info(xrefs=True):
+                if info["xref"]:  # 0 for inline images, which have no xref to extract
+                    rects.setdefault(info["xref"], []).append(fitz.Rect(info["bbox"]))
+            self._image_rects = rects
+        return self._image_rects
+
+class DocumentModel:
+    """Lazily built, memoized PageModels for one open document."""
+
+    def __init__(self, pdf: fitz.Document):
+        self.pdf = pdf
+        self._pages: Dict[int, PageModel] = {}
+
+    @property
+    def page_count(self) -> int:
+        return self.pdf.page_count
+
+    def page(self, index: int) -> PageModel:
+        model = self._pages.get(index)
+        if model is None:
+            model = PageModel(self.pdf, index)
+            self._pages[index] = model
+        return model
+
+    def release(self, index: int) -> None:
+        """Forget a page once it has been fully processed."""
+        self._pages.pop(index, None)
+
+    def __iter__(self):
+        for index in range(self.page_count):
+            yield self.page(index)
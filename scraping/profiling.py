@@ -0,0 +1,90 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# (stage, source, page, wall seconds, cpu seconds)
+Record = Tuple[str, Optional[str], Optional[int], float, float]
+
+class Profiler:
+    """
+    Opt-in per-stage timing for the scraping pipeline.
+
+    stage() records wall-clock (perf_counter) and CPU (process_time) time for a
+    named stage, attributed to the page currently being processed. A disabled
+    profiler's stage() does nothing beyond a flag check, so instrumentation can
+    stay in the hot path. Records from pool workers are returned with each page
+    result and merged into the parent's profiler.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.records: List[Record] = []
+        self.source: Optional[str] = None
+        self.page: Optional[int] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.records.append((
+                name,
+                self.source,
+                self.page,
+                time.perf_counter() - wall_start,
+                time.process_time() - cpu_start,
+            ))
+
+    def set_page(self, source: Optional[str], page: Optional[int]) -> None:
+        self.source = source
+        self.page = page
+
+    def merge(self, records: List[Record]) -> None:
+        if self.enabled:
+            self.records.extend(tuple(record) for record in records)
+
+    def stage_totals(self) -> Dict[str, Dict[str, float]]:
+        totals: Dict[str, Dict[str, float]] = {}
+        for name, _, _, wall, cpu in self.records:
+            entry = totals.setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0, "max_wall": 0.0})
+            entry["calls"] += 1
+            entry["wall"] += wall
+            entry["cpu"] += cpu
+            entry["max_wall"] = max(entry["max_wall"], wall)
+        return totals
+
+    def page_totals(self) -> List[Dict]:
+        pages: Dict[Tuple, Dict] = {}
+        for name, source, page, wall, cpu in self.records:
+            if page is None:
+                continue
+            entry = pages.setdefault((source, page), {"source": source, "page": page, "stages": {}})
+            stage = entry["stages"].setdefault(name, {"wall": 0.0, "cpu": 0.0})
+            stage["wall"] += wall
+            stage["cpu"] += cpu
+        return [pages[key] for key in sorted(pages, key=lambda key: (key[0] or "", key[1]))]
+
+    def summary_table(self) -> str:
+        totals = self.stage_totals()
+        total_wall = sum(entry["wall"] for entry in totals.values()) or 1.0
+        lines = [f"{'stage':<20} {'calls':>8} {'wall s':>10} {'cpu s':>10} {'mean ms':>10} {'max ms':>10} {'wall %':>7}"]
+        for name, entry in sorted(totals.items(), key=lambda item: item[1]["wall"], reverse=True):
+            lines.append(
+                f"{name:<20} {entry['calls']:>8} {entry['wall']:>10.3f} {entry['cpu']:>10.3f} "
+                f"{entry['wall'] / entry['calls'] * 1000:>10.2f} {entry['max_wall'] * 1000:>10.2f} "
+                f"{entry['wall'] / total_wall * 100:>6.1f}%"
+            )
+        return "\n".join(lines)
+
+    def write_report(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.stage_totals(), "pages": self.page_totals()}, f, indent=2)
+
+# Shared disabled profiler for callers that don't profile
+NULL_PROFILER = Profiler(enabled=False)
@@ -1,20 +1,31 @@
 import fitz  # PyMuPDF
-from pdf2image import convert_from_path
-import pytesseract
 import re
 import json
 import os
-import unicodedata
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from cache import ExtractionCache
+from images import ImageStore, extract_page_images, image_variant
+from layout import associate_images_with_questions
+from normalize import clean_math_text, clean_text
+from classifier import LOW_CONFIDENCE, SubjectClassifier
+from ocr import OcrOptions, needs_ocr, ocr_page, ocr_variant
+from jsonl_output import ExtractionWriter
+from profiling import NULL_PROFILER, Profiler
+from page_model import DocumentModel, PageModel
 
 # Configure paths
 # Path to your input PDF
 PDF_PATH = "JEE Main 2024 (27 Jan Shift 1) Previous Year Paper with Answer Keys - MathonGo.pdf"
 OUTPUT_DIR = "output"      # Directory to save extracted images and JSON
+IMAGE_DIR = "images"       # Content-addressed image store, relative to the output directory
+CACHE_DIR = ".extraction_cache"  # Per-page extraction results, keyed on PDF content hash
 
-# Create output directory if not exists
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Bump whenever parsing or extraction rules change so cached pages are re-extracted
+EXTRACTOR_VERSION = "11"
 
 # Constants for question classification
 SUBJECTS = {
@@ -23,82 +34,6 @@ SUBJECTS = {
     'mathematics': ['matrix', 'vector', 'function', 'equation', 'integral', 'derivative', 'probability', 'statistics', 'geometry', 'algebra', 'trigonometry', 'progression']
 }
 
-def clean_math_text(text: str) -> str:
-    """Clean and format mathematical expressions."""
-    # Common mathematical symbols and their replacements
-    math_replacements = {
-        '×': '\\times',  # Convert to LaTeX
-        '÷': '\\div',
-        '±': '\\pm',
-        '∓': '\\mp',
-        '⋅': '\\cdot',
-        '≠': '\\neq',
-        '≥': '\\geq',
-        '≤': '\\leq',
-        '≈': '\\approx',
-        '∝': '\\propto',
-        '→': '\\rightarrow',
-        '←': '\\leftarrow',
-        '↑': '\\uparrow',
-        '↓': '\\downarrow',
-        '⇒': '\\implies',
-        '⇔': '\\iff',
-        '∞': '\\infty',
-        '√': '\\sqrt',
-        '∴': '\\therefore',
-        '∵': '\\because',
-        '∎': '\\blacksquare',
-        'α': '\\alpha',
-        'β': '\\beta',
-        'γ': '\\gamma',
-        'δ': '\\delta',
-        'θ': '\\theta',
-        'λ': '\\lambda',
-        'μ': '\\mu',
-        'π': '\\pi',
-        'σ': '\\sigma',
-        'τ': '\\tau',
-        'φ': '\\phi',
-        'ω': '\\omega',
-        '°': '^{\\circ}',
-        '′': '\'',
-        '″': '\"',
-    }
-    
-    for old, new in math_replacements.items():
-        text = text.replace(old, new)
-    
-    # Handle superscripts and subscripts
-    text = re.sub(r'(\d+)\s*\^\s*(\d+)', r'$\1^{\2}$', text)  # Format exponents
-    text = re.sub(r'_\s*(\d+)', r'$_{\1}$', text)  # Format subscripts
-    
-    # Handle fractions
-    text = re.sub(r'(\d+)\s*/\s*(\d+)', r'$\\frac{\1}{\2}$', text)
-    
-    # Handle scientific notation
-    text = re.sub(r'(\d+)\s*[×xX]\s*10\s*\^\s*([+-]?\d+)', r'$\1\\times10^{\2}$', text)
-    
-    return text
-
-def clean_text(text: str) -> str:
-    """Clean and normalize text while preserving mathematical expressions."""
-    # Replace non-breaking spaces and other whitespace variants
-    text = re.sub(r'[\xa0\u200b\u2028\u2029\ufeff]', ' ', text)
-    
-    # Normalize unicode characters
-    text = unicodedata.normalize('NFKC', text)
-    
-    # Clean mathematical expressions
-    text = clean_math_text(text)
-    
-    # Replace multiple spaces with single space
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Remove any remaining control characters
-    text = ''.join(char for char in text if unicodedata.category(char)[0] != 'C')
-    
-    return text.strip()
-
 def extract_question_number(text: str) -> Optional[Tuple[int, str]]:
     """Extract question number and remaining text."""
     # Match different question number formats
@@ -228,28 +163,6 @@ def extract_answer_and_explanation(text: str) -> Tuple[Optional[str], Optional[s
     
     return answer, explanation
 
-"""
-def associate_images_with_questions(questions: List[Dict], images: List[Dict]) -> None:
-    ""Associate images with questions based on page number and position.""
-    for image in images:
-        page = image["page"]
-        bbox = image["bbox"]
-        
-        # Find questions on the same page
-        page_questions = [q for q in questions if q.get("page") == page]
-        
-        if page_questions:
-            # Find closest question based on vertical position
-            closest_question = min(page_questions, 
-                                 key=lambda q: abs(q.get("bbox", {}).get("y0", 0) - bbox["y0"]))
-            
-            # Only associate if image is within reasonable distance
-            if abs(closest_question["bbox"]["y0"] - bbox["y0"]) < 200:  # Adjust threshold as needed
-                if "images" not in closest_question:
-                    closest_question["images"] = []
-                closest_question["images"].append(image["path"])
-"""
-
 def extract_math_expressions(text: str) -> Tuple[str, List[Dict[str, Any]]]:
     """Extract mathematical expressions from text and replace with placeholders."""
     math_expressions = []
@@ -271,22 +184,14 @@ def extract_math_expressions(text: str) -> Tuple[str, List[Dict[str, Any]]]:
     
     return text, math_expressions
 
-def determine_subject(text: str) -> str:
-    """Determine the subject based on keywords in the question text."""
-    text = text.lower()
-    scores = {subject: 0 for subject in SUBJECTS.keys()}
-    
-    for subject, keywords in SUBJECTS.items():
-        for keyword in keywords:
-            if keyword in text:
-                scores[subject] += 1
-    
-    # Return the subject with highest score, default to physics if no clear match
-    max_score = max(scores.values())
-    if max_score == 0:
-        return 'physics'
-    
-    return max(scores.items(), key=lambda x: x[1])[0]
+SUBJECT_CLASSIFIER = SubjectClassifier(SUBJECTS)
+
+def classify_questions(questions: List[Dict]) -> None:
+    """Assign subjects to a batch of parsed questions with the classifier's confidence; None when no keyword hits."""
+    results = SUBJECT_CLASSIFIER.classify_batch([question["text"] for question in questions])
+    for question, (subject, confidence) in zip(questions, results):
+        question["subject"] = subject
+        question["subject_confidence"] = round(confidence, 3)
 
 def determine_question_type(text: str, options: List[Dict]) -> str:
     """Determine if the question is MCQ or numerical."""
@@ -311,7 +216,14 @@ def extract_exam_info(pdf_path: str) -> Tuple[int, str]:
     # Default values if not found
     return datetime.now().year, "JEE Main"
 
-def parse_question(text: str, page_num: int, bbox: Dict) -> Optional[Dict]:
+def apply_exam_info(questions: List[Dict], pdf_path: str) -> None:
+    """Stamp the exam info derived from the file name onto questions, e.g. ones read from the cache."""
+    exam_year, exam_name = extract_exam_info(pdf_path)
+    for question in questions:
+        question["exam_year"] = exam_year
+        question["exam_name"] = exam_name
+
+def parse_question(text: str, page_num: int, bbox: Dict, pdf_path: str = PDF_PATH) -> Optional[Dict]:
     """Parse a question text into structured format."""
     # Extract question number
     question_match = extract_question_number(text)
@@ -336,12 +248,11 @@ def parse_question(text: str, page_num: int, bbox: Dict) -> Optional[Dict]:
     # Extract math expressions
     question_text, math_expressions = extract_math_expressions(question_text)
     
-    # Determine subject and question type
-    subject = determine_subject(question_text)
+    # Subjects are assigned per page in one batch by classify_questions()
     question_type = determine_question_type(question_text, options)
     
     # Get exam information
-    exam_year, exam_name = extract_exam_info(PDF_PATH)
+    exam_year, exam_name = extract_exam_info(pdf_path)
     
     # Extract explanation if present
     _, explanation = extract_answer_and_explanation(remaining_text)
@@ -350,7 +261,8 @@ def parse_question(text: str, page_num: int, bbox: Dict) -> Optional[Dict]:
     question_data = {
         "number": question_num,
         "text": question_text,
-        "subject": subject,
+        "subject": None,
+        "subject_confidence": None,
         "exam_year": exam_year,
         "exam_name": exam_name,
         "question_type": question_type,
@@ -361,8 +273,8 @@ def parse_question(text: str, page_num: int, bbox: Dict) -> Optional[Dict]:
         "options": options,
         "statements": statements,
         "math_expressions": math_expressions,
-        # Internal use only, not for database
-        "_bbox": bbox  # Prefix with _ to indicate internal use
+        # Position on the page, imported into bounding_boxes
+        "bbox": bbox
     }
     
     return question_data
@@ -375,10 +287,14 @@ def extract_answer_key(text: str) -> Optional[str]:
         return answer_match.group(1)
     return None
 
-def extract_questions_from_page(page: fitz.Page) -> List[Dict]:
+def extract_questions_from_page(page: fitz.Page, pdf_path: str = PDF_PATH) -> List[Dict]:
     """Extract questions from a single page."""
+    return extract_questions_from_blocks(page.get_text("blocks"), page.number + 1, pdf_path)
+
+def extract_questions_from_blocks(blocks: List[Tuple], page_num: int, pdf_path: str = PDF_PATH,
+                                  profiler: Profiler = NULL_PROFILER) -> List[Dict]:
+    """Segment a page's text blocks (from the text layer or OCR) into questions."""
     questions = []
-    blocks = page.get_text("blocks")
     current_question = None
     current_text = []
     
@@ -396,7 +312,8 @@ def extract_questions_from_page(page: fitz.Page) -> List[Dict]:
             # Save previous question if exists
             if current_question and current_text:
                 full_text = ' '.join(current_text)
-                question = parse_question(full_text, page.number + 1, current_question["bbox"])
+                with profiler.stage("parse_question"):
+                    question = parse_question(full_text, page_num, current_question["bbox"], pdf_path)
                 if question:
                     questions.append(question)
             
@@ -417,118 +334,463 @@ def extract_questions_from_page(page: fitz.Page) -> List[Dict]:
     # Save last question
     if current_question and current_text:
         full_text = ' '.join(current_text)
-        question = parse_question(full_text, page.number + 1, current_question["bbox"])
+        with profiler.stage("parse_question"):
+            question = parse_question(full_text, page_num, current_question["bbox"], pdf_path)
         if question:
             questions.append(question)
+
+    with profiler.stage("classify"):
+        classify_questions(questions)
     
     return questions
 
-def extract_answer_keys(pdf: fitz.Document) -> Dict[int, str]:
-    """Extract answer keys from the end of the PDF."""
+def find_answer_keys(text: str) -> Optional[Dict[int, str]]:
+    """Parse the answer keys on a page, or return None if it has no answer key section."""
+    # Look for answer key section
+    if not re.search(r'Answer\s*Keys?', text, re.IGNORECASE):
+        return None
+
     answer_keys = {}
-    
-    # Start from the last page and work backwards
-    for page_num in range(pdf.page_count - 1, -1, -1):
-        page = pdf[page_num]
-        text = page.get_text()
-        
-        # Look for answer key section
-        if re.search(r'Answer\s*Keys?', text, re.IGNORECASE):
-            # Extract all answer patterns
-            # Match patterns like "1. (2)" or "1.(2)" or "1) (2)" or just "1) 2"
-            answers = re.finditer(
-                r'(\d+)[\.\)]\s*[\(\[]?(\d+|[\d\.]+)[\)\]]?',
-                text
-            )
-            
-            for match in answers:
-                question_num = int(match.group(1))
-                answer = match.group(2)
-                # Clean up the answer (remove parentheses if present)
-                answer = re.sub(r'[\(\)\[\]]', '', answer)
-                answer_keys[question_num] = answer
-            
-            # Once we find the answer key section, we can stop
-            break
+    # Extract all answer patterns
+    # Match patterns like "1. (2)" or "1.(2)" or "1) (2)" or just "1) 2"
+    answers = re.finditer(
+        r'(\d+)[\.\)]\s*[\(\[]?(\d+|[\d\.]+)[\)\]]?',
+        text
+    )
+    
+    for match in answers:
+        question_num = int(match.group(1))
+        answer = match.group(2)
+        # Clean up the answer (remove parentheses if present)
+        answer = re.sub(r'[\(\)\[\]]', '', answer)
+        answer_keys[question_num] = answer
     
     return answer_keys
 
-def extract_data_from_pdf(pdf_path: str, output_dir: str) -> Dict[str, Any]:
-    """Extract and structure all data from the PDF."""
-    questions = []
-    images = []
+def extract_answer_keys(document: DocumentModel) -> Dict[int, str]:
+    """Extract answer keys from the end of the PDF."""
+    # Start from the last page and work backwards. The pages read here stay
+    # decoded in the document model for question extraction.
+    for page_num in range(document.page_count - 1, -1, -1):
+        answer_keys = find_answer_keys(document.page(page_num).text)
+        # Once we find the answer key section, we can stop
+        if answer_keys is not None:
+            return answer_keys
+    
+    return {}
+
+def resolve_answer_keys(page_answer_keys: Dict[int, Optional[Dict[int, str]]],
+                        page_count: int) -> Optional[Dict[int, str]]:
+    """
+    Pick the answer keys from per-page scans the way extract_answer_keys would:
+    the last page with an answer key section wins. Returns None while a page that
+    could still decide the outcome has not been scanned.
+    """
+    for page_num in range(page_count - 1, -1, -1):
+        if page_num not in page_answer_keys:
+            return None
+        if page_answer_keys[page_num] is not None:
+            return page_answer_keys[page_num]
+    return {}
+
+def apply_answer_keys(questions: List[Dict], answer_keys: Dict[int, str]) -> None:
+    """Fill in answer keys found at the end of the paper."""
+    for question in questions:
+        question_num = question["number"]
+        if question_num in answer_keys:
+            question["answer_key"] = answer_keys[question_num]
+
+def extract_page(pdf: fitz.Document, page: PageModel, pdf_path: str, image_store: ImageStore,
+                 xref_cache: Optional[Dict[int, Tuple[str, str]]] = None,
+                 ocr: Optional[OcrOptions] = None,
+                 profiler: Profiler = NULL_PROFILER,
+                 ocr_cache: Optional[ExtractionCache] = None) -> Tuple[List[Dict], List[Dict]]:
+    """Extract questions and images from a single page, linking each image to its question."""
+    with profiler.stage("get_text_blocks"):
+        blocks = page.blocks
+    # Scanned pages have no usable text layer; recover blocks with OCR instead
+    if ocr is not None and needs_ocr(page):
+        with profiler.stage("ocr"):
+            blocks = ocr_page(pdf, page, pdf_path, ocr, ocr_cache)
+    questions = extract_questions_from_blocks(blocks, page.number + 1, pdf_path, profiler)
+    with profiler.stage("images"):
+        images = extract_page_images(pdf, page, image_store, xref_cache)
+    with profiler.stage("layout"):
+        associate_images_with_questions(questions, images, page.page.rect.width)
+    return questions, images
+
+def extract_data_from_pdf(pdf_path: str, output_dir: str, webp: bool = False,
+                          max_image_size: Optional[int] = None, ocr: Optional[OcrOptions] = None,
+                          profiler: Profiler = NULL_PROFILER,
+                          thumbnail_size: Optional[int] = None) -> Dict[str, Any]:
+    """Extract all data from the PDF, streaming each page's records as it finishes."""
+    image_store = ImageStore(os.path.join(output_dir, IMAGE_DIR), webp, max_image_size, thumbnail_size)
+    xref_cache = {}
     
     with fitz.open(pdf_path) as pdf:
+        document = DocumentModel(pdf)
+        writer = ExtractionWriter(output_dir, pdf_path, pdf.page_count)
+
         # First extract answer keys
-        answer_keys = extract_answer_keys(pdf)
+        profiler.set_page(pdf_path, None)
+        with profiler.stage("answer_keys"):
+            answer_keys = extract_answer_keys(document)
         
         # Extract questions and images from each page
-        for page in pdf:
-            # Extract questions
-            page_questions = extract_questions_from_page(page)
-            
-            # Associate answer keys with questions
-            for question in page_questions:
-                question_num = question["number"]
-                if question_num in answer_keys:
-                    question["answer_key"] = answer_keys[question_num]
-                    
-            
-            questions.extend(page_questions)
-            
-            # Extract images
-            for img_index, img in enumerate(page.get_images(full=True)):
-                xref = img[0]
-                base_image = pdf.extract_image(xref)
-                image_bytes = base_image["image"]
-                image_ext = base_image["ext"]
-                
-                # Save image
-                image_filename = f"page{page.number + 1}_img{img_index + 1}.{image_ext}"
-                image_path = os.path.join(output_dir, image_filename)
-                
-                with open(image_path, "wb") as img_file:
-                    img_file.write(image_bytes)
-                
-                # Get image location
-                image_list = page.get_images()
-                rect = page.get_image_rects(image_list[img_index])
-                if rect:
-                    bbox = rect[0]
-                    images.append({
-                        "page": page.number + 1,
-                        "path": image_path,
-                        "_bbox": {  # Prefix with _ to indicate internal use
-                            "x0": bbox.x0,
-                            "y0": bbox.y0,
-                            "x1": bbox.x1,
-                            "y1": bbox.y1
-                        }
-                    })
-    
-    
-    # Remove internal fields before saving
-    for question in questions:
-        if '_bbox' in question:
-            del question['_bbox']
-    
-    for image in images:
-        if '_bbox' in image:
-            del image['_bbox']
-    
-    # Structure the data
-    extracted_data = {
-        "questions": questions,
-        "images": images
-    }
-    
-    # Save as JSON
-    output_json_path = os.path.join(output_dir, "extracted_data.json")
-    with open(output_json_path, "w", encoding='utf-8') as json_file:
-        json.dump(extracted_data, json_file, indent=2, ensure_ascii=False)
-    
-    return extracted_data
+        for page in document:
+            profiler.set_page(pdf_path, page.number + 1)
+            page_questions, page_images = extract_page(pdf, page, pdf_path, image_store, xref_cache, ocr, profiler)
+            document.release(page.number)
+            apply_answer_keys(page_questions, answer_keys)
+            # Images must be on disk before records referencing them are visible
+            with profiler.stage("image_writes"):
+                image_store.flush()
+            with profiler.stage("write_output"):
+                writer.write_page(page_questions, page_images)
+
+    image_store.close()
+    return writer.close()
+
+# Documents kept open per worker process, so consecutive pages of the same
+# PDF don't pay for re-parsing the file
+_worker_documents: Dict[str, DocumentModel] = {}
+_worker_xref_caches: Dict[str, Dict[int, Tuple[str, str]]] = {}
+_worker_image_stores: Dict[Tuple, ImageStore] = {}
+MAX_OPEN_DOCUMENTS = 4
+
+def _open_worker_document(pdf_path: str) -> DocumentModel:
+    document = _worker_documents.get(pdf_path)
+    if document is None:
+        if len(_worker_documents) >= MAX_OPEN_DOCUMENTS:
+            oldest_path = next(iter(_worker_documents))
+            _worker_documents.pop(oldest_path).pdf.close()
+            _worker_xref_caches.pop(oldest_path, None)
+        document = DocumentModel(fitz.open(pdf_path))
+        _worker_documents[pdf_path] = document
+        _worker_xref_caches[pdf_path] = {}
+    return document
+
+def _worker_image_store(image_options: Tuple[str, bool, Optional[int], Optional[int]]) -> ImageStore:
+    store = _worker_image_stores.get(image_options)
+    if store is None:
+        store = ImageStore(*image_options)
+        _worker_image_stores[image_options] = store
+    return store
+
+def _page_task(pdf_path: str, page_index: int, image_options: Tuple[str, bool, Optional[int], Optional[int]],
+               ocr: Optional[OcrOptions] = None,
+               profile: bool = False) -> Tuple[Tuple[List[Dict], List[Dict]], Optional[Dict[int, str]],
+                                               Tuple[int, int], List]:
+    """
+    Process pool entry point: extract one page of one document (OCR-ing it if scanned).
+    Returns the page result, the answer keys found on the page (None if it has no
+    answer key section), the OCR cache (hits, misses) and, when profiling, the
+    stage timings recorded for it.
+    The answer key scan reads the page already decoded here, so no page is decoded
+    twice for it.
+    """
+    profiler = Profiler(enabled=profile)
+    profiler.set_page(pdf_path, page_index + 1)
+    with profiler.stage("open_document"):
+        document = _open_worker_document(pdf_path)
+    image_store = _worker_image_store(image_options)
+    ocr_cache = ExtractionCache(ocr.cache_dir, "") if ocr is not None and ocr.cache_dir else None
+    page = document.page(page_index)
+    with profiler.stage("answer_keys"):
+        answer_keys = find_answer_keys(page.text)
+    result = extract_page(document.pdf, page, pdf_path, image_store,
+                          _worker_xref_caches[pdf_path], ocr, profiler, ocr_cache)
+    document.release(page_index)
+    # Pool workers exit without running atexit hooks, so writes must land before returning
+    with profiler.stage("image_writes"):
+        image_store.flush()
+    ocr_lookups = (ocr_cache.hits, ocr_cache.misses) if ocr_cache else (0, 0)
+    return result, answer_keys, ocr_lookups, profiler.records
+
+def _answer_key_task(pdf_path: str, profile: bool = False) -> Tuple[Dict[int, str], List]:
+    """
+    Process pool entry point: extract the answer keys of one document. Only needed
+    when some of its pages come from the cache and so are never scanned by a page task.
+    """
+    profiler = Profiler(enabled=profile)
+    profiler.set_page(pdf_path, None)
+    with profiler.stage("answer_keys"):
+        document = _open_worker_document(pdf_path)
+        answer_keys = extract_answer_keys(document)
+        # No page task will reuse these pages, so don't keep them decoded
+        for page_index in range(document.page_count):
+            document.release(page_index)
+    return answer_keys, profiler.records
+
+def resolve_pdf_paths(inputs: List[str]) -> List[str]:
+    """Expand files, directories and glob patterns into a sorted, de-duplicated list of PDFs."""
+    pdf_paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True)
+        elif glob.has_magic(item):
+            matches = glob.glob(item, recursive=True)
+        else:
+            matches = [item]
+        pdf_paths.extend(sorted(matches))
+
+    seen = set()
+    return [path for path in pdf_paths if not (path in seen or seen.add(path))]
+
+def document_output_dir(pdf_path: str, output_dir: str, input_root: Optional[str]) -> str:
+    """
+    Each document gets its own directory when a batch holds several PDFs. The
+    directory mirrors the PDF's path below input_root (the inputs' common parent),
+    so papers sharing a file name in different folders don't overwrite each other.
+    """
+    if input_root is None:
+        return output_dir
+    relative = os.path.relpath(os.path.abspath(pdf_path), input_root)
+    return os.path.join(output_dir, os.path.splitext(relative)[0])
+
+def extract_data_from_pdfs(pdf_paths: List[str], output_dir: str, workers: Optional[int] = None,
+                           cache: Optional[ExtractionCache] = None, webp: bool = False,
+                           max_image_size: Optional[int] = None,
+                           ocr: Optional[OcrOptions] = None,
+                           profiler: Profiler = NULL_PROFILER,
+                           thumbnail_size: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Extract many PDFs at once, fanning page-level work out across a process pool.
+    Each document's pages are streamed to its JSONL output in page order as soon as
+    they (and the answer keys) are ready, so one slow paper never holds back the
+    others and finished pages are never held in memory.
+    With a cache, pages (and answer keys) already extracted from identical PDF bytes
+    by the same extractor version are reused instead of being submitted to the pool.
+    Images from every document go to one content-addressed store under output_dir,
+    so pages and papers sharing a logo or diagram store it once. With ocr set, pages
+    without a usable text layer are rendered and OCR'd inside the same pool. An
+    enabled profiler collects per-stage timings from the workers and the parent.
+    Returns a summary per PDF path.
+    """
+    input_root = None
+    if len(pdf_paths) > 1:
+        input_root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in pdf_paths])
+    documents = {}
+    image_options = (os.path.join(output_dir, IMAGE_DIR), webp, max_image_size, thumbnail_size)
+
+    for pdf_path in pdf_paths:
+        try:
+            with fitz.open(pdf_path) as pdf:
+                page_count = pdf.page_count
+        except Exception as e:
+            print(f"Skipping {pdf_path}: {str(e)}")
+            continue
+        doc_output_dir = document_output_dir(pdf_path, output_dir, input_root)
+        documents[pdf_path] = {
+            "output_dir": doc_output_dir,
+            "page_count": page_count,
+            "pdf_hash": ExtractionCache.hash_file(pdf_path) if cache else None,
+            "writer": ExtractionWriter(doc_output_dir, pdf_path, page_count),
+            # Finished pages waiting for earlier pages (or the answer keys)
+            "pages": {},
+            "next_page": 0,
+            "answer_keys": None,
+            # Answer keys found by each page task, while they are resolved from page scans
+            "page_answer_keys": None,
+            "page_errors": False,
+            "image_hashes": set(),
+            "low_confidence": 0
+        }
+
+    summary = {}
+    # Totals of the OCR cache lookups made by the pool workers
+    ocr_cache = ExtractionCache(ocr.cache_dir, "") if ocr is not None and ocr.cache_dir else None
+
+    def flush_ready_pages(pdf_path: str) -> None:
+        """Write the contiguous run of finished pages, and close the document when all are out."""
+        document = documents[pdf_path]
+        if document["answer_keys"] is None:
+            return
+
+        writer = document["writer"]
+        while document["next_page"] in document["pages"]:
+            page_questions, page_images = document["pages"].pop(document["next_page"])
+            apply_answer_keys(page_questions, document["answer_keys"])
+            profiler.set_page(pdf_path, document["next_page"] + 1)
+            with profiler.stage("write_output"):
+                writer.write_page(page_questions, page_images)
+            document["image_hashes"].update(image["hash"] for image in page_images)
+            document["low_confidence"] += sum(
+                1 for question in page_questions if question["subject_confidence"] < LOW_CONFIDENCE
+            )
+            document["next_page"] += 1
+
+        if document["next_page"] < document["page_count"]:
+            return
+
+        manifest = writer.close()
+        summary[pdf_path] = {
+            "output_dir": document["output_dir"],
+            "pages": document["page_count"],
+            "questions": manifest["questions"],
+            "images": manifest["images"],
+            "unique_images": len(document["image_hashes"]),
+            "low_confidence_subjects": document["low_confidence"],
+            "errors": manifest["errors"]
+        }
+        print(f"Finished {pdf_path}: {manifest['questions']} questions "
+              f"({document['low_confidence']} with low-confidence subjects), {manifest['images']} images "
+              f"({len(document['image_hashes'])} unique), {len(manifest['errors'])} page errors")
+        del documents[pdf_path]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for pdf_path, document in list(documents.items()):
+            pdf_hash = document["pdf_hash"]
+
+            answer_keys = None
+            cached_pages = {}
+            if cache:
+                profiler.set_page(pdf_path, None)
+                with profiler.stage("cache_lookup"):
+                    answer_keys = cache.get_answer_keys(pdf_hash)
+                for page_index in range(document["page_count"]):
+                    profiler.set_page(pdf_path, page_index + 1)
+                    with profiler.stage("cache_lookup"):
+                        cached_page = cache.get_page(pdf_hash, page_index)
+                    if cached_page is not None:
+                        # The cache is keyed on content, but the exam info comes from the file name
+                        apply_exam_info(cached_page[0], pdf_path)
+                        cached_pages[page_index] = cached_page
+            document["pages"].update(cached_pages)
+
+            if answer_keys is not None:
+                document["answer_keys"] = answer_keys
+            elif cached_pages:
+                # Cached pages are never scanned by a page task, so scan the document separately
+                futures[executor.submit(_answer_key_task, pdf_path, profiler.enabled)] = (pdf_path, None)
+            else:
+                # Page tasks scan their own text; cache the answer keys once they resolve
+                document["page_answer_keys"] = {}
+
+            # The answer key section sits at the end of a paper, so submit the last
+            # page first and the other pages' output isn't held back waiting for it
+            pending = [page_index for page_index in range(document["page_count"]) if page_index not in cached_pages]
+            for page_index in pending[-1:] + pending[:-1]:
+                future = executor.submit(_page_task, pdf_path, page_index, image_options, ocr, profiler.enabled)
+                futures[future] = (pdf_path, page_index)
+
+            # Fully cached documents never touch the pool
+            flush_ready_pages(pdf_path)
+
+        for future in as_completed(futures):
+            pdf_path, page_index = futures.pop(future)
+            document = documents[pdf_path]
+            page_keys = None
+            try:
+                if page_index is None:
+                    result, records = future.result()
+                else:
+                    result, page_keys, (ocr_hits, ocr_misses), records = future.result()
+                    if ocr_cache:
+                        ocr_cache.hits += ocr_hits
+                        ocr_cache.misses += ocr_misses
+                profiler.merge(records)
+            except Exception as e:
+                # A broken page must not sink the whole document
+                stage = "answer keys" if page_index is None else f"page {page_index + 1}"
+                print(f"Error extracting {stage} of {pdf_path}: {str(e)}")
+                document["writer"].add_error(None if page_index is None else page_index + 1, str(e))
+                result = {} if page_index is None else ([], [])
+                document["page_errors"] = True
+            else:
+                # Only successful extractions are cached, failed pages are retried next run
+                if cache and page_index is None:
+                    cache.put_answer_keys(document["pdf_hash"], result)
+                elif cache:
+                    cache.put_page(document["pdf_hash"], page_index, *result)
+
+            if page_index is None:
+                document["answer_keys"] = result
+            else:
+                document["pages"][page_index] = result
+                if document["answer_keys"] is None and document["page_answer_keys"] is not None:
+                    document["page_answer_keys"][page_index] = page_keys
+                    answer_keys = resolve_answer_keys(document["page_answer_keys"], document["page_count"])
+                    if answer_keys is not None:
+                        document["answer_keys"] = answer_keys
+                        document["page_answer_keys"] = None
+                        # A failed page may have held the answer key section
+                        if cache and not document["page_errors"]:
+                            cache.put_answer_keys(document["pdf_hash"], answer_keys)
+            flush_ready_pages(pdf_path)
+
+    if cache:
+        print(cache.stats())
+    # Only worth reporting when some page was actually sent to OCR
+    if ocr_cache and ocr_cache.hits + ocr_cache.misses:
+        print(ocr_cache.stats("OCR cache"))
+
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract questions and images from JEE paper PDFs")
+    parser.add_argument("inputs", nargs="*", default=[PDF_PATH],
+                        help="PDF files, directories or glob patterns (default: the bundled paper)")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR,
+                        help="Directory for extracted JSON and images; one subdirectory per PDF in batch mode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Worker processes for page-level extraction (default: CPU count)")
+    parser.add_argument("--webp", action="store_true",
+                        help="Convert extracted images to WebP (requires Pillow)")
+    parser.add_argument("--max-image-size", type=int, default=None,
+                        help="Downscale images so neither side exceeds this many pixels (requires Pillow)")
+    parser.add_argument("--thumbnail-size", type=int, default=None,
+                        help="Also write a thumbnail no larger than this many pixels per image (requires Pillow)")
+    parser.add_argument("--no-ocr", action="store_true",
+                        help="Disable the OCR fallback for pages without a usable text layer")
+    parser.add_argument("--ocr-dpi", type=int, default=300,
+                        help="Resolution used to render pages for OCR (default: 300)")
+    parser.add_argument("--ocr-lang", default="eng",
+                        help="Tesseract language(s) for OCR (default: eng)")
+    parser.add_argument("--profile", metavar="REPORT_JSON", default=None,
+                        help="Record wall/CPU time per stage and page, print a summary and write a JSON report")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"Extraction cache directory (default: {CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Extract every page without reading or writing the cache")
+    parser.add_argument("--invalidate-cache", action="store_true",
+                        help="Clear the extraction cache before running (use after changing parsing rules)")
+    args = parser.parse_args()
+    if args.invalidate_cache and args.no_cache:
+        parser.error("--invalidate-cache cannot be combined with --no-cache")
+
+    pdf_paths = resolve_pdf_paths(args.inputs)
+    if not pdf_paths:
+        print("No PDF files found")
+        return
+
+    ocr = None
+    if not args.no_ocr:
+        ocr = OcrOptions(args.ocr_dpi, args.ocr_lang, None if args.no_cache else args.cache_dir)
+
+    cache = None
+    if not args.no_cache:
+        # Cached pages point at stored image files, and scanned pages only have text
+        # when OCR ran, so the image and OCR options are part of the key
+        variant = image_variant(args.webp, args.max_image_size, args.thumbnail_size)
+        version = "-".join(part for part in (EXTRACTOR_VERSION, variant, ocr_variant(ocr)) if part)
+        cache = ExtractionCache(args.cache_dir, version)
+        if args.invalidate_cache:
+            cache.clear()
+            print(f"Cleared extraction cache {args.cache_dir}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    print(f"Extracting {len(pdf_paths)} PDF(s) with {args.workers} worker(s)")
+    profiler = Profiler(enabled=args.profile is not None)
+    extract_data_from_pdfs(pdf_paths, args.output_dir, args.workers, cache, args.webp, args.max_image_size,
+                           ocr, profiler, args.thumbnail_size)
+
+    if profiler.enabled:
+        print(profiler.summary_table())
+        profiler.write_report(args.profile)
+        print(f"Profile report written to {args.profile}")
 
 # Run the pipeline
 if __name__ == "__main__":
-    extract_data_from_pdf(PDF_PATH, OUTPUT_DIR)
+    main()
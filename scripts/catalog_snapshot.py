@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+from datetime import datetime
+
+# Bump when the snapshot layout changes; the API refuses snapshots it does not understand
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Rows fetched from Turso per round trip while building the snapshot
+FETCH_CHUNK_SIZE = 1000
+
+SNAPSHOT_SCHEMA = '''
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE questions (
+    id INTEGER PRIMARY KEY,
+    number INTEGER,
+    text TEXT,
+    subject TEXT,
+    exam_year INTEGER,
+    exam_name TEXT,
+    chapter TEXT,
+    question_type TEXT,
+    answer_key TEXT,
+    correct_answer TEXT,
+    explanation TEXT
+);
+
+-- Clustered on question_id so all options of a question sit on the same pages
+CREATE TABLE options (
+    question_id INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    text TEXT NOT NULL,
+    is_correct INTEGER NOT NULL,
+    PRIMARY KEY (question_id, label)
+) WITHOUT ROWID;
+
+-- Precomputed facet counts (subject, exam_year, chapter) for filter UIs
+CREATE TABLE facets (
+    facet TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (facet, value)
+) WITHOUT ROWID;
+'''
+
+SNAPSHOT_INDEXES = '''
+CREATE INDEX idx_questions_subject ON questions(subject, id);
+CREATE INDEX idx_questions_exam_year ON questions(exam_year, id);
+CREATE INDEX idx_questions_chapter ON questions(chapter, id);
+'''
+
+def iter_questions(client):
+    """Yield question rows ordered by id, fetched in keyset-paginated chunks"""
+    last_id = 0
+    while True:
+        rows = client.execute(
+            """
+            SELECT id, number, text, subject, exam_year, exam_name, chapter,
+                   question_type, answer_key, correct_answer, explanation
+            FROM questions
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, FETCH_CHUNK_SIZE)
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+def fetch_options(client, first_id, last_id):
+    return client.execute(
+        """
+        SELECT question_id, label, text, is_correct
+        FROM options
+        WHERE question_id BETWEEN ? AND ?
+        ORDER BY question_id, label
+        """,
+        (first_id, last_id)
+    ).fetchall()
+
+def build_snapshot(client, snapshot_path):
+    """
+    Write a read-only SQLite catalog snapshot of questions and options.
+    The file is built next to the target and atomically renamed into place, so
+    API workers watching snapshot_path never see a half-written catalog.
+    Returns the catalog version (a content hash of everything written).
+    """
+    tmp_path = f"{snapshot_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    digest = hashlib.sha256()
+    facet_counts = {}
+    question_count = 0
+
+    snapshot = sqlite3.connect(tmp_path)
+    try:
+        snapshot.execute("PRAGMA page_size = 4096")
+        snapshot.execute("PRAGMA journal_mode = OFF")
+        snapshot.execute("PRAGMA synchronous = OFF")
+        snapshot.executescript(SNAPSHOT_SCHEMA)
+
+        for rows in iter_questions(client):
+            questions = [tuple(row) for row in rows]
+            options = [
+                (row[0], str(row[1]), str(row[2]), 1 if row[3] else 0)
+                for row in fetch_options(client, questions[0][0], questions[-1][0])
+                if row[1] is not None and row[2] is not None
+            ]
+            snapshot.executemany(
+                "INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                questions
+            )
+            snapshot.executemany(
+                "INSERT OR IGNORE INTO options VALUES (?, ?, ?, ?)",
+                options
+            )
+
+            for question in questions:
+                for facet, value in (('subject', question[3]), ('exam_year', question[4]), ('chapter', question[6])):
+                    key = (facet, str(value))
+                    facet_counts[key] = facet_counts.get(key, 0) + 1
+
+            digest.update(json.dumps(questions, default=str).encode('utf-8'))
+            digest.update(json.dumps(options).encode('utf-8'))
+            question_count += len(questions)
+
+        snapshot.executemany(
+            "INSERT INTO facets VALUES (?, ?, ?)",
+            [(facet, value, count) for (facet, value), count in facet_counts.items()]
+        )
+        snapshot.executescript(SNAPSHOT_INDEXES)
+
+        catalog_version = digest.hexdigest()[:16]
+        snapshot.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ('format_version', str(SNAPSHOT_FORMAT_VERSION)),
+                ('catalog_version', catalog_version),
+                ('question_count', str(question_count)),
+                ('created_at', datetime.now().isoformat()),
+            ]
+        )
+        snapshot.commit()
+        # Compact the file so readers map as few pages as possible
+        snapshot.execute("VACUUM")
+    finally:
+        snapshot.close()
+
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, snapshot_path)
+
+    print(f"Wrote catalog snapshot {snapshot_path} "
+          f"(version {catalog_version}, {question_count} questions)")
+    return catalog_version
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python catalog_snapshot.py <snapshot_path>")
+        sys.exit(1)
+
+    from import_excel_to_db import connect_to_db
+
+    client = connect_to_db()
+    build_snapshot(client, sys.argv[1])
+
+if __name__ == "__main__":
+    main()
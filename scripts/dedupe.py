@@ -0,0 +1,316 @@
+import os
+import re
+import glob
+import json
+import zlib
+import sqlite3
+import argparse
+import unicodedata
+from datetime import datetime
+
+import numpy as np
+
+# MinHash signature length; BANDS x ROWS must equal it. 32 bands of 4 rows make
+# pairs above ~0.42 Jaccard candidates, which are then verified on the full signature
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# Estimated Jaccard similarity at or above which two questions are the same question
+DEFAULT_THRESHOLD = 0.8
+
+# Character shingle length over the normalized text
+SHINGLE_SIZE = 5
+
+# A prime just above 2**32, so (a * x + b) fits in 64 bits for 32-bit shingle hashes
+HASH_PRIME = np.uint64(4294967311)
+HASH_SEED = 1
+
+# Rows fetched per round trip when loading or backfilling the signature bank
+FETCH_CHUNK_SIZE = 1000
+
+SIGNATURE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS question_signatures (
+    key TEXT PRIMARY KEY,
+    question_id INTEGER,
+    num_perm INTEGER NOT NULL,
+    signature BLOB NOT NULL,
+    created_at TEXT
+)
+'''
+
+_NON_WORD_RE = re.compile(r'[^\w]+')
+
+def normalize_text(text):
+    """Fold case, compatibility characters, punctuation and whitespace so reformatted copies compare equal"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return _NON_WORD_RE.sub(' ', text).strip()
+
+def question_fingerprint_text(text, options=()):
+    """The text a question is compared on: its stem followed by its option texts"""
+    return ' | '.join([text or ''] + [option or '' for option in options])
+
+def shingle_hashes(text):
+    normalized = normalize_text(text)
+    if len(normalized) < SHINGLE_SIZE:
+        shingles = {normalized} if normalized else set()
+    else:
+        shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    # crc32 is stable across processes, unlike hash(), so persisted signatures stay comparable
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+class MinHasher:
+    """MinHash signatures over character shingles, using NUM_PERM universal hash functions"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=HASH_SEED):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        """Return the signature of text, or None if it has nothing to compare on"""
+        hashes = shingle_hashes(text)
+        if not len(hashes):
+            return None
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % HASH_PRIME
+        return permuted.min(axis=1)
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the two shingle sets"""
+    return float(np.mean(signature == other))
+
+class SignatureBank:
+    """
+    In-memory LSH index over MinHash signatures, optionally backed by the
+    question_signatures table so later imports are checked against everything
+    accepted before without recomputing it.
+
+    Each signature is split into BANDS bands; questions sharing any band bucket
+    are candidates, so a lookup touches a handful of entries instead of the
+    whole bank.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.hasher = MinHasher()
+        self.buckets = [{} for _ in range(BANDS)]
+        self.signatures = {}
+        self.question_ids = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def signature(self, text):
+        return self.hasher.signature(text)
+
+    def add(self, key, signature, question_id=None):
+        self.signatures[key] = signature
+        self.question_ids[key] = question_id
+        for band in range(BANDS):
+            bucket = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+            self.buckets[band].setdefault(bucket, []).append(key)
+
+    def find(self, signature, prefixes=None):
+        """
+        Return (key, question_id, similarity) of the closest banked duplicate, or None.
+        With prefixes, only keys starting with one of them are considered.
+        """
+        candidates = set()
+        for band in range(BANDS):
+            candidates.update(self.buckets[band].get(signature[band * ROWS:(band + 1) * ROWS].tobytes(), ()))
+        if prefixes is not None:
+            candidates = {key for key in candidates if key.startswith(tuple(prefixes))}
+
+        best = None
+        for key in candidates:
+            score = similarity(signature, self.signatures[key])
+            if score >= self.threshold and (best is None or score > best[2]):
+                best = (key, self.question_ids[key], score)
+        return best
+
+    def load(self, client):
+        """Load every persisted signature, in keyset-paginated chunks"""
+        create_tables(client)
+        last_key = ''
+        while True:
+            rows = client.execute(
+                """
+                SELECT key, question_id, signature FROM question_signatures
+                WHERE key > ? AND num_perm = ?
+                ORDER BY key
+                LIMIT ?
+                """,
+                (last_key, NUM_PERM, FETCH_CHUNK_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+            for key, question_id, blob in rows:
+                self.add(key, np.frombuffer(blob, dtype=np.uint64), question_id)
+            last_key = rows[-1][0]
+        print(f"Loaded {len(self)} question signatures")
+
+def create_tables(client):
+    client.execute(SIGNATURE_SCHEMA)
+
+def save_signature(client, key, signature, question_id=None):
+    """Persist one signature; the caller commits"""
+    client.execute(
+        """
+        INSERT OR REPLACE INTO question_signatures (key, question_id, num_perm, signature, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (key, question_id, NUM_PERM, signature.astype(np.uint64).tobytes(), datetime.now().isoformat())
+    )
+
+def question_key(question_id):
+    return f"question:{question_id}"
+
+class DuplicateReport:
+    """Clusters of near-duplicates found in one run, keyed by their canonical entry"""
+
+    def __init__(self):
+        self.clusters = {}
+
+    def add(self, canonical_key, canonical_question_id, duplicate_key, score, text=None):
+        cluster = self.clusters.setdefault(canonical_key, {
+            'canonical': {'key': canonical_key, 'question_id': canonical_question_id},
+            'duplicates': []
+        })
+        cluster['duplicates'].append({
+            'key': duplicate_key,
+            'similarity': round(score, 3),
+            'text': (text or '')[:200]
+        })
+
+    @property
+    def duplicate_count(self):
+        return sum(len(cluster['duplicates']) for cluster in self.clusters.values())
+
+    def write(self, path):
+        report = {
+            'created_at': datetime.now().isoformat(),
+            'clusters': len(self.clusters),
+            'duplicates': self.duplicate_count,
+            'items': list(self.clusters.values())
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Wrote duplicate report to {path} "
+              f"({self.duplicate_count} duplicates in {len(self.clusters)} clusters)")
+
+def backfill(client):
+    """Add signatures for questions already in the database that were imported without one"""
+    create_tables(client)
+    hasher = MinHasher()
+    added = 0
+    last_id = 0
+    while True:
+        rows = client.execute(
+            """
+            SELECT q.id, q.text FROM questions q
+            LEFT JOIN question_signatures s ON s.key = 'question:' || q.id
+            WHERE q.id > ? AND s.key IS NULL
+            ORDER BY q.id
+            LIMIT ?
+            """,
+            (last_id, FETCH_CHUNK_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        options = {}
+        for question_id, text in client.execute(
+            "SELECT question_id, text FROM options WHERE question_id BETWEEN ? AND ? ORDER BY question_id, label",
+            (rows[0][0], rows[-1][0])
+        ).fetchall():
+            options.setdefault(question_id, []).append(text)
+
+        for question_id, text in rows:
+            signature = hasher.signature(question_fingerprint_text(text, options.get(question_id, [])))
+            if signature is None:
+                continue
+            save_signature(client, question_key(question_id), signature, question_id)
+            added += 1
+        client.commit()
+        last_id = rows[-1][0]
+    print(f"Backfilled {added} question signatures")
+
+def iter_scraped_questions(paths):
+    """Yield (key, text) for every question in scraper output directories (questions.jsonl + manifest.json)"""
+    for path in paths:
+        for questions_path in sorted(glob.glob(os.path.join(path, '**', 'questions.jsonl'), recursive=True)):
+            output_dir = os.path.dirname(questions_path)
+            source = output_dir
+            manifest_path = os.path.join(output_dir, 'manifest.json')
+            if os.path.exists(manifest_path):
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    source = json.load(f).get('source', output_dir)
+            with open(questions_path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    question = json.loads(line)
+                    options = [option.get('text') for option in question.get('options', [])]
+                    # Question numbers repeat within a paper when parsing goes wrong; the line does not
+                    key = f"scraped:{os.path.basename(source)}#{question.get('number')}@{line_number}"
+                    yield key, question_fingerprint_text(question.get('text'), options)
+
+def check_scraped(client, paths, threshold, report_path, update_bank):
+    """Check scraped questions against the bank (and each other), optionally banking the new ones"""
+    bank = SignatureBank(threshold)
+    bank.load(client)
+    report = DuplicateReport()
+    new = 0
+
+    for key, text in iter_scraped_questions(paths):
+        # Already banked by an earlier run over the same output
+        if key in bank.signatures:
+            continue
+        signature = bank.signature(text)
+        if signature is None:
+            continue
+        match = bank.find(signature)
+        if match:
+            report.add(match[0], match[1], key, match[2], text)
+            continue
+        bank.add(key, signature)
+        new += 1
+        if update_bank:
+            save_signature(client, key, signature)
+
+    if update_bank:
+        client.commit()
+    print(f"{new} new questions, {report.duplicate_count} near-duplicates")
+    report.write(report_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate questions with MinHash + LSH")
+    parser.add_argument("--bank", default=None,
+                        help="SQLite file holding the signature bank (default: the Turso database)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Estimated Jaccard similarity that counts as a duplicate (default: {DEFAULT_THRESHOLD})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("backfill", help="Compute signatures for questions already in the database")
+
+    scraped = subparsers.add_parser("scraped", help="Check scraper output against the bank")
+    scraped.add_argument("outputs", nargs="+", help="Scraper output directories")
+    scraped.add_argument("--report", default="dedupe-report.json", help="Cluster report path")
+    scraped.add_argument("--update-bank", action="store_true",
+                         help="Add the scraped questions that are not duplicates to the bank")
+    args = parser.parse_args()
+
+    if args.bank:
+        client = sqlite3.connect(args.bank)
+    else:
+        from import_excel_to_db import connect_to_db
+        client = connect_to_db()
+
+    if args.command == "backfill":
+        backfill(client)
+    else:
+        check_scraped(client, args.outputs, args.threshold, args.report, args.update_bank)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from datetime import datetime, timezone
+
+import numpy as np
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'lib', 'db', 'schema.sql')
+
+# Rows handed to one executemany call and committed together
+DEFAULT_BATCH_SIZE = 50_000
+
+# Share of questions per subject, and its chapters from most to least asked
+SUBJECTS = {
+    'physics': (0.36, [
+        'Current Electricity', 'Electrostatics', 'Modern Physics', 'Rotational Motion', 'Ray Optics',
+        'Magnetic Effects of Current', 'Laws of Motion', 'Work Energy and Power', 'Thermodynamics',
+        'Electromagnetic Induction', 'Wave Optics', 'Simple Harmonic Motion', 'Gravitation',
+        'Kinematics', 'Properties of Matter', 'Semiconductors', 'Units and Measurements', 'Waves',
+    ]),
+    'chemistry': (0.33, [
+        'Organic Compounds Containing Nitrogen', 'Chemical Bonding', 'Coordination Compounds',
+        'Chemical Thermodynamics', 'Electrochemistry', 'Hydrocarbons', 'Chemical Kinetics',
+        'Solutions', 'Equilibrium', 'p-Block Elements', 'd and f Block Elements', 'Biomolecules',
+        'Atomic Structure', 'Aldehydes Ketones and Carboxylic Acids', 'Periodic Table', 'Polymers',
+    ]),
+    'mathematics': (0.31, [
+        'Definite Integration', 'Matrices and Determinants', 'Vector Algebra', 'Three Dimensional Geometry',
+        'Probability', 'Sequences and Series', 'Complex Numbers', 'Differential Equations',
+        'Limits and Continuity', 'Conic Sections', 'Binomial Theorem', 'Straight Lines',
+        'Permutations and Combinations', 'Application of Derivatives', 'Trigonometry', 'Statistics',
+    ]),
+}
+
+# Newer papers are larger and more of them are digitised, so question counts grow with the year
+EXAM_YEARS = list(range(2002, 2026))
+
+EXAM_NAMES = (('JEE Main', 0.8), ('JEE Advanced', 0.2))
+
+LABELS = ('A', 'B', 'C', 'D')
+
+VOCABULARY = (
+    'a particle of mass moves along the x axis with velocity acceleration force energy charge field '
+    'current resistance potential circuit lens mirror wave frequency angle radius sphere plane line '
+    'point function integral derivative matrix determinant vector probability series sequence root '
+    'equation value sum product reaction compound acid base solution concentration temperature '
+    'pressure volume gas molecule atom bond electron orbital isomer catalyst rate constant the is of '
+    'to and in if then find which correct statement following given shown figure system where at by'
+).split()
+
+# Text fragments reused across rows: generating every text word by word would dominate the run time
+FRAGMENT_POOL_SIZE = 8192
+
+def zipf_weights(count, exponent):
+    weights = 1.0 / np.arange(1, count + 1, dtype=np.float64) ** exponent
+    return weights / weights.sum()
+
+def make_fragments(rng, words_low, words_high):
+    lengths = rng.integers(words_low, words_high + 1, FRAGMENT_POOL_SIZE)
+    return [
+        ' '.join(VOCABULARY[i] for i in rng.integers(0, len(VOCABULARY), length))
+        for length in lengths
+    ]
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    # A generated file is thrown away if the run dies, so skip the journal and fsyncs
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -1048576")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+def create_tables(conn):
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    # The API reads and writes user_progress.answer (see backend/app/attempt_log.py)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(user_progress)")}
+    if 'answer' not in columns:
+        conn.execute("ALTER TABLE user_progress ADD COLUMN answer TEXT")
+
+def generate_questions(conn, rng, count, batch_size):
+    """
+    Insert questions 1..count with four options each. Returns (correct option index,
+    difficulty) per question, indexed by id - 1, for generating progress.
+    """
+    subjects = list(SUBJECTS)
+    subject_weights = np.array([SUBJECTS[s][0] for s in subjects])
+    year_weights = np.arange(1, len(EXAM_YEARS) + 1, dtype=np.float64)
+    year_weights /= year_weights.sum()
+    exam_names = [name for name, _ in EXAM_NAMES]
+    exam_name_weights = np.array([weight for _, weight in EXAM_NAMES])
+    question_fragments = make_fragments(rng, 10, 30)
+    option_fragments = make_fragments(rng, 1, 6)
+
+    answers = rng.integers(0, len(LABELS), count).astype(np.int8)
+    # Per-question offset to users' log-odds of answering correctly
+    difficulty = rng.normal(0.0, 1.0, count).astype(np.float32)
+
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        ids = np.arange(start + 1, start + size + 1)
+        subject_codes = rng.choice(len(subjects), size, p=subject_weights)
+        chapter_ranks = np.empty(size, dtype=np.int64)
+        for code, subject in enumerate(subjects):
+            mask = subject_codes == code
+            chapters = SUBJECTS[subject][1]
+            chapter_ranks[mask] = rng.choice(len(chapters), int(mask.sum()), p=zipf_weights(len(chapters), 0.8))
+        years = rng.choice(len(EXAM_YEARS), size, p=year_weights)
+        name_codes = rng.choice(len(exam_names), size, p=exam_name_weights)
+        texts = rng.integers(0, FRAGMENT_POOL_SIZE, (size, 3))
+        option_texts = rng.integers(0, FRAGMENT_POOL_SIZE, (size, len(LABELS)))
+
+        question_rows = []
+        option_rows = []
+        for i in range(size):
+            question_id = int(ids[i])
+            subject = subjects[subject_codes[i]]
+            answer = int(answers[question_id - 1])
+            options = [option_fragments[j] for j in option_texts[i]]
+            question_rows.append((
+                question_id,
+                question_id % 90 + 1,
+                f"{question_fragments[texts[i, 0]]} {question_fragments[texts[i, 1]]}?",
+                subject,
+                EXAM_YEARS[years[i]],
+                exam_names[name_codes[i]],
+                SUBJECTS[subject][1][chapter_ranks[i]],
+                'mcq',
+                LABELS[answer],
+                options[answer],
+                question_fragments[texts[i, 2]],
+                1,
+            ))
+            for position, label in enumerate(LABELS):
+                option_rows.append((question_id, label, options[position], int(position == answer)))
+
+        conn.executemany(
+            """
+            INSERT INTO questions (
+                id, number, text, subject, exam_year, exam_name, chapter,
+                question_type, answer_key, correct_answer, explanation, page
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            question_rows
+        )
+        conn.executemany(
+            "INSERT INTO options (question_id, label, text, is_correct) VALUES (?, ?, ?, ?)",
+            option_rows
+        )
+        conn.commit()
+        print(f"Questions: {start + size}/{count}")
+    return answers, difficulty
+
+def user_id_for(index):
+    # Zero-padded so ids sort in generation order and progress rows append to the unique index
+    return f"synthetic-user-{index:08d}"
+
+def attempts_per_user(rng, users, total, questions, exponent):
+    """
+    Split `total` progress rows over users with Zipfian activity, heaviest users at
+    random positions. A user can have at most one row per question, so what a
+    capped user cannot take is spread over the others.
+    """
+    weights = zipf_weights(users, exponent)[rng.permutation(users)]
+    counts = np.zeros(users, dtype=np.int64)
+    remaining = min(total, users * questions)
+    while remaining > 0:
+        open_users = counts < questions
+        share = np.where(open_users, weights, 0.0)
+        share /= share.sum()
+        extra = np.minimum(np.floor(share * remaining).astype(np.int64), questions - counts)
+        if extra.sum() == 0:
+            # Leftover smaller than one row per user: give it to the most active open users
+            order = np.argsort(-share)[:remaining]
+            extra[order] = 1
+        counts += extra
+        remaining -= int(extra.sum())
+    return counts
+
+def pick_questions(rng, count, popularity_cdf, rank_to_id):
+    """`count` distinct question ids drawn by popularity, sorted"""
+    questions = len(rank_to_id)
+    if count * 2 >= questions:
+        # Near-complete coverage: rejection sampling would stall on the long tail
+        return np.sort(rng.choice(questions, count, replace=False)) + 1
+    chosen = np.empty(0, dtype=np.int64)
+    for _ in range(4):
+        draws = np.searchsorted(popularity_cdf, rng.random(int((count - len(chosen)) * 1.3) + 16))
+        chosen = np.unique(np.concatenate([chosen, rank_to_id[np.minimum(draws, questions - 1)]]))
+        if len(chosen) >= count:
+            return np.sort(rng.choice(chosen, count, replace=False))
+    # Top up from questions nobody drew
+    rest = np.setdiff1d(np.arange(1, questions + 1), chosen, assume_unique=True)
+    return np.sort(np.concatenate([chosen, rng.choice(rest, count - len(chosen), replace=False)]))
+
+def generate_progress(conn, rng, users, total, answers, difficulty, batch_size, user_exponent,
+                      question_exponent, days):
+    """Insert user_progress rows; returns the id of the user with the most rows"""
+    questions = len(answers)
+    counts = attempts_per_user(rng, users, total, questions, user_exponent)
+    popularity_cdf = np.cumsum(zipf_weights(questions, question_exponent))
+    rank_to_id = rng.permutation(questions) + 1
+    # Share of questions each user gets right, before question difficulty
+    skill = rng.beta(4.0, 3.0, users)
+    now = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), 's')
+    span = days * 86400
+
+    print(f"Progress rows: {int(counts.sum())} over {users} users "
+          f"(heaviest user {int(counts.max())}, median {int(np.median(counts))})")
+    pending = []
+    inserted = 0
+    for user in range(users):
+        count = int(counts[user])
+        if count == 0:
+            continue
+        question_ids = pick_questions(rng, count, popularity_cdf, rank_to_id)
+        logit = np.log(skill[user] / (1 - skill[user])) - difficulty[question_ids - 1]
+        correct = rng.random(count) < 1 / (1 + np.exp(-logit))
+        right = answers[question_ids - 1]
+        wrong = (right + rng.integers(1, len(LABELS), count)) % len(LABELS)
+        chosen = np.where(correct, right, wrong)
+        attempt_counts = rng.geometric(0.6, count)
+        time_spent = np.clip(rng.lognormal(np.log(75), 0.6, count), 5, 1800).astype(np.int64)
+        # Each user starts somewhere in the window and keeps practising until now
+        first = rng.integers(0, span)
+        created = now - np.timedelta64(span, 's') + np.timedelta64(first, 's') + \
+            rng.integers(0, span - first + 1, count).astype('timedelta64[s]')
+        updated = np.minimum(created + (attempt_counts - 1) * rng.integers(60, 7 * 86400, count).astype('timedelta64[s]'), now)
+        created_at = np.char.replace(np.datetime_as_string(created, unit='s'), 'T', ' ').tolist()
+        updated_at = np.char.replace(np.datetime_as_string(updated, unit='s'), 'T', ' ').tolist()
+
+        user_id = user_id_for(user)
+        pending.extend(zip(
+            [user_id] * count,
+            question_ids.tolist(),
+            [LABELS[c] for c in chosen.tolist()],
+            correct.astype(np.int64).tolist(),
+            attempt_counts.tolist(),
+            time_spent.tolist(),
+            created_at,
+            updated_at,
+        ))
+        if len(pending) >= batch_size:
+            inserted += _insert_progress(conn, pending)
+            pending = []
+            print(f"Progress rows: {inserted}/{int(counts.sum())}")
+    if pending:
+        inserted += _insert_progress(conn, pending)
+        print(f"Progress rows: {inserted}/{int(counts.sum())}")
+    return user_id_for(int(np.argmax(counts)))
+
+def _insert_progress(conn, rows):
+    conn.executemany(
+        """
+        INSERT INTO user_progress (
+            user_id, question_id, answer, is_correct, attempt_count, time_spent, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows
+    )
+    conn.commit()
+    return len(rows)
+
+# Queries behind each endpoint, as run by backend/app/main.py and its modules.
+# {ids} and {offset} are filled in from the generated data.
+ENDPOINT_QUERIES = [
+    ("GET /api/questions (deep page)", """
+        SELECT q.id, q.number, q.text, q.subject, o.label, o.text, o.is_correct
+        FROM questions q LEFT JOIN options o ON q.id = o.question_id
+        LIMIT 10 OFFSET {offset}
+    """, ()),
+    ("GET /api/questions?subject=", """
+        SELECT q.id, q.number, q.text, q.subject, o.label, o.text, o.is_correct
+        FROM questions q LEFT JOIN options o ON q.id = o.question_id
+        WHERE q.subject = ? LIMIT 10 OFFSET {offset}
+    """, ('physics',)),
+    ("GET /api/questions?ids=", """
+        SELECT q.id, q.number, q.text, q.subject, o.label, o.text, o.is_correct
+        FROM questions q LEFT JOIN options o ON q.id = o.question_id
+        WHERE q.id IN ({ids})
+    """, ()),
+    ("GET /api/user-progress/stats (attempted)", """
+        SELECT COUNT(DISTINCT question_id) FROM user_progress WHERE user_id = ?
+    """, ('{user}',)),
+    ("GET /api/user-progress/stats (by subject)", """
+        SELECT q.subject, COUNT(DISTINCT up.question_id),
+               SUM(CASE WHEN up.is_correct = 1 THEN 1 ELSE 0 END)
+        FROM user_progress up JOIN questions q ON up.question_id = q.id
+        WHERE up.user_id = ? GROUP BY q.subject
+    """, ('{user}',)),
+    ("GET /api/practice/next (queue build)", """
+        SELECT question_id, is_correct FROM user_progress WHERE user_id = ?
+    """, ('{user}',)),
+    ("POST /api/user-progress (compaction lookup)", """
+        SELECT is_correct FROM user_progress WHERE user_id = ? AND question_id = ?
+    """, ('{user}', 1)),
+    ("GET /api/user-progress/timeline", """
+        SELECT day, subject, chapter, attempts, correct, time_spent FROM progress_daily
+        WHERE user_id = ? AND day BETWEEN date('now', '-365 days') AND date('now') ORDER BY day
+    """, ('{user}',)),
+]
+
+def explain(conn, user_id, repeats=5):
+    """Print the query plan and median latency of each endpoint query for the given user"""
+    question_count = conn.execute("SELECT MAX(id) FROM questions").fetchone()[0] or 0
+    progress_daily = conn.execute("SELECT 1 FROM progress_daily LIMIT 1").fetchone()
+    ids = ",".join(str(i) for i in np.linspace(1, max(question_count, 1), 100, dtype=np.int64))
+    print(f"Endpoint queries for {user_id} ({question_count} questions)")
+    for name, sql, params in ENDPOINT_QUERIES:
+        if 'progress_daily' in sql and not progress_daily:
+            print(f"\n{name}: skipped, progress_daily is filled by the API on startup")
+            continue
+        sql = sql.format(ids=ids, offset=int(question_count * 0.9))
+        params = tuple(user_id if p == '{user}' else p for p in params)
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        timings = []
+        rows = 0
+        for _ in range(repeats):
+            started = time.perf_counter()
+            rows = len(conn.execute(sql, params).fetchall())
+            timings.append(time.perf_counter() - started)
+        print(f"\n{name}: {sorted(timings)[len(timings) // 2] * 1000:.2f} ms, {rows} rows")
+        for _, _, _, detail in plan:
+            print(f"    {detail}")
+
+def heaviest_user(conn):
+    row = conn.execute(
+        "SELECT user_id FROM user_progress GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    return row[0] if row else None
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fill a local SQLite/libsql file with synthetic questions and user progress for scale testing"
+    )
+    parser.add_argument("database", help="SQLite file to create (point TURSO_DATABASE_URL at file:<path> to serve it)")
+    parser.add_argument("--questions", type=int, default=100_000, help="Questions to generate (default: 100000)")
+    parser.add_argument("--users", type=int, default=10_000, help="Users to generate (default: 10000)")
+    parser.add_argument("--progress", type=int, default=1_000_000,
+                        help="user_progress rows to generate (default: 1000000)")
+    parser.add_argument("--user-skew", type=float, default=1.0,
+                        help="Zipf exponent of attempts per user (default: 1.0)")
+    parser.add_argument("--question-skew", type=float, default=0.8,
+                        help="Zipf exponent of question popularity (default: 0.8)")
+    parser.add_argument("--days", type=int, default=365, help="Days of history to spread attempts over (default: 365)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Rows per bulk insert (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--explain", action="store_true",
+                        help="Afterwards, print query plans and latencies of the endpoint queries")
+    parser.add_argument("--explain-only", action="store_true",
+                        help="Only print query plans and latencies for an existing database")
+    args = parser.parse_args()
+
+    if args.explain_only:
+        if not os.path.exists(args.database):
+            print(f"Database not found: {args.database}")
+            sys.exit(1)
+        conn = sqlite3.connect(args.database)
+        explain(conn, heaviest_user(conn))
+        return
+
+    if os.path.exists(args.database):
+        print(f"Refusing to overwrite existing database: {args.database}")
+        sys.exit(1)
+
+    rng = np.random.default_rng(args.seed)
+    conn = connect(args.database)
+    create_tables(conn)
+
+    started = time.monotonic()
+    answers, difficulty = generate_questions(conn, rng, args.questions, args.batch_size)
+    print(f"Generated {args.questions} questions in {time.monotonic() - started:.1f}s")
+
+    started = time.monotonic()
+    user_id = generate_progress(
+        conn, rng, args.users, args.progress, answers, difficulty, args.batch_size,
+        args.user_skew, args.question_skew, args.days
+    )
+    print(f"Generated progress in {time.monotonic() - started:.1f}s")
+
+    if args.explain:
+        explain(conn, user_id)
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import { readFileSync } from 'fs';
+import { existsSync, readdirSync, readFileSync } from 'fs';
 import { join } from 'path';
 import { importData } from '../src/lib/db/import-data.js';
 import { fileURLToPath } from 'url';
@@ -7,31 +7,85 @@ import { dirname } from 'path';
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = dirname(__filename);
 
+const MANIFEST_FILE = 'manifest.json';
+
+interface Manifest {
+  source: string;
+  status: string;
+  files: { questions: string; images: string };
+}
+
+interface ImageRecord {
+  page: number;
+  path: string;
+  hash: string;
+}
+
+// A single-PDF run writes its manifest to the output directory itself;
+// a batch run writes one per document subdirectory
+function findDocumentDirs(outputDir: string): string[] {
+  if (existsSync(join(outputDir, MANIFEST_FILE))) {
+    return [outputDir];
+  }
+  // Document directories mirror the input folders, so they can be nested
+  return readdirSync(outputDir, { withFileTypes: true })
+    .filter((entry) => entry.isDirectory())
+    .flatMap((entry) => findDocumentDirs(join(outputDir, entry.name)))
+    .sort();
+}
+
+function readJsonLines<T>(filePath: string): T[] {
+  if (!existsSync(filePath)) {
+    return [];
+  }
+  return readFileSync(filePath, 'utf-8')
+    .split('\n')
+    .filter((line) => line.trim())
+    .map((line, index) => {
+      try {
+        return JSON.parse(line) as T;
+      } catch (error) {
+        throw new Error(`Failed to parse ${filePath} line ${index + 1}: ${error instanceof Error ? error.message : String(error)}`);
+      }
+    });
+}
+
+async function importDocument(documentDir: string) {
+  let manifest: Manifest;
+  try {
+    manifest = JSON.parse(readFileSync(join(documentDir, MANIFEST_FILE), 'utf-8'));
+  } catch (error) {
+    throw new Error(`Failed to read manifest in ${documentDir}: ${error instanceof Error ? error.message : String(error)}`);
+  }
+
+  if (manifest.status !== 'complete') {
+    throw new Error(`Extraction of ${manifest.source} is not complete (status: ${manifest.status})`);
+  }
+
+  const images = readJsonLines<ImageRecord>(join(documentDir, manifest.files.images));
+  // Questions reference their images by content hash
+  const pathsByHash = new Map(images.map((image) => [image.hash, image.path]));
+  const questions = readJsonLines<any>(join(documentDir, manifest.files.questions)).map((question) => ({
+    ...question,
+    images: (question.images ?? []).map((hash: string) => pathsByHash.get(hash) ?? hash),
+  }));
+
+  console.log(`Importing ${questions.length} questions from ${manifest.source}`);
+  await importData({ questions, images });
+}
+
 async function main() {
   try {
-    // Read the JSON file
-    const filePath = join(__dirname, '../scraping/output/extracted_data.json');
-    
-    if (!filePath) {
-      throw new Error('Could not resolve file path');
-    }
+    const outputDir = process.argv[2] ?? join(__dirname, '../scraping/output');
+    const documentDirs = findDocumentDirs(outputDir);
 
-    let fileContent: string;
-    try {
-      fileContent = readFileSync(filePath, 'utf-8');
-    } catch (error) {
-      throw new Error(`Failed to read file: ${error instanceof Error ? error.message : String(error)}`);
+    if (documentDirs.length === 0) {
+      throw new Error(`No ${MANIFEST_FILE} found in ${outputDir}`);
     }
 
-    let data;
-    try {
-      data = JSON.parse(fileContent);
-    } catch (error) {
-      throw new Error(`Failed to parse JSON: ${error instanceof Error ? error.message : String(error)}`);
+    for (const documentDir of documentDirs) {
+      await importDocument(documentDir);
     }
-
-    // Import the data
-    await importData(data);
     console.log('Import completed successfully');
   } catch (error) {
     console.error('Error:', error instanceof Error ? error.message : String(error));
@@ -42,4 +96,4 @@ async function main() {
 main().catch((error) => {
   console.error('Unhandled error:', error instanceof Error ? error.message : String(error));
   process.exit(1);
-}); 
\ No newline at end of file
+});
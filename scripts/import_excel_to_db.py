@@ -7,6 +7,16 @@ from datetime import datetime
 import asyncio
 import time
 import random
+import json
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from catalog_snapshot import build_snapshot
+from dedupe import (
+    DEFAULT_THRESHOLD, DuplicateReport, SignatureBank, question_fingerprint_text, question_key, save_signature
+)
+from dedupe import create_tables as create_signature_tables
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +25,13 @@ load_dotenv()
 DB_URL = os.getenv('TURSO_DATABASE_URL')
 DB_TOKEN = os.getenv('TURSO_AUTH_TOKEN')
 
+# Rows committed together; a batch is the unit of checkpointing and of --resume
+DEFAULT_BATCH_SIZE = 100
+
+# Attempts at a batch while the database is locked, backing off from this many seconds
+LOCK_RETRIES = 10
+LOCK_RETRY_BASE_DELAY = 1
+
 if not DB_URL or not DB_TOKEN:
     print("Error: Database URL or Auth Token not found in environment variables")
     sys.exit(1)
@@ -63,13 +80,14 @@ def create_tables(client):
             FOREIGN KEY(question_id) REFERENCES questions(id)
         )
         ''')
+        create_signature_tables(client)
         print("Tables created successfully!")
     except Exception as e:
         print(f"Error creating tables: {str(e)}")
         sys.exit(1)
 
-def insert_question(client, row, number):
-    """Insert a question and its options into the database"""
+def answer_letter_for(row):
+    """The correct option letter of a row; raises ValueError for rows insert_question would reject"""
     # Extract the letter from "Option X" format
     correct_answer = row['Correct Answer']
     if not correct_answer.startswith('Option '):
@@ -78,6 +96,11 @@ def insert_question(client, row, number):
     answer_letter = correct_answer.split(' ')[1]
     if answer_letter not in ['A', 'B', 'C', 'D']:
         raise ValueError(f"Invalid correct answer letter. Must be A, B, C, or D. Got: {answer_letter}")
+    return answer_letter
+
+def insert_question(client, row, number):
+    """Insert a question and its options into the database, returning the new question id"""
+    answer_letter = answer_letter_for(row)
     
     # Convert and sanitize data
     def sanitize_text(text):
@@ -118,54 +141,40 @@ def insert_question(client, row, number):
     ) RETURNING id
     """
     
-    max_retries = 10
-    base_delay = 1  # Base delay in seconds
+    # Execute the question insert with sanitized data
+    params = (
+        question_data['number'],
+        question_data['text'],
+        question_data['subject'],
+        question_data['exam_year'],
+        question_data['exam_name'],
+        question_data['chapter'],
+        question_data['question_type'],
+        question_data['answer_key'],
+        question_data['correct_answer'],
+        question_data['explanation'],
+        question_data['page']
+    )
     
-    for attempt in range(max_retries):
-        try:
-            # Execute the question insert with sanitized data
-            params = (
-                question_data['number'],
-                question_data['text'],
-                question_data['subject'],
-                question_data['exam_year'],
-                question_data['exam_name'],
-                question_data['chapter'],
-                question_data['question_type'],
-                question_data['answer_key'],
-                question_data['correct_answer'],
-                question_data['explanation'],
-                question_data['page']
-            )
-            
-            result = client.execute(query, params)
-            question_id = result.fetchone()[0]
-
-            # Insert options with sanitized data
-            options = [
-                ('A', sanitize_text(row['Option A']), 1 if answer_letter == 'A' else 0),
-                ('B', sanitize_text(row['Option B']), 1 if answer_letter == 'B' else 0),
-                ('C', sanitize_text(row['Option C']), 1 if answer_letter == 'C' else 0),
-                ('D', sanitize_text(row['Option D']), 1 if answer_letter == 'D' else 0)
-            ]
-            
-            for label, text, is_correct in options:
-                options_query = """
-                INSERT INTO options (question_id, label, text, is_correct)
-                VALUES (?, ?, ?, ?)
-                """
-                client.execute(options_query, (question_id, label, text, is_correct))
-            
-            return  # Success! Exit the function
-                
-        except Exception as e:
-            if 'database is locked' in str(e) and attempt < max_retries - 1:
-                # Calculate exponential backoff with jitter
-                delay = min(base_delay * (2 ** attempt) + random.uniform(0, 0.1), 30)
-                print(f"Database locked, attempt {attempt + 1}/{max_retries}. Waiting {delay:.2f} seconds...")
-                time.sleep(delay)
-                continue
-            raise  # Re-raise the exception if we've exhausted retries or it's a different error
+    result = client.execute(query, params)
+    question_id = result.fetchone()[0]
+
+    # Insert options with sanitized data
+    options = [
+        ('A', sanitize_text(row['Option A']), 1 if answer_letter == 'A' else 0),
+        ('B', sanitize_text(row['Option B']), 1 if answer_letter == 'B' else 0),
+        ('C', sanitize_text(row['Option C']), 1 if answer_letter == 'C' else 0),
+        ('D', sanitize_text(row['Option D']), 1 if answer_letter == 'D' else 0)
+    ]
+    
+    for label, text, is_correct in options:
+        options_query = """
+        INSERT INTO options (question_id, label, text, is_correct)
+        VALUES (?, ?, ?, ?)
+        """
+        client.execute(options_query, (question_id, label, text, is_correct))
+    
+    return question_id
 
 def clear_existing_data(client):
     """Clear all existing data from the tables"""
@@ -173,6 +182,8 @@ def clear_existing_data(client):
         # Delete in correct order due to foreign key constraints
         client.execute("DELETE FROM options")
         client.execute("DELETE FROM questions")
+        # Signatures of scraped questions (scraped:*) do not belong to the imported rows
+        client.execute("DELETE FROM question_signatures WHERE key LIKE 'question:%'")
         print("Cleared existing data from the database")
     except Exception as e:
         print(f"Error clearing existing data: {str(e)}")
@@ -187,8 +198,117 @@ def check_question_exists(client, number):
         print(f"Error checking question existence: {str(e)}")
         return False
 
-def process_excel(excel_file, should_clear_existing=True):
+def file_fingerprint(path):
+    """Hash the input file so a checkpoint is never resumed against a different workbook"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def default_checkpoint_path(excel_file):
+    return f"{excel_file}.import-checkpoint.json"
+
+def load_checkpoint(checkpoint_path, fingerprint, batch_size):
+    """Return the set of batch indexes already committed by a previous run"""
+    if not os.path.exists(checkpoint_path):
+        return set()
+
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+
+    if checkpoint.get('fingerprint') != fingerprint:
+        print(f"Error: Checkpoint {checkpoint_path} was written for a different version of the Excel file")
+        sys.exit(1)
+    if checkpoint.get('batch_size') != batch_size:
+        print(f"Error: Checkpoint was written with --batch-size {checkpoint.get('batch_size')}, got {batch_size}")
+        sys.exit(1)
+
+    return set(checkpoint.get('completed_batches', []))
+
+def save_checkpoint(checkpoint_path, fingerprint, batch_size, total_batches, completed_batches):
+    """Durably record committed batches (write to a temp file, fsync, then atomically rename)"""
+    checkpoint = {
+        'fingerprint': fingerprint,
+        'batch_size': batch_size,
+        'total_batches': total_batches,
+        'completed_batches': sorted(completed_batches),
+        'updated_at': datetime.now().isoformat()
+    }
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_path)
+
+# Each writer thread gets its own connection; libsql connections are not shared across threads
+_thread_local = threading.local()
+
+def get_writer_client():
+    client = getattr(_thread_local, 'client', None)
+    if client is None:
+        client = connect_to_db()
+        _thread_local.client = client
+    return client
+
+def _write_batch_once(client, rows, should_clear_existing):
+    inserted, skipped, failed = 0, 0, []
+    for question_number, row, signature in rows:
+        if not should_clear_existing and check_question_exists(client, question_number):
+            skipped += 1
+            continue
+        try:
+            question_id = insert_question(client, row, question_number)
+            if signature is not None:
+                save_signature(client, question_key(question_id), signature, question_id)
+            inserted += 1
+        except ValueError as e:
+            failed.append((question_number, str(e)))
+    client.commit()
+    return inserted, skipped, failed
+
+def write_batch(batch_index, rows, should_clear_existing):
+    """
+    Insert one batch of (question_number, row, signature) tuples and commit it.
+    Rows with invalid data are reported and skipped; database errors roll back
+    the whole batch so it can be retried with --resume. Dedupe signatures are
+    committed with their questions, so the bank never refers to rolled-back rows.
+    A locked database rolls the batch back and re-runs it from the start, so a
+    retry never repeats inserts that already went into the open transaction.
+    """
+    for attempt in range(LOCK_RETRIES):
+        client = get_writer_client()
+        try:
+            inserted, skipped, failed = _write_batch_once(client, rows, should_clear_existing)
+            return batch_index, inserted, skipped, failed
+        except Exception as e:
+            try:
+                client.rollback()
+            except Exception:
+                pass
+            # Drop the connection so a retry starts from a clean one
+            _thread_local.client = None
+            if 'database is locked' in str(e) and attempt < LOCK_RETRIES - 1:
+                # Exponential backoff with jitter
+                delay = min(LOCK_RETRY_BASE_DELAY * (2 ** attempt) + random.uniform(0, 0.1), 30)
+                print(f"Database locked writing batch {batch_index + 1}, attempt {attempt + 1}/{LOCK_RETRIES}. "
+                      f"Retrying the batch in {delay:.2f} seconds...")
+                time.sleep(delay)
+                continue
+            raise
+
+def row_fingerprint_text(row):
+    def text(value):
+        return "" if pd.isna(value) else str(value)
+    return question_fingerprint_text(text(row['Question']), [text(row[f'Option {label}']) for label in 'ABCD'])
+
+def process_excel(excel_file, should_clear_existing=True, resume=False, batch_size=DEFAULT_BATCH_SIZE,
+                  writers=1, max_in_flight=None, checkpoint_path=None, snapshot_path=None,
+                  dedupe=True, dedupe_threshold=DEFAULT_THRESHOLD, dedupe_report_path=None):
     client = None
+    checkpoint_path = checkpoint_path or default_checkpoint_path(excel_file)
+    max_in_flight = max_in_flight or writers * 2
     try:
         # Read Excel file
         df = pd.read_excel(excel_file)
@@ -204,6 +324,20 @@ def process_excel(excel_file, should_clear_existing=True):
         if missing_columns:
             print(f"Error: Missing required columns: {missing_columns}")
             sys.exit(1)
+
+        fingerprint = file_fingerprint(excel_file)
+        total_rows = len(df)
+        total_batches = (total_rows + batch_size - 1) // batch_size
+
+        # A resumed import must never wipe the rows committed by the previous run
+        if resume:
+            should_clear_existing = False
+            completed_batches = load_checkpoint(checkpoint_path, fingerprint, batch_size)
+            print(f"Resuming from checkpoint: {len(completed_batches)}/{total_batches} batches already committed")
+        else:
+            completed_batches = set()
+            if os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
             
         # Connect to database
         client = connect_to_db()
@@ -222,38 +356,121 @@ def process_excel(excel_file, should_clear_existing=True):
         # Clear existing data if requested
         if should_clear_existing:
             clear_existing_data(client)
+            client.commit()
         
-        # Process each row with error handling and progress tracking
-        total_rows = len(df)
+        # Near-duplicates of banked questions (or of earlier rows) are reported instead of inserted
+        bank = None
+        report = DuplicateReport()
+        if dedupe:
+            bank = SignatureBank(dedupe_threshold)
+            bank.load(client)
+
+        # Process batches with error handling and progress tracking
         successful_inserts = 0
         failed_inserts = 0
         skipped_inserts = 0
-        
-        for index, row in df.iterrows():
-            try:
-                question_number = index + 1
-                
-                # Skip if question already exists and we're not clearing data
-                if not should_clear_existing and check_question_exists(client, question_number):
-                    skipped_inserts += 1
-                    if skipped_inserts % 10 == 0:
-                        print(f"Skipped {skipped_inserts} existing questions")
+        failed_batches = []
+
+        def dedupe_rows(rows):
+            """Drop near-duplicates and attach each kept row's signature. Runs on the main thread only."""
+            kept = []
+            for question_number, row in rows:
+                if bank is None:
+                    kept.append((question_number, row, None))
                     continue
-                
-                insert_question(client, row, question_number)
-                successful_inserts += 1
-                if successful_inserts % 10 == 0:  # Print progress every 10 successful inserts
-                    print(f"Progress: {successful_inserts}/{total_rows} questions inserted successfully")
-            except Exception as e:
-                failed_inserts += 1
-                print(f"Error inserting question {index + 1}: {str(e)}")
-                print("Continuing with next question...")
-                continue
+                text = row_fingerprint_text(row)
+                signature = bank.signature(text)
+                if signature is not None:
+                    # Scraped questions (scraped:*) are not in the database; matching one must not skip a row
+                    match = bank.find(signature, prefixes=("question:", "row:"))
+                    if match:
+                        report.add(match[0], match[1], f"row:{question_number}", match[2], text)
+                        continue
+                    try:
+                        answer_letter_for(row)
+                    except ValueError:
+                        # insert_question rejects this row, so it must not shadow a later valid one;
+                        # the writer still reports it as failed
+                        kept.append((question_number, row, None))
+                        continue
+                    bank.add(f"row:{question_number}", signature)
+                kept.append((question_number, row, signature))
+            return kept
+
+        def pending_batches():
+            for batch_index in range(total_batches):
+                if batch_index in completed_batches:
+                    continue
+                start = batch_index * batch_size
+                rows = dedupe_rows(
+                    (index + 1, row)
+                    for index, row in df.iloc[start:start + batch_size].iterrows()
+                )
+                yield batch_index, rows
+
+        print(f"Writing {total_batches - len(completed_batches)} batches of up to {batch_size} rows "
+              f"with {writers} writer(s), at most {max_in_flight} in flight")
+
+        with ThreadPoolExecutor(max_workers=writers) as executor:
+            in_flight = {}
+            batches = pending_batches()
+
+            while True:
+                # Keep the number of queued batches bounded so memory stays flat
+                while len(in_flight) < max_in_flight:
+                    next_batch = next(batches, None)
+                    if next_batch is None:
+                        break
+                    batch_index, rows = next_batch
+                    future = executor.submit(write_batch, batch_index, rows, should_clear_existing)
+                    in_flight[future] = batch_index
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_index = in_flight.pop(future)
+                    try:
+                        _, inserted, skipped, failed = future.result()
+                    except Exception as e:
+                        failed_batches.append(batch_index)
+                        print(f"Error writing batch {batch_index + 1}/{total_batches}: {str(e)}")
+                        print("Batch rolled back, it will be retried with --resume")
+                        continue
+
+                    completed_batches.add(batch_index)
+                    save_checkpoint(checkpoint_path, fingerprint, batch_size, total_batches, completed_batches)
+
+                    successful_inserts += inserted
+                    skipped_inserts += skipped
+                    failed_inserts += len(failed)
+                    for question_number, error in failed:
+                        print(f"Error inserting question {question_number}: {error}")
+                    print(f"Progress: {len(completed_batches)}/{total_batches} batches committed "
+                          f"({successful_inserts} questions inserted)")
                 
         print(f"\nImport completed!")
         print(f"Successfully inserted: {successful_inserts} questions")
         print(f"Failed to insert: {failed_inserts} questions")
         print(f"Skipped existing: {skipped_inserts} questions")
+        if dedupe:
+            print(f"Skipped near-duplicates: {report.duplicate_count} questions")
+            if report.clusters:
+                report.write(dedupe_report_path or f"{excel_file}.dedupe-report.json")
+
+        if failed_batches:
+            print(f"{len(failed_batches)} batch(es) were not committed. "
+                  f"Re-run with --resume to continue from {checkpoint_path}")
+            sys.exit(1)
+
+        # Every batch is committed, the checkpoint is no longer needed
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        
+        # Publish a read-only catalog snapshot for the API workers
+        if snapshot_path:
+            build_snapshot(client, snapshot_path)
         
         if failed_inserts > 0:
             print("Some insertions failed. Please check the logs above for details.")
@@ -267,19 +484,51 @@ def process_excel(excel_file, should_clear_existing=True):
             print("Database connection closed")
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python import_excel_to_db.py <excel_file_path> [--keep-existing]")
+    parser = argparse.ArgumentParser(description="Import questions from an Excel workbook into Turso")
+    parser.add_argument("excel_file", help="Path to the Excel file")
+    parser.add_argument("--keep-existing", action="store_true",
+                        help="Do not clear existing questions before importing")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the last committed batch recorded in the checkpoint")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Rows committed per batch (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--writers", type=int, default=1,
+                        help="Number of concurrent batch writers (default: 1). SQLite and Turso take "
+                             "one writer at a time, so extra writers mostly wait on the write lock")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Maximum batches queued or being written at once (default: 2 x writers)")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Checkpoint file path (default: <excel_file>.import-checkpoint.json)")
+    parser.add_argument("--snapshot", default=None,
+                        help="Write a read-only catalog snapshot (SQLite) for the API to this path")
+    parser.add_argument("--no-dedupe", action="store_true",
+                        help="Insert near-duplicate questions instead of skipping them")
+    parser.add_argument("--dedupe-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Similarity at which a question counts as a duplicate (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--dedupe-report", default=None,
+                        help="Duplicate cluster report path (default: <excel_file>.dedupe-report.json)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.excel_file):
+        print(f"Error: File {args.excel_file} not found")
         sys.exit(1)
-        
-    excel_file = sys.argv[1]
-    if not os.path.exists(excel_file):
-        print(f"Error: File {excel_file} not found")
+    if args.batch_size < 1 or args.writers < 1:
+        print("Error: --batch-size and --writers must be at least 1")
         sys.exit(1)
     
-    # Check if we should keep existing data
-    should_clear_existing = "--keep-existing" not in sys.argv
-    
-    process_excel(excel_file, should_clear_existing)
+    process_excel(
+        args.excel_file,
+        should_clear_existing=not args.keep_existing,
+        resume=args.resume,
+        batch_size=args.batch_size,
+        writers=args.writers,
+        max_in_flight=args.max_in_flight,
+        checkpoint_path=args.checkpoint,
+        snapshot_path=args.snapshot,
+        dedupe=not args.no_dedupe,
+        dedupe_threshold=args.dedupe_threshold,
+        dedupe_report_path=args.dedupe_report
+    )
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,113 @@
+import os
+import sys
+import glob
+import json
+import shutil
+import argparse
+
+from dedupe import DEFAULT_THRESHOLD, SignatureBank, question_fingerprint_text
+
+# Where the scraper writes its content-addressed store, relative to each output directory
+SCRAPER_IMAGE_DIR = "images"
+
+QUESTION_IMAGES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS question_images (
+    question_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    image_hash TEXT NOT NULL,
+    PRIMARY KEY (question_id, position)
+)
+"""
+
+def publish_files(outputs, store):
+    """
+    Copy every image (and thumbnail) of the scraper outputs into the API's store.
+    Both use <hash[:2]>/<hash>.<ext>, and a name never changes content, so files
+    already in the store are skipped.
+    """
+    copied = skipped = 0
+    for output in outputs:
+        pattern = os.path.join(output, '**', SCRAPER_IMAGE_DIR, '??', '*')
+        for source in sorted(glob.glob(pattern, recursive=True)):
+            if source.endswith('.tmp') or not os.path.isfile(source):
+                continue
+            target = os.path.join(store, os.path.basename(os.path.dirname(source)), os.path.basename(source))
+            if os.path.exists(target):
+                skipped += 1
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Copy then rename, so the API never serves a half-written file
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+            copied += 1
+    print(f"Published {copied} image files to {store} ({skipped} already there)")
+
+def iter_scraped_questions_with_images(outputs):
+    """Yield (fingerprint text, image hashes) for scraped questions that have images"""
+    for output in outputs:
+        for questions_path in sorted(glob.glob(os.path.join(output, '**', 'questions.jsonl'), recursive=True)):
+            with open(questions_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    question = json.loads(line)
+                    image_hashes = question.get('images') or []
+                    if not image_hashes:
+                        continue
+                    options = [option.get('text') for option in question.get('options', [])]
+                    yield question_fingerprint_text(question.get('text'), options), image_hashes
+
+def link_images(client, outputs, threshold):
+    """
+    Record which database question each scraped question's images belong to.
+    Scraped questions carry no database id, so each is matched to the imported
+    question with the most similar text through the dedupe signature bank.
+    """
+    client.execute(QUESTION_IMAGES_SCHEMA)
+    bank = SignatureBank(threshold)
+    bank.load(client)
+
+    linked = unmatched = 0
+    for text, image_hashes in iter_scraped_questions_with_images(outputs):
+        signature = bank.signature(text)
+        # Only imported questions have ids; a scraped:* entry with the same text would otherwise win
+        match = bank.find(signature, prefixes=("question:",)) if signature is not None else None
+        if match is None or match[1] is None:
+            unmatched += 1
+            continue
+        question_id = match[1]
+        client.execute("DELETE FROM question_images WHERE question_id = ?", (question_id,))
+        for position, image_hash in enumerate(image_hashes):
+            client.execute(
+                "INSERT INTO question_images (question_id, position, image_hash) VALUES (?, ?, ?)",
+                (question_id, position, image_hash)
+            )
+        linked += 1
+    client.commit()
+    print(f"Linked images of {linked} questions; {unmatched} scraped questions matched no imported question")
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish scraped images to the API image store")
+    parser.add_argument("outputs", nargs="+", help="Scraper output directories")
+    parser.add_argument("--store", default=os.getenv("IMAGE_STORE_DIR", "images"),
+                        help="Image store served by the API (IMAGE_STORE_DIR)")
+    parser.add_argument("--link", action="store_true",
+                        help="Also record question_images rows for questions found in the database")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Text similarity needed to match a scraped question (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    missing = [output for output in args.outputs if not os.path.isdir(output)]
+    if missing:
+        print(f"Not a directory: {', '.join(missing)}")
+        sys.exit(1)
+
+    # Files first: a question must never reference an image the API cannot serve
+    publish_files(args.outputs, args.store)
+    if args.link:
+        from import_excel_to_db import connect_to_db
+        link_images(connect_to_db(), args.outputs, args.threshold)
+
+if __name__ == "__main__":
+    main()
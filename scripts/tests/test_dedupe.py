@@ -0,0 +1,58 @@
+import random
+import sys
+from pathlib import Path
+
+# Add the scripts directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from dedupe import DEFAULT_THRESHOLD, SignatureBank, shingle_hashes
+
+def _jaccard(text, other):
+    shingles, other_shingles = set(shingle_hashes(text).tolist()), set(shingle_hashes(other).tolist())
+    return len(shingles & other_shingles) / len(shingles | other_shingles)
+
+def _pairs(seed, low, high, count, max_edits=8):
+    """count (text, edited copy) pairs whose shingle Jaccard similarity is in [low, high)"""
+    rng = random.Random(seed)
+
+    def word():
+        return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 8)))
+
+    pairs = []
+    while len(pairs) < count:
+        words = [word() for _ in range(40)]
+        edited = list(words)
+        for _ in range(rng.randint(0, max_edits)):
+            edited[rng.randrange(len(edited))] = word()
+        text, other = ' '.join(words), ' '.join(edited)
+        if low <= _jaccard(text, other) < high:
+            pairs.append((text, other))
+    return pairs
+
+def _find(bank, text, other):
+    bank.add('banked', bank.signature(text), question_id=1)
+    return bank.find(bank.signature(other))
+
+def test_pairs_at_the_threshold_share_a_band():
+    # With no similarity cut-off, find() returns whatever the bands turned up
+    pairs = _pairs(1, DEFAULT_THRESHOLD, DEFAULT_THRESHOLD + 0.05, 200)
+    found = sum(_find(SignatureBank(threshold=0.0), text, other) is not None for text, other in pairs)
+    assert found == len(pairs)
+
+def test_recall_above_the_threshold():
+    pairs = _pairs(2, DEFAULT_THRESHOLD + 0.1, 1.01, 200)
+    found = [_find(SignatureBank(), text, other) for text, other in pairs]
+    assert sum(match is not None for match in found) >= 0.98 * len(pairs)
+    assert all(match[:2] == ('banked', 1) for match in found if match is not None)
+
+def test_dissimilar_questions_are_not_duplicates():
+    pairs = _pairs(3, 0.0, DEFAULT_THRESHOLD - 0.3, 200, max_edits=40)
+    found = sum(_find(SignatureBank(), text, other) is not None for text, other in pairs)
+    assert found <= 0.02 * len(pairs)
+
+def test_reformatted_copy_is_an_exact_match():
+    bank = SignatureBank()
+    bank.add('q:1', bank.signature('What is the SI unit of force?'), question_id=1)
+    signature = bank.signature('what is the si  unit of force')
+    assert bank.find(signature) == ('q:1', 1, 1.0)
+    assert bank.find(signature, prefixes=['scraped:']) is None
@@ -2,7 +2,7 @@
 
 import { useEffect, useState } from 'react';
 import { Question } from '@/lib/types/question';
-import { getQuestions } from '@/lib/api/questions';
+import { getQuestions, imageUrl } from '@/lib/api/questions';
 import { Card, CardContent } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
@@ -93,7 +93,8 @@ export default function Questions() {
                     {question.images.map((image, index) => (
                       <img
                         key={`${question.id}-image-${index}`}
-                        src={image}
+                        src={imageUrl(image)}
+                        loading="lazy"
                         alt={`Question ${question.number} - Image ${index + 1}`}
                         className="max-w-full h-auto rounded-lg"
                       />
@@ -3,17 +3,26 @@ import { auth } from '../firebase';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
+// Fields the API accepts in a sparse fieldset (QUESTION_FIELDS in backend/app/main.py)
+type QuestionField = 'id' | 'number' | 'text' | 'subject' | 'options' | 'images' | 'statements' | 'stats';
+
 interface GetQuestionsParams {
   subject?: string;
   page?: number;
   limit?: number;
+  // Fetch these questions in one request (at most 100); subject and paging are ignored
+  ids?: number[];
+  // Only return these fields, e.g. ['id', 'number', 'subject'] for list thumbnails
+  fields?: QuestionField[];
 }
 
-export async function getQuestions({ subject, page = 1, limit = 10 }: GetQuestionsParams = {}) {
+export async function getQuestions({ subject, page = 1, limit = 10, ids, fields }: GetQuestionsParams = {}) {
   const params = new URLSearchParams();
   if (subject) params.append('subject', subject);
   if (page) params.append('page', page.toString());
   if (limit) params.append('limit', limit.toString());
+  if (ids) params.append('ids', ids.join(','));
+  if (fields) params.append('fields', fields.join(','));
 
   // Get the current user's token
   const token = await auth.currentUser?.getIdToken();
@@ -56,4 +65,10 @@ export async function getQuestion(id: number) {
   }
 
   return response.json() as Promise<Question>;
-} 
\ No newline at end of file
+} 
+
+// Questions reference images by content hash; the bytes behind a URL never change,
+// so browsers and the edge cache them indefinitely
+export function imageUrl(hash: string, size: 'full' | 'thumb' = 'full') {
+  return `${API_BASE_URL}/api/images/${hash}${size === 'thumb' ? '?size=thumb' : ''}`;
+}
@@ -18,8 +18,8 @@ interface Question {
   options: Option[];
   images: string[];
   page: number;
-  bbox: BoundingBox;
-  statements?: string[];
+  bbox?: BoundingBox;
+  statements?: (string | { text: string; position: number })[];
 }
 
 interface ExtractedData {
@@ -27,7 +27,7 @@ interface ExtractedData {
   images: {
     page: number;
     path: string;
-    bbox: BoundingBox;
+    bbox?: BoundingBox;
   }[];
 }
 
@@ -76,36 +76,42 @@ export async function importData(data: ExtractedData): Promise<void> {
         // Insert statements if they exist
         if (question.statements) {
           for (let i = 0; i < question.statements.length; i++) {
+            const statement = question.statements[i];
             await executeQuery(
               `INSERT INTO statements (question_id, text, position) 
                VALUES (?, ?, ?)`,
-              [questionId, question.statements[i], i]
+              typeof statement === 'string'
+                ? [questionId, statement, i]
+                : [questionId, statement.text, statement.position]
             );
           }
         }
 
         // Insert question's bounding box
-        if (!question.bbox) {
-          throw new Error(`Missing bounding box for question ${question.number}`);
+        if (question.bbox) {
+          await executeQuery(
+            `INSERT INTO bounding_boxes (question_id, x0, y0, x1, y1) 
+             VALUES (?, ?, ?, ?, ?)`,
+            [
+              questionId,
+              question.bbox.x0,
+              question.bbox.y0,
+              question.bbox.x1,
+              question.bbox.y1,
+            ]
+          );
         }
 
-        await executeQuery(
-          `INSERT INTO bounding_boxes (question_id, x0, y0, x1, y1) 
-           VALUES (?, ?, ?, ?, ?)`,
-          [
-            questionId,
-            question.bbox.x0,
-            question.bbox.y0,
-            question.bbox.x1,
-            question.bbox.y1,
-          ]
-        );
-
         // Insert images
         for (const imagePath of question.images) {
-          // Find matching image data from the images array
-          const imageData = data.images.find((img) => img.path === imagePath);
-          if (imageData) {
+          // Find matching image data from the images array; an image repeated on several
+          // pages is stored once, so prefer its placement on the question's own page
+          const imageData =
+            data.images.find((img) => img.path === imagePath && img.page === question.page) ??
+            data.images.find((img) => img.path === imagePath);
+          if (imageData && !imageData.bbox) {
+            console.warn(`Warning: No position recorded for image ${imagePath}; serve it through question_images instead`);
+          } else if (imageData?.bbox) {
             await executeQuery(
               `INSERT INTO images (question_id, path, page, x0, y0, x1, y1) 
                VALUES (?, ?, ?, ?, ?, ?, ?)`,
@@ -83,4 +83,83 @@ CREATE TABLE IF NOT EXISTS math_expressions (
     math_notation TEXT NOT NULL, -- LaTeX or other math notation
     position INTEGER NOT NULL, -- Position in the question text
     FOREIGN KEY (question_id) REFERENCES questions(id) ON DELETE CASCADE
-); 
\ No newline at end of file
+); 
+
+-- MinHash signatures of imported questions, used to skip near-duplicates on later imports
+CREATE TABLE IF NOT EXISTS question_signatures (
+    key TEXT PRIMARY KEY,       -- question:<id> for imported questions, scraped:<source>#... for scraped ones
+    question_id INTEGER,
+    num_perm INTEGER NOT NULL,
+    signature BLOB NOT NULL,
+    created_at TEXT
+);
+
+-- Per-question aggregates maintained by the API from user_progress writes
+CREATE TABLE IF NOT EXISTS question_stats (
+    question_id INTEGER PRIMARY KEY,
+    users INTEGER NOT NULL DEFAULT 0,
+    correct_users INTEGER NOT NULL DEFAULT 0, -- users whose latest answer is correct
+    attempts INTEGER NOT NULL DEFAULT 0,
+    time_spent_sum INTEGER NOT NULL DEFAULT 0,
+    time_spent_sketch TEXT, -- legacy JSON sketch, moved to question_stats_sketch on API startup
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (question_id) REFERENCES questions(id) ON DELETE CASCADE
+);
+
+-- Log-bucketed histogram of time_spent per question, for quantiles; one row per bucket so
+-- workers add their counts in place (bucket -2147483648 counts zero times)
+CREATE TABLE IF NOT EXISTS question_stats_sketch (
+    question_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (question_id, bucket)
+) WITHOUT ROWID;
+
+-- Persisted leaderboard counts; board is "<all|subject>:<all|ISO week>", e.g. "physics:2026-W42"
+CREATE TABLE IF NOT EXISTS leaderboard_entries (
+    board TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    correct INTEGER NOT NULL DEFAULT 0,
+    attempted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (board, user_id)
+);
+
+-- Append-only log of every progress submission, one table per UTC month
+-- (attempt_events_YYYYMM, created by the API on first write of the month);
+-- compaction folds new events into user_progress, question_stats and leaderboard_entries
+CREATE TABLE IF NOT EXISTS attempt_log_watermarks (
+    partition TEXT PRIMARY KEY,            -- e.g. attempt_events_202610
+    last_event_id INTEGER NOT NULL DEFAULT 0 -- last event already folded into user_progress
+);
+
+-- Images of each question, by content hash (served from the image store by /api/images/{hash});
+-- filled by scripts/publish_images.py --link
+CREATE TABLE IF NOT EXISTS question_images (
+    question_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    image_hash TEXT NOT NULL,
+    PRIMARY KEY (question_id, position)
+);
+
+-- Per-user, per-day, per-chapter rollup of attempts, filled by attempt log compaction;
+-- serves /api/user-progress/timeline without scanning user_progress
+CREATE TABLE IF NOT EXISTS progress_daily (
+    user_id TEXT NOT NULL,
+    day TEXT NOT NULL, -- YYYY-MM-DD, UTC
+    subject TEXT NOT NULL,
+    chapter TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    time_spent INTEGER NOT NULL DEFAULT 0, -- in seconds
+    PRIMARY KEY (user_id, day, subject, chapter)
+) WITHOUT ROWID;
+
+-- Spaced-repetition box and due time (unix seconds) of each question a user is reviewing,
+-- updated by attempt log compaction; rebuilds /api/practice/next queues
+CREATE TABLE IF NOT EXISTS practice_reviews (
+    user_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    box INTEGER NOT NULL, -- index into REVIEW_INTERVALS (backend/app/practice.py)
+    due_at REAL NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+) WITHOUT ROWID;